@@ -1,147 +1,174 @@
-import requests
 from datetime import datetime
 import json
-import mlbstatsapi
+import re
+from team_directory import team_directory, resolve_team, team_not_found
+from game_store import game_store
+from cache import response_cache
+from metrics import metrics
+from player_stats import normalize_name, player_stats
+from probables import probable_pitchers
+from schedule_index import parse_date_range, schedule_index
+from seasons import current_season_year
+from league_stats import LEADER_STATS, QUALIFIER_LABEL, format_value, leader_stat, league_stats
+from models import HITTER_FIELD_SET, HITTER_FIELDS, MODEL_VERSION, PITCHER_FIELD_SET, PITCHER_FIELDS
+from rendering import render_cache, text_lines
 
-def get_pitcher_info(team):
-    """獲取指定球隊的投手資訊"""
-    try:
-        # MLB Stats API
-        url = f"https://statsapi.mlb.com/api/v1/teams"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-
-        # 獲取球隊ID
-        response = requests.get(url, headers=headers)
-        teams_data = response.json()
-        team_id = None
-        team_name = ""
-
-        # 查找對應的球隊ID
-        for team_info in teams_data['teams']:
-            if team.upper() in team_info['abbreviation'] or team.upper() in team_info['teamName'].upper():
-                team_id = team_info['id']
-                team_name = team_info['name']
-                break
-
-        if not team_id:
-            return f"找不到球隊 {team}"
-
-        # 獲取該球隊的比賽資訊
-        schedule_url = f"https://statsapi.mlb.com/api/v1/teams/{team_id}/probablepitchers"
-        schedule_response = requests.get(schedule_url, headers=headers)
-        pitcher_data = schedule_response.json()
-
-        if not pitcher_data:
-            return f"暫時沒有 {team_name} 的投手資訊"
+# 各端點的快取秒數
+PLAYER_STAT_TTL = 30 * 60
 
-        # 格式化輸出
-        output = f"**{team_name} 投手資訊**\n"
-        output += "預計先發投手資訊將在比賽日更新"
+# !compare 一次最多比較幾位球員，每個表格並排幾位
+MAX_COMPARE_PLAYERS = 20
+COMPARE_COLUMNS = 4
+_COMPARE_SEPARATORS = re.compile(r"[,，;；、]|\s+vs\.?\s+", re.IGNORECASE)
+_COMPARE_GROUPS = {
+    'h': 'hitting', 'hitting': 'hitting', 'hitter': 'hitting', 'hitters': 'hitting', '打者': 'hitting',
+    'p': 'pitching', 'pitching': 'pitching', 'pitcher': 'pitching', 'pitchers': 'pitching', '投手': 'pitching',
+}
 
-        return output
+def _game_time(game):
+    return game.start.strftime("%H:%M")
 
-    except Exception as e:
-        return f"獲取資料時發生錯誤: {str(e)}\n請稍後再試"
 
+def _probable_line(game):
+    venue = "主場" if game.home else "客場"
+    pitcher = game.pitcher or "尚未公布"
+    opposing = game.opposing_pitcher or "尚未公布"
+    return f"{game.date} {_game_time(game)} vs {game.opponent}（{venue}）：{pitcher}（對手先發：{opposing}）"
 
-def get_schedule():
-    """獲取今日比賽賽程"""
-    try:
-        # MLB Stats API
-        today = datetime.now().strftime("%Y-%m-%d")
-        url = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&date={today}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
 
-        response = requests.get(url, headers=headers)
-        schedule_data = response.json()
+def _schedule_line(game):
+    if game.away_score is not None and game.state != 'Preview':
+        return f"{game.away_name} {game.away_score} @ {game.home_name} {game.home_score}"
+    return f"{game.away_name} @ {game.home_name} - {_game_time(game)}"
 
-        if not schedule_data.get('dates'):
-            return "今天沒有比賽安排"
 
-        games = schedule_data['dates'][0]['games']
-        output = f"**{today} 比賽賽程**\n"
+def _history_line(game, with_date):
+    away_score = 'N/A' if game.away_score is None else game.away_score
+    home_score = 'N/A' if game.home_score is None else game.home_score
+    prefix = f"{game.date}: " if with_date else ""
+    return f"{prefix}{game.away_name} {away_score} @ {game.home_name} {home_score}"
 
-        for game in games:
-            away_team = game['teams']['away']['team']['name']
-            home_team = game['teams']['home']['team']['name']
-            game_time = datetime.strptime(
-                game['gameDate'], "%Y-%m-%dT%H:%M:%SZ").strftime("%H:%M")
-            output += f"{away_team} @ {home_team} - {game_time}\n"
 
-        return output
+def _recent_line(game, team_id):
+    # 判斷該隊是主場還是客場，並標記勝負（比分相同的已完成比賽，如因故提前結束，標記為和）
+    if game.away_score == game.home_score:
+        result = "和"
+    elif team_id == game.away_id:
+        result = "勝" if game.away_score > game.home_score else "敗"
+    else:
+        result = "勝" if game.home_score > game.away_score else "敗"
+    return (f"{game.start.strftime('%Y-%m-%d')}: {game.away_name} {game.away_score} @ "
+            f"{game.home_name} {game.home_score} [{result}]")
 
-    except Exception as e:
-        return f"獲取賽程時發生錯誤: {str(e)}\n請稍後再試"
 
+def _range_label(start, end):
+    return start if start == end else f"{start} ~ {end}"
 
-def get_all_teams():
-    """獲取所有MLB球隊列表"""
-    try:
-        url = "https://statsapi.mlb.com/api/v1/teams?sportId=1"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
 
-        response = requests.get(url, headers=headers)
-        teams_data = response.json()
+def _player_key(kind, player):
+    return (kind, normalize_name(player))
 
-        output = "**MLB球隊列表**\n"
-        for team in teams_data['teams']:
-            output += f"{team['name']} ({team['abbreviation']})\n"
 
-        return output
+def is_stat_cached(kind, player):
+    """hstat / pstat 的結果是否已在快取中（本地或共用快取 / 磁碟快取，供准入控制判斷成本）"""
+    return response_cache.contains(_player_key(kind, player))
 
-    except Exception as e:
-        return f"獲取球隊列表時發生錯誤: {str(e)}"
 
+def is_schedule_cached(date_range=None):
+    """日期範圍的賽程是否已在本地索引或共用快取中（無法解析的範圍直接回覆錯誤，也視為已快取）"""
+    try:
+        return schedule_index.is_cached(*parse_date_range(date_range))
+    except ValueError:
+        return True
 
-def get_game_history(team, date=None):
-    """獲取指定日期的比賽歷史"""
+def get_pitcher_info(team):
+    """獲取指定球隊的投手資訊"""
     try:
-        if not date:
-            date = datetime.now().strftime("%Y-%m-%d")
+        # 從共用球隊目錄查找對應的球隊ID
+        team_info = resolve_team(team)
+        if not team_info:
+            return team_not_found(team)
+        team_id = team_info.id
+        team_name = team_info.name
 
-        url = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&date={date}&teamId="
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+        # 從全聯盟預計先發表取得該球隊接下來的比賽
+        upcoming = probable_pitchers.for_team(team_id)
 
-        # 先獲取球隊ID
-        teams_response = requests.get(
-            "https://statsapi.mlb.com/api/v1/teams", headers=headers)
-        teams_data = teams_response.json()
-        team_id = None
+        if not upcoming:
+            return f"暫時沒有 {team_name} 的投手資訊"
+
+        # 格式化輸出（預計先發表刷新前重複查詢直接使用上次的結果）
+        with metrics.stage('format'):
+            return render_cache.render(('pitcher', team_id), upcoming, lambda: text_lines(
+                [f"**{team_name} 投手資訊**"] + [_probable_line(game) for game in upcoming]))
+
+    except Exception as e:
+        return f"獲取資料時發生錯誤: {str(e)}\n請稍後再試"
 
-        for team_info in teams_data['teams']:
-            if team.upper() in team_info['abbreviation'] or team.upper() in team_info['teamName'].upper():
-                team_id = team_info['id']
-                break
 
-        if not team_id:
-            return f"找不到球隊：{team}"
+def get_schedule(date_range=None):
+    """獲取比賽賽程（預設今天，可指定日期或範圍，例如 this week、2024-09-01..2024-09-30）"""
+    try:
+        start, end = parse_date_range(date_range)
+        # 由本地日期分區索引取得全聯盟賽程，缺少的日期才批次向 MLB Stats API 補抓
+        by_date = schedule_index.games_between(start, end)
+
+        if not any(by_date.values()):
+            if start == end == datetime.now().strftime("%Y-%m-%d"):
+                return "今天沒有比賽安排"
+            return f"{_range_label(start, end)} 沒有比賽安排"
+
+        # 每個日期分區各自記住渲染結果，分區刷新（比分變動）時才重新格式化
+        with metrics.stage('format'):
+            return ''.join(
+                render_cache.render(('schedule', date), games, lambda date=date, games=games: text_lines(
+                    [f"**{date} 比賽賽程**"] + [_schedule_line(game) for game in games]))
+                for date, games in by_date.items() if games)
+
+    except ValueError as e:
+        return str(e)
+    except Exception as e:
+        return f"獲取賽程時發生錯誤: {str(e)}\n請稍後再試"
 
-        # 獲取比賽歷史
-        history_url = url + str(team_id)
-        history_response = requests.get(history_url, headers=headers)
-        history_data = history_response.json()
 
-        output = f"**{team} 在 {date} 的比賽記錄**\n"
-        if not history_data.get('dates'):
-            return f"{date} 沒有比賽記錄"
+def get_all_teams():
+    """獲取所有MLB球隊列表"""
+    try:
+        teams = tuple(team_directory.teams())
+        with metrics.stage('format'):
+            return render_cache.render(('teams',), teams, lambda: text_lines(
+                ["**MLB球隊列表**"] + [f"{team.name} ({team.abbreviation})" for team in teams]))
 
-        for game in history_data['dates'][0]['games']:
-            away_team = game['teams']['away']['team']['name']
-            home_team = game['teams']['home']['team']['name']
-            away_score = game['teams']['away'].get('score', 'N/A')
-            home_score = game['teams']['home'].get('score', 'N/A')
-            output += f"{away_team} {away_score} @ {home_team} {home_score}\n"
+    except Exception as e:
+        return f"獲取球隊列表時發生錯誤: {str(e)}"
 
-        return output
 
+def get_game_history(team, date_range=None):
+    """獲取指定日期或日期範圍的比賽歷史"""
+    try:
+        start, end = parse_date_range(date_range)
+        # 先獲取球隊ID
+        team_info = resolve_team(team)
+        if not team_info:
+            return team_not_found(team)
+        team_id = team_info.id
+
+        # 全聯盟索引跨球隊共用，只需篩選該隊的比賽；每個日期分區各自記住該隊的渲染結果
+        by_date = schedule_index.games_between(start, end)
+        with_date = start != end
+        with metrics.stage('format'):
+            body = ''.join(
+                render_cache.render(('history', team_id, date, with_date), games, lambda games=games: text_lines(
+                    _history_line(game, with_date) for game in games if game.involves(team_id)))
+                for date, games in by_date.items())
+
+        label = _range_label(start, end)
+        if not body:
+            return f"{label} 沒有比賽記錄"
+        return f"**{team} 在 {label} 的比賽記錄**\n" + body
+
+    except ValueError as e:
+        return str(e)
     except Exception as e:
         return f"獲取歷史資料時發生錯誤: {str(e)}"
 
@@ -149,97 +176,185 @@ def get_game_history(team, date=None):
 def get_recent_games(team, games=3):
     """獲取球隊最近的比賽數據"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-
         # 先獲取球隊ID
-        teams_response = requests.get(
-            "https://statsapi.mlb.com/api/v1/teams", headers=headers)
-        teams_data = teams_response.json()
-        team_id = None
-        team_name = ""
-
-        for team_info in teams_data['teams']:
-            if team.upper() in team_info['abbreviation'] or team.upper() in team_info['teamName'].upper():
-                team_id = team_info['id']
-                team_name = team_info['name']
-                break
-
-        if not team_id:
-            return f"找不到球隊：{team}"
-
-        # 獲取最近比賽記錄
-        # 我們多請求一些數據以確保能獲取到足夠的已完成比賽
-        schedule_url = f"https://statsapi.mlb.com/api/v1/schedule?teamId={team_id}&sportId=1&gameType=R&season=2024&startDate=2024-01-01&endDate=2024-12-31"
-        schedule_response = requests.get(schedule_url, headers=headers)
-        schedule_data = schedule_response.json()
-
-        if not schedule_data.get('dates'):
-            return f"找不到 {team_name} 的比賽記錄"
+        team_info = resolve_team(team)
+        if not team_info:
+            return team_not_found(team)
+        team_id = team_info.id
+        team_name = team_info.name
 
-        # 收集所有比賽
-        completed_games = []
-        for date in schedule_data['dates']:
-            for game in date['games']:
-                if game['status']['statusCode'] == 'F':  # 只獲取已完成的比賽
-                    completed_games.append(game)
+        # 從增量更新的本季比賽儲存取得最近比賽
+        recent_games = tuple(game_store.recent(team_id, max(int(games), 1)))
 
-        # 取最近的幾場比賽
-        recent_games = completed_games[-int(games):]
-
-        output = f"**{team_name} 最近 {len(recent_games)} 場比賽記錄**\n"
-        for game in recent_games:
-            game_date = datetime.strptime(
-                game['gameDate'], "%Y-%m-%dT%H:%M:%SZ").strftime("%Y-%m-%d")
-            away_team = game['teams']['away']['team']['name']
-            home_team = game['teams']['home']['team']['name']
-            away_score = game['teams']['away']['score']
-            home_score = game['teams']['home']['score']
-
-            # 判斷該隊是主場還是客場，並標記勝負
-            if team_id == game['teams']['away']['team']['id']:
-                result = "勝" if away_score > home_score else "敗"
-            else:
-                result = "勝" if home_score > away_score else "敗"
-
-            output += f"{game_date}: {away_team} {away_score} @ {home_team} {home_score} [{result}]\n"
+        if not recent_games:
+            return f"找不到 {team_name} 的比賽記錄"
 
-        return output
+        with metrics.stage('format'):
+            return render_cache.render(('recent', team_id), recent_games, lambda: text_lines(
+                [f"**{team_name} 最近 {len(recent_games)} 場比賽記錄**"]
+                + [_recent_line(game, team_id) for game in recent_games]))
 
     except Exception as e:
         return f"獲取最近比賽資料時發生錯誤: {str(e)}"
 
 def get_hitter_stat(player):
-    selected = ["gamesplayed", "groundouts", "airouts", "runs", "doubles", "triples", "homeruns", "strikeouts", "baseonballs", "intentionalwalks", "hits", "hitbypitch", "avg", "atbats", "obp", "slg", "ops", "caughtstealing", "stolenbases", "stolenbasepercentage", "plateappearances", "sacbunts", "sacflies", "babip", "groundoutstoairouts", "atbatsperhomerun"]
-    mlb = mlbstatsapi.Mlb()
-    player_id = mlb.get_people_id(player)[0]
-    stats = ['season', 'seasonAdvanced']
-    groups = ['hitting']
-    params = {'season': 2024}
-    mlb.get_player_stats(player_id, stats, groups, **params)
-    stat_dict = mlb.get_player_stats(player_id, stats=stats, groups=groups, **params)
-    season_hitting_stat = stat_dict['hitting']['season']
-    string = ""
-    for split in season_hitting_stat.splits:
-        for k, v in split.stat.__dict__.items():
-            if k in selected:
-                string += str(k) + ": " + str(v) + "\n"
-    return string
+    stats = response_cache.get_or_load(
+        _player_key('hstat', player), lambda: _load_hitter_stat(player), PLAYER_STAT_TTL)
+    return stats + _percentile_text(player, 'hitting')
+
 
 def get_pitcher_stat(player):
-    selected = ["gamesplayed", "gamesstarted", "groundouts", "airouts", "runs", "doubles", "triples", "homeruns", "strikeouts", "baseonballs", "hits", "hitbypitch", "avg", "atbats", "obp", "slg", "ops", "caughtstealing", "stolenbases", "stolenbasepercentage", "numberofpitches", "inningspitched", "whip", "strikepercentage", "wildpitches", "pickoffs", "groundoutstoairouts", "pitchesperinning", "strikeoutwalkratio", "strikeoutsper9inn", "walksper9inn", "hitsper9inn", "runsscoredper9", "homerunsper9", "sacbunts", "sacflies", "battersfaced"]
-    mlb = mlbstatsapi.Mlb()
-    player_id = mlb.get_people_id(player)[0]
-    stats = ['season', 'seasonAdvanced']
-    groups = ['pitching']
-    params = {'season': 2024}
-    mlb.get_player_stats(player_id, stats, groups, **params)
-    stat_dict = mlb.get_player_stats(player_id, stats=stats, groups=groups, **params)
-    season_pitching_stat = stat_dict['pitching']['season']
-    string = ""
-    for split in season_pitching_stat.splits:
-        for k, v in split.stat.__dict__.items():
-            if k in selected:
-                string += str(k) + ": " + str(v) + "\n"
-    return string
\ No newline at end of file
+    stats = response_cache.get_or_load(
+        _player_key('pstat', player), lambda: _load_pitcher_stat(player), PLAYER_STAT_TTL)
+    return stats + _percentile_text(player, 'pitching')
+
+
+def _percentile_text(player, group):
+    """聯盟百分位（由夜間建立的全聯盟數據表計算，不發出上游請求）；資料表尚未建立時省略"""
+    try:
+        found = league_stats.percentiles(player_stats.resolve(player), group)
+    except Exception:
+        return ""
+    if not found:
+        return ""
+    ranks, minimum = found
+    return (f"聯盟百分位（{minimum:.0f} {QUALIFIER_LABEL[group]}以上）：" +
+            "、".join(f"{label} {rank}" for label, rank in ranks) + "\n")
+
+
+def _format_splits(splits, selected):
+    with metrics.stage('format'):
+        return text_lines(f"{k}: {v}" for split in splits
+                          for k, v in split.stat.__dict__.items() if k in selected)
+
+
+def _load_hitter_stat(player):
+    splits = player_stats.season_splits(player, 'hitting')
+    return _format_splits(splits, HITTER_FIELD_SET)
+
+
+def _load_pitcher_stat(player):
+    splits = player_stats.season_splits(player, 'pitching')
+    return _format_splits(splits, PITCHER_FIELD_SET)
+
+
+def _parse_compare(text):
+    """'[h|p] 名稱1, 名稱2, ...' -> (group 或 None, [名稱])"""
+    text = ' '.join(str(text or '').split())
+    group = None
+    first, _, rest = text.partition(' ')
+    if first.lower() in _COMPARE_GROUPS and rest:
+        group = _COMPARE_GROUPS[first.lower()]
+        text = rest
+    names = [name.strip() for name in _COMPARE_SEPARATORS.split(text) if name.strip()]
+    return group, list(dict.fromkeys(names))
+
+
+def _season_lines(player_ids, season):
+    """先由快取取得各球員本季數據，其餘以一到兩次批次請求補抓"""
+    lines = {}
+    missing = []
+    for player_id in player_ids:
+        line = response_cache.get(('season_line', player_id, season, MODEL_VERSION))
+        if line is None:
+            missing.append(player_id)
+        else:
+            lines[player_id] = line
+    if missing:
+        fetched = player_stats.season_lines(missing, season)
+        for player_id, line in fetched.items():
+            response_cache.set(('season_line', player_id, season, MODEL_VERSION), line, PLAYER_STAT_TTL)
+        lines.update(fetched)
+    return lines
+
+
+def _short_name(name, width):
+    return name if len(name) <= width else name.split()[-1][:width]
+
+
+def _compare_table(title, lines, group, selected):
+    """並排表格：每列一個欄位、每欄一位球員，每 COMPARE_COLUMNS 位一個區塊"""
+    blocks = []
+    for start in range(0, len(lines), COMPARE_COLUMNS):
+        group_lines = lines[start:start + COMPARE_COLUMNS]
+        rows = [f"{'':<22}" + ''.join(f"{_short_name(line.name, 11):>12}" for line in group_lines)]
+        # StatLine 的數據已依顯示欄位順序排列，逐欄取出同一位置即可
+        for field, values in zip(selected, zip(*(getattr(line, group) for line in group_lines))):
+            if all(value is None for value in values):
+                continue
+            rows.append(f"{field:<22}" + ''.join(f"{'-' if value is None else value!s:>12}" for value in values))
+        blocks.append(f"**{title}**\n```\n" + "\n".join(rows) + "\n```")
+    return blocks
+
+
+def _render_comparison(season, group, player_ids, lines, not_found):
+    """並排比較表格與說明（依打擊 / 投球分組）"""
+    blocks = []
+    notes = []
+    for stat_group, selected, label in (('hitting', HITTER_FIELDS, '打擊'), ('pitching', PITCHER_FIELDS, '投球')):
+        wanted = [lines[player_id] for player_id in player_ids if player_id in lines and (
+            group == stat_group if group else
+            # 未指定時投手比較投球、野手比較打擊，二刀流兩者都比較
+            (lines[player_id].position == 'P') == (stat_group == 'pitching')
+            or lines[player_id].position == 'TWP')]
+        with_stats = [line for line in wanted if getattr(line, stat_group)]
+        without = [line.name for line in wanted if not getattr(line, stat_group)]
+        if with_stats:
+            blocks.extend(_compare_table(f"{season} 球季{label}數據比較", with_stats, stat_group, selected))
+        if without:
+            notes.append(f"{season} 球季沒有{label}數據：{'、'.join(without)}")
+    if not_found:
+        notes.append(f"找不到球員：{'、'.join(not_found)}")
+    if not blocks:
+        return "\n".join(notes) or "沒有可比較的數據"
+    return "\n\n".join(blocks + (["\n".join(notes)] if notes else []))
+
+
+def get_player_comparison(players):
+    """並排比較多位球員本季數據（名稱以逗號分隔，可在開頭加 h / p 指定打擊或投球）"""
+    try:
+        group, names = _parse_compare(players)
+        if len(names) < 2:
+            return "請提供至少兩位球員，以逗號分隔！例如：!compare Aaron Judge, Shohei Ohtani"
+        if len(names) > MAX_COMPARE_PLAYERS:
+            return f"一次最多比較 {MAX_COMPARE_PLAYERS} 位球員"
+
+        season = current_season_year()
+        found, not_found = player_stats.resolve_many(names, season)
+        player_ids = list(dict.fromkeys(found.values()))
+        lines = _season_lines(player_ids, season)
+
+        # 同一組球員的數據仍是快取中的同一份時直接使用上次的表格
+        key = ('compare', season, group, tuple(player_ids), tuple(not_found))
+        source = tuple(lines.get(player_id) for player_id in player_ids)
+        with metrics.stage('format'):
+            return render_cache.render(key, source, lambda: _render_comparison(
+                season, group, player_ids, lines, not_found))
+
+    except Exception as e:
+        return f"比較球員數據時發生錯誤: {str(e)}"
+
+
+def get_leaders(stat=None, minimum=None, count=10):
+    """全聯盟排行榜（由記憶體中的欄式數據表回答，不發出上游請求）"""
+    key = leader_stat(stat)
+    if key is None:
+        return "請指定數據！可用：" + "、".join(LEADER_STATS) + "\n例：!leaders ops、!leaders whip 50"
+    group, _, label, lower_is_better, decimals = LEADER_STATS[key]
+    table = league_stats.table(group)
+    if table is None:
+        return "排行榜資料準備中，請稍後再試"
+    unit = QUALIFIER_LABEL[group]
+    threshold = table.min_qualified if minimum is None else minimum
+
+    def render():
+        rows = table.leaders(key, count, minimum)
+        if not rows:
+            return f"沒有 {threshold:.0f} {unit}以上的球員"
+        with metrics.stage('format'):
+            return text_lines([f"**{table.season} 球季 {label} 排行榜**（{threshold:.0f} {unit}以上）"] + [
+                f"{rank}. {name}（{team}）{format_value(value, decimals)}（{qualifier:.0f} {unit}）"
+                for rank, (name, team, value, qualifier) in enumerate(rows, 1)])
+
+    # 資料表每晚整個替換，替換前相同的查詢直接使用上次的排行榜
+    return render_cache.render(('leaders', key, minimum, count), table, render)
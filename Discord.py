@@ -1,20 +1,43 @@
+import asyncio
+import signal
+import sys
+import time
 import discord
 from discord.ext import commands
 import Crawling
 import json
 import boto3
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import requests
+import http_client
+from async_runner import run_blocking
+from cache import response_cache
+from singleflight import flights
+from log_pipeline import CommandLogWriter
+from log_store import LOG_TABLE, utc_timestamp
+from rollups import ROLLUP_TABLE, RollupStore
+from team_directory import resolve_team, team_directory
+from game_store import game_store
+from player_stats import player_stats
+from prefetch import PrefetchCog
+from probables import probable_pitchers
+from live_games import LiveScoreCog
+from league_stats import LeagueStatsCog, league_stats
+from schedule_index import schedule_index
+from sharding import shard_config
+from cache_backends import DISK_CACHE_FILE, SQLiteBackend, backend_from_env, combine_backends
+from profiles import bot_options
+from admission import RateLimited, admission
+from metrics import current_command, metrics, start_http_server
+from rendering import MESSAGE_LIMIT, message_chunks, render_cache
 
 # 讀取配置文件
 with open('config.json') as f:
     config = json.load(f)
 
-# 明確設置所需的 intents
-intents = discord.Intents.default()
-intents.message_content = True
-intents.members = True
-intents.presences = True
+# 依執行設定檔設置 intents 與快取（config.json 的 "profile"：full / standard / low_memory）
+profile = config.get('profile')
+options = bot_options(profile)
 
 # 自定義幫助命令
 
@@ -35,39 +58,135 @@ class CustomHelpCommand(commands.DefaultHelpCommand):
 **指令範例：**
 `!pitcher NYY` - 查詢洋基隊投手資訊
 `!pitcher LAD` - 查詢道奇隊投手資訊
-`!schedule` - 顯示今日所有比賽
+`!schedule` - 顯示今日所有比賽（可加日期範圍，如 `!schedule this week`）
 `!teams` - 顯示所有MLB球隊代號
-`!history NYY 2023-10-01` - 查詢洋基隊在指定日期的比賽
+`!history NYY 2023-10-01` - 查詢洋基隊在指定日期的比賽（也可用 `2024-09-01..2024-09-30` 或 `last week`）
 `!recent NYY 5` - 查詢洋基隊最近5場比賽記錄
 `!quote` - 隨機產生一句棒球名言
 `!hstat Freddie Freeman` - 查詢Freddie Freeman今年數據
 `!pstat Yoshinobu Yamamoto` - 查詢Yoshinobu Yamamoto今年數據
+`!compare Aaron Judge, Shohei Ohtani, Juan Soto` - 並排比較多位球員今年數據（開頭加 h / p 指定打擊或投球）
+`!leaders ops` - 全聯盟 OPS 排行榜（可加最少打席/局數，如 `!leaders whip 50`）
+`!follow NYY` - 訂閱洋基隊比分，比分變動時自動通知此頻道
+`!unfollow NYY` - 取消訂閱（不指定球隊則取消全部）
 
 **提示：**
 - 球隊可使用簡寫（如 NYY, LAD, BOS）
 - 日期格式為 YYYY-MM-DD
 - recent 命令預設顯示最近3場比賽
+- 所有指令也可使用斜線指令（如 /schedule）
 """
         await self.get_destination().send(help_text)
 
 
+# 分片模式（由 sharding.py 啟動器或 config.json 的 "sharded" 啟用）使用 AutoShardedBot
+sharded, shard_options = shard_config(config)
+bot_class = commands.AutoShardedBot if sharded else commands.Bot
+
+
+class TimedContext(commands.Context):
+    """記錄指令開始時間與每次 Discord 傳送耗時的 Context；超過字數上限的文字自動分成多則訊息"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.started = time.perf_counter()
+
+    async def send(self, content=None, **kwargs):
+        if isinstance(content, str) and len(content) > MESSAGE_LIMIT:
+            # 前面幾則只帶文字（與 ephemeral），其餘參數（embed、view 等）隨最後一則送出
+            *head, content = message_chunks(content)
+            for chunk in head:
+                with metrics.stage('discord_send'):
+                    await super().send(chunk, ephemeral=kwargs.get('ephemeral', False))
+        with metrics.stage('discord_send'):
+            return await super().send(content, **kwargs)
+
+
+class MLBBot(bot_class):
+    async def get_context(self, origin, *, cls=TimedContext):
+        return await super().get_context(origin, cls=cls)
+
+
 # 使用自定義幫助命令
-bot = commands.Bot(
+bot = MLBBot(
     command_prefix='!',
-    intents=intents,
-    help_command=CustomHelpCommand()
+    help_command=CustomHelpCommand(),
+    **options,
+    **shard_options
 )
 
 
+def is_primary_process():
+    """單一程序，或多程序分片時負責分片 0 的程序（負責只需執行一次的工作）"""
+    return not sharded or 0 in (bot.shard_ids or [0])
+
+
+async def setup_hook():
+    # 同步斜線指令（多程序分片時只由負責分片 0 的程序同步）
+    if config.get('sync_commands', True) and is_primary_process():
+        await bot.tree.sync()
+
+bot.setup_hook = setup_hook
+
+
+def _command_params(ctx):
+    """已解析的指令參數（前綴指令在 ctx.args，斜線指令在 ctx.kwargs）"""
+    values = ctx.args[2:] if ctx.cog is not None else ctx.args[1:]
+    params = dict(zip(ctx.command.clean_params, values))
+    params.update(ctx.kwargs)
+    return params
+
+
+def command_cost(ctx):
+    """指令的准入成本：可直接由快取回答的指令為 0，需要較多上游請求的指令較高"""
+    name = ctx.command.qualified_name
+    params = _command_params(ctx)
+    if name in ('help', 'teams', 'cachestats', 'leaders'):
+        return 0
+    if name in ('hstat', 'pstat'):
+        player = ' '.join(str(params.get('player') or '').split())
+        return 0 if Crawling.is_stat_cached(name, player) else 2
+    if name in ('schedule', 'history'):
+        return 0 if Crawling.is_schedule_cached(params.get('date_range')) else 1
+    if name == 'recent':
+        return 1 + max(int(params.get('games') or 3), 1) // 10
+    if name == 'pitcher':
+        # 自由文字可能呼叫 Lex
+        return 2
+    if name == 'compare':
+        # 一到兩次批次請求
+        return 2
+    return 1
+
+
+@bot.before_invoke
+async def before_command(ctx):
+    # 之後的各階段計時（含執行緒池中的查詢）依此指令分類
+    current_command.set(ctx.command.qualified_name)
+    # 准入控制：超過用戶/伺服器頻率時拋出 RateLimited，由 on_command_error 回覆冷卻時間
+    # （判斷成本時可能查詢共用快取 / 磁碟快取，在執行緒池中進行）
+    cost = await run_blocking(command_cost, ctx)
+    admission.admit(ctx.author.id, ctx.guild.id if ctx.guild else None, cost)
+    # 斜線指令需在 3 秒內回應，查詢較久時先延後回應
+    if ctx.interaction is not None:
+        await ctx.defer()
+
+
 @bot.event
 async def on_ready():
     print(f'機器人已登入為 {bot.user.name}')
+    if sharded:
+        print(f'分片：{bot.shard_ids} / {bot.shard_count}')
     print('------')
 
 
 # 初始化 DynamoDB
 dynamodb = boto3.resource('dynamodb', region_name='ap-northeast-1')
-command_logs = dynamodb.Table('mlb_bot_logs')
+command_logs = dynamodb.Table(LOG_TABLE)
+# 背景批次寫入指令日誌，每次呼叫只寫入一筆合併後的記錄
+# 記錄時同時累積每小時/每日使用量，統計時只需加總少數彙總項目
+usage_rollups = RollupStore(dynamodb.Table(ROLLUP_TABLE))
+log_writer = CommandLogWriter(command_logs, rollups=usage_rollups)
 
 # 添加 Lex 客戶端初始化（在文件開頭其他 import 後面）
 lex_client = boto3.client('lex-runtime', 
@@ -77,53 +196,69 @@ lex_client = boto3.client('lex-runtime',
 )
 
 
-@bot.command(help='獲取MLB投手資訊\n例：!pitcher NYY')
-async def pitcher(ctx, team=None):
+def timed_lex_post_text(**kwargs):
+    with metrics.stage('lex'):
+        return lex_client.post_text(**kwargs)
+
+
+async def fetch(func, *args):
+    """在執行緒池中執行 Crawling 查詢，並合併相同的進行中請求（受全域上游並行上限限制）"""
+    key = (func.__name__,) + tuple(' '.join(str(arg).split()) for arg in args)
+    return await flights.do(key, lambda: admission.upstream(lambda: run_blocking(func, *args)))
+
+
+@bot.hybrid_command(help='獲取MLB投手資訊\n例：!pitcher NYY')
+async def pitcher(ctx, *, team=None):
     """獲取MLB投手資訊"""
     if team is None:
         await ctx.send("請提供球隊代號！例如：!pitcher NYY")
         return
 
     try:
-        # 發送等待消息
-        loading_msg = await ctx.send("正在查詢投手資訊...")
+        lex_used = False
 
-        try:
-            # 首先嘗試使用 Lex
-            lex_response = lex_client.post_text(
-                botName='MLBBot',
-                botAlias='PROD',
-                userId=str(ctx.author.id),
-                inputText=f"Who is pitching for {team}"
-            )
-            
-            lex_message = lex_response.get('message', '')
-            
-            # 如果 Lex 返回默認消息，使用爬蟲備份
-            if "[Pitcher Name]" in lex_message:
-                pitcher_info = Crawling.get_pitcher_info(team)
+        # 球隊代號直接由記憶體中的預計先發表回答，不經過 Lex
+        if await run_blocking(resolve_team, team):
+            pitcher_info = await fetch(Crawling.get_pitcher_info, team)
+            await ctx.send(pitcher_info)
+        else:
+            # 發送等待消息
+            loading_msg = await ctx.send("正在查詢投手資訊...")
+
+            try:
+                # 自由文字查詢才交給 Lex；Lex 的對話狀態以 userId 區分，只合併同一用戶重複送出的相同問題
+                lex_key = ('lex', ctx.author.id, ' '.join(team.lower().split()))
+                lex_response = await flights.do(lex_key, lambda: admission.upstream(lambda: run_blocking(
+                    timed_lex_post_text,
+                    botName='MLBBot',
+                    botAlias='PROD',
+                    userId=str(ctx.author.id),
+                    inputText=team
+                )))
+
+                lex_message = lex_response.get('message', '')
+
+                # 如果 Lex 返回默認消息，使用爬蟲備份
+                if "[Pitcher Name]" in lex_message:
+                    pitcher_info = await fetch(Crawling.get_pitcher_info, team)
+                    await loading_msg.edit(content=pitcher_info)
+                else:
+                    lex_used = True
+                    await loading_msg.edit(content=lex_message)
+
+            except RateLimited:
+                # 准入拒絕交給 on_command_error 回覆冷卻時間，並記錄為被拒絕而非成功
+                raise
+            except Exception as lex_error:
+                # Lex 失敗時使用爬蟲備份
+                print(f"Lex 錯誤: {str(lex_error)}")
+                pitcher_info = await fetch(Crawling.get_pitcher_info, team)
                 await loading_msg.edit(content=pitcher_info)
-            else:
-                await loading_msg.edit(content=lex_message)
-
-        except Exception as lex_error:
-            # Lex 失敗時使用爬蟲備份
-            print(f"Lex 錯誤: {str(lex_error)}")
-            pitcher_info = Crawling.get_pitcher_info(team)
-            await loading_msg.edit(content=pitcher_info)
-
-        # 記錄命令使用
-        command_logs.put_item(
-            Item={
-                'command_id': str(datetime.now().timestamp()),
-                'command': 'pitcher',
-                'user': str(ctx.author),
-                'guild': str(ctx.guild),
-                'params': team,
-                'lex_used': True,
-                'timestamp': str(datetime.now())
-            }
-        )
+
+        # 記錄命令使用（併入同一次呼叫的日誌）
+        log_writer.log(ctx.message.id, params=team, lex_used=lex_used)
+    except RateLimited:
+        raise
     except Exception as e:
         error_message = f"獲取投手資訊時出錯：{str(e)}"
         if 'loading_msg' in locals():
@@ -132,88 +267,139 @@ async def pitcher(ctx, team=None):
             await ctx.send(error_message)
 
 
-@bot.command(help='獲取今日比賽賽程\n例：!schedule')
-async def schedule(ctx):
-    """獲取今日比賽賽程"""
+@bot.hybrid_command(help='獲取比賽賽程（預設今日，可指定日期範圍）\n例：!schedule、!schedule this week、!schedule 2024-09-01..2024-09-07')
+async def schedule(ctx, *, date_range=None):
+    """獲取比賽賽程"""
     try:
-        schedule_info = Crawling.get_schedule()
+        schedule_info = await fetch(Crawling.get_schedule, date_range)
         await ctx.send(schedule_info)
+    except RateLimited:
+        raise
     except Exception as e:
         await ctx.send(f"獲取賽程資訊時出錯：{str(e)}")
 
 
-@bot.command(help='顯示所有MLB球隊列表\n例：!teams')
+@bot.hybrid_command(help='顯示所有MLB球隊列表\n例：!teams')
 async def teams(ctx):
     """顯示所有MLB球隊列表"""
     try:
-        teams_info = Crawling.get_all_teams()
+        teams_info = await fetch(Crawling.get_all_teams)
         await ctx.send(teams_info)
+    except RateLimited:
+        raise
     except Exception as e:
         await ctx.send(f"獲取球隊列表時出錯：{str(e)}")
 
 
-@bot.command(help='查詢指定日期的比賽歷史\n例：!history NYY 2023-10-01')
-async def history(ctx, team, date=None):
-    """查詢指定日期的比賽歷史"""
+@bot.hybrid_command(help='查詢指定日期或日期範圍的比賽歷史\n例：!history NYY 2023-10-01、!history NYY 2024-09-01..2024-09-30、!history NYY last week')
+async def history(ctx, team, *, date_range=None):
+    """查詢指定日期或日期範圍的比賽歷史"""
     try:
-        history_info = Crawling.get_game_history(team, date)
+        history_info = await fetch(Crawling.get_game_history, team, date_range)
         await ctx.send(history_info)
+    except RateLimited:
+        raise
     except Exception as e:
         await ctx.send(f"獲取歷史資料時出錯：{str(e)}")
 
-@bot.command(help='查詢指定打者今年數據\n例：!hstat Freddie Freeman')
-async def hstat(ctx, *player):
+@bot.hybrid_command(help='查詢指定打者今年數據\n例：!hstat Freddie Freeman')
+async def hstat(ctx, *, player):
     """查詢指定打者今年數據"""
     try:
         # 將所有參數合併為一個完整的人名
-        player_name = " ".join(player)
-        hitter_info = Crawling.get_hitter_stat(player_name)
+        player_name = " ".join(player.split())
+        hitter_info = await fetch(Crawling.get_hitter_stat, player_name)
         await ctx.send(hitter_info)
+    except RateLimited:
+        raise
     except Exception as e:
         await ctx.send(f"獲取指定打者時出錯：{str(e)}")
 
-@bot.command(help='查詢指定投手今年數據\n例：!pstat Yoshinobu Yamamoto')
-async def pstat(ctx, *player):
+@bot.hybrid_command(help='查詢指定投手今年數據\n例：!pstat Yoshinobu Yamamoto')
+async def pstat(ctx, *, player):
     """查詢指定投手今年數據"""
     try:
         # 將所有參數合併為一個完整的人名
-        player_name = " ".join(player)
-        pitcher_info = Crawling.get_pitcher_stat(player_name)
+        player_name = " ".join(player.split())
+        pitcher_info = await fetch(Crawling.get_pitcher_stat, player_name)
         await ctx.send(pitcher_info)
+    except RateLimited:
+        raise
     except Exception as e:
         await ctx.send(f"獲取指定投手時出錯：{str(e)}")
 
-@bot.command(help='查詢球隊最近的比賽數據\n例：!recent NYY 5\n數字表示要查詢的最近幾場比賽（預設為3場）')
-async def recent(ctx, team, games=3):
+@bot.hybrid_command(help='並排比較多位球員本季數據（以逗號分隔，開頭可加 h / p 指定打擊或投球）\n例：!compare Aaron Judge, Shohei Ohtani、!compare p Gerrit Cole, Tarik Skubal')
+async def compare(ctx, *, players):
+    """並排比較多位球員本季數據"""
+    try:
+        comparison = await fetch(Crawling.get_player_comparison, players)
+        await ctx.send(comparison)
+    except RateLimited:
+        raise
+    except Exception as e:
+        await ctx.send(f"比較球員數據時出錯：{str(e)}")
+
+@bot.hybrid_command(help='全聯盟本季排行榜（預設為規定打席/局數以上，可指定最少打席/局數）\n例：!leaders ops、!leaders whip 50、!leaders hr 300')
+async def leaders(ctx, stat=None, minimum: int = None):
+    """全聯盟本季排行榜"""
+    try:
+        # 由記憶體中的全聯盟數據表直接回答，不經過執行緒池與上游
+        await ctx.send(Crawling.get_leaders(stat, minimum))
+    except Exception as e:
+        await ctx.send(f"獲取排行榜時出錯：{str(e)}")
+
+@bot.hybrid_command(help='查詢球隊最近的比賽數據\n例：!recent NYY 5\n數字表示要查詢的最近幾場比賽（預設為3場）')
+async def recent(ctx, team, games: int = 3):
     """查詢球隊最近的比賽數據"""
     try:
-        recent_info = Crawling.get_recent_games(team, games)
+        recent_info = await fetch(Crawling.get_recent_games, team, games)
         await ctx.send(recent_info)
+    except RateLimited:
+        raise
     except Exception as e:
         await ctx.send(f"獲取最近比賽資料時出錯：{str(e)}")
 
 
+def _author_fields(author, guild, channel):
+    """日誌中的使用者/伺服器欄位（只需字串，不依賴成員快取）"""
+    return {
+        'user': str(author),
+        'user_id': str(author.id),
+        'guild': str(guild),
+        'guild_id': str(guild.id) if guild else None,
+        'channel': str(channel),
+        'channel_id': str(channel.id),
+        'shard_id': guild.shard_id if guild else 0,
+    }
+
+
 @bot.event
 async def on_command(ctx):
-    try:
-        command_logs.put_item(
-            Item={
-                'command_id': str(datetime.now().timestamp()),
-                'command': ctx.command.name,
-                'user': str(ctx.author),
-                'user_id': str(ctx.author.id),
-                'guild': str(ctx.guild),
-                'guild_id': str(ctx.guild.id),
-                'channel': str(ctx.channel),
-                'channel_id': str(ctx.channel.id),
-                'content': ctx.message.content,
-                'timestamp': str(datetime.now()),
-                'success': True,
-                'response_time': ctx.message.created_at.timestamp()
-            }
-        )
-    except Exception as e:
-        print(f"日誌記錄錯誤: {str(e)}")
+    fields = {}
+    if ctx.interaction is not None:
+        # 斜線指令不經過 on_message，在此補上使用者欄位
+        fields = _author_fields(ctx.author, ctx.guild, ctx.channel)
+        fields['timestamp'] = utc_timestamp()
+    log_writer.log(
+        ctx.message.id,
+        command=ctx.command.name,
+        **fields
+    )
+
+
+def _finish_command(ctx, status):
+    """記錄端到端延遲（由建立 Context 到回覆完成），回傳秒數"""
+    elapsed = time.perf_counter() - getattr(ctx, 'started', time.perf_counter())
+    name = ctx.command.qualified_name if ctx.command else 'unknown'
+    metrics.observe('command_seconds', elapsed, command=name)
+    metrics.inc('commands_total', command=name, status=status)
+    return elapsed
+
+
+@bot.event
+async def on_command_completion(ctx):
+    log_writer.log(ctx.message.id, final=True, success=True,
+                   response_time=_finish_command(ctx, 'success'))
 
 
 @bot.event
@@ -222,43 +408,104 @@ async def on_command_error(ctx, error):
         # 獲取用戶輸入的錯誤命令
         wrong_command = ctx.message.content.split()[0][1:]  # 移除前綴 '!'
         await ctx.send(f"❌ 命令 `{wrong_command}` 不存在\n請使用 `!help` 查看所有可用命令")
+    elif isinstance(error, RateLimited):
+        await ctx.send(f"⏳ {str(error)}", ephemeral=True)
     else:
         # 處理其他類型的錯誤
         await ctx.send(f"❌ 發生錯誤：{str(error)}")
 
-    try:
-        command_logs.put_item(
-            Item={
-                'command_id': f"error_{str(datetime.now().timestamp())}",
-                'type': 'error',
-                'command': ctx.command.name if ctx.command else 'unknown',
-                'user': str(ctx.author),
-                'guild': str(ctx.guild),
-                'error_type': type(error).__name__,
-                'error_message': str(error),
-                'timestamp': str(datetime.now())
-            }
-        )
-    except Exception as e:
-        print(f"錯誤日誌記錄失敗: {str(e)}")
-
-
-def get_command_stats():
-    response = command_logs.scan()
-    stats = {
-        'total_commands': 0,
-        'commands_by_type': {},
-        'active_users': set(),
-        'active_guilds': set()
-    }
-    
-    for item in response['Items']:
-        stats['total_commands'] += 1
-        stats['commands_by_type'][item['command']] = stats['commands_by_type'].get(item['command'], 0) + 1
-        stats['active_users'].add(item['user'])
-        stats['active_guilds'].add(item['guild'])
-    
-    return stats
+    log_writer.log(
+        ctx.message.id,
+        final=True,
+        type='error',
+        command=ctx.command.name if ctx.command else 'unknown',
+        success=False,
+        error_type=type(error).__name__,
+        error_message=str(error),
+        response_time=_finish_command(ctx, 'rejected' if isinstance(error, RateLimited) else 'error')
+    )
+
+
+def get_command_stats(hours=24):
+    """統計最近幾小時的指令使用（加總預先彙總的每小時/每日使用量）"""
+    end = datetime.now(timezone.utc)
+    return usage_rollups.usage(end - timedelta(hours=hours), end)
+
+
+@bot.command(hidden=True, help='顯示回應快取的命中統計（僅限擁有者）')
+@commands.is_owner()
+async def cachestats(ctx):
+    """顯示回應快取的命中統計"""
+    stats = response_cache.stats()
+    flight_stats = flights.stats()
+    log_stats = log_writer.stats()
+    admission_stats = admission.stats()
+    render_stats = render_cache.stats()
+    schedule_stats = schedule_index.stats()
+    await ctx.send(
+        f"**快取統計**\n"
+        f"項目數：{stats['entries']}（{stats['bytes'] / 1024 / 1024:.1f} MB）\n"
+        f"命中：{stats['hits']} / 未命中：{stats['misses']}（命中率 {stats['hit_rate']:.1%}）\n"
+        f"淘汰：{stats['evictions']} / 共用快取命中：{stats['backend_hits']}\n"
+        f"賽程分區：{schedule_stats['entries']} 天（{schedule_stats['bytes'] / 1024 / 1024:.1f} MB），淘汰 {schedule_stats['evictions']}\n"
+        f"渲染結果：{render_stats['entries']} 項，重複使用 {render_stats['hits']} / 重新格式化 {render_stats['misses']}\n"
+        f"上游呼叫：{flight_stats['calls']} / 合併請求：{flight_stats['shared']}\n"
+        f"日誌：已寫入 {log_stats['written']} / 待寫入 {log_stats['pending']} / 丟棄 {log_stats['dropped']}\n"
+        f"准入：通過 {admission_stats['admitted']} / 快取優先 {admission_stats['cheap']} / "
+        f"拒絕 用戶 {admission_stats['rejected']['user']}、伺服器 {admission_stats['rejected']['guild']}、"
+        f"上游滿載 {admission_stats['rejected']['upstream']}"
+    )
+
+
+@bot.command(hidden=True, help='顯示各指令與各階段的延遲百分位數（僅限擁有者）')
+@commands.is_owner()
+async def perf(ctx):
+    """顯示各指令與各階段的延遲百分位數"""
+    def table(title, rows):
+        lines = [f"**{title}**", "```", f"{'名稱':<14}{'次數':>7}{'p50':>9}{'p95':>9}{'p99':>9}"]
+        for name, (count, p50, p95, p99) in rows.items():
+            lines.append(f"{name:<16}{count:>7}{p50 * 1000:>7.0f}ms{p95 * 1000:>7.0f}ms{p99 * 1000:>7.0f}ms")
+        lines.append("```")
+        return "\n".join(lines)
+
+    commands_summary = metrics.summary('command_seconds', by='command')
+    if not commands_summary:
+        await ctx.send("尚無延遲資料")
+        return
+    uptime = time.monotonic() - metrics.started_at
+    total = sum(row[0] for row in commands_summary.values())
+    await ctx.send(
+        f"運作 {uptime / 60:.0f} 分鐘，共 {total} 次指令（{total / max(uptime, 1):.2f} 次/秒）\n"
+        + table("指令延遲（端到端）", commands_summary) + "\n"
+        + table("各階段耗時", metrics.summary('stage_seconds', by='stage'))
+    )
+
+
+def _runtime_samples():
+    """/metrics 輸出的即時數值"""
+    cache_stats = response_cache.stats()
+    render_stats = render_cache.stats()
+    log_stats = log_writer.stats()
+    admission_stats = admission.stats()
+    samples = [
+        ('cache_entries', {}, cache_stats['entries']),
+        ('cache_bytes', {}, cache_stats['bytes']),
+        ('cache_hits', {}, cache_stats['hits']),
+        ('cache_misses', {}, cache_stats['misses']),
+        ('render_cache_hits', {}, render_stats['hits']),
+        ('render_cache_misses', {}, render_stats['misses']),
+        ('log_written', {}, log_stats['written']),
+        ('log_pending', {}, log_stats['pending']),
+        ('log_dropped', {}, log_stats['dropped']),
+        ('admission_admitted', {}, admission_stats['admitted']),
+        ('admission_cheap', {}, admission_stats['cheap']),
+    ]
+    samples.extend(('admission_rejected', {'scope': scope}, count)
+                   for scope, count in admission_stats['rejected'].items())
+    return samples
+
+
+metrics.add_collector(_runtime_samples)
 
 
 @bot.event
@@ -267,31 +514,20 @@ async def on_message(message):
         return
     
     if message.content.startswith('!'):
-        try:
-            # 記錄所有以 ! 開頭的消息
-            command_logs.put_item(
-                Item={
-                    'command_id': str(datetime.now().timestamp()),
-                    'command': message.content.split()[0][1:],  # 移除 ! 並獲取命令名
-                    'user': str(message.author),
-                    'user_id': str(message.author.id),
-                    'guild': str(message.guild),
-                    'guild_id': str(message.guild.id),
-                    'channel': str(message.channel),
-                    'channel_id': str(message.channel.id),
-                    'content': message.content,
-                    'timestamp': str(datetime.now())
-                }
-            )
-            print(f"消息已記錄: {message.content} by {message.author} in {message.guild}")
-        except Exception as e:
-            print(f"日誌記錄錯誤: {str(e)}")
+        # 記錄所有以 ! 開頭的消息（以訊息 ID 作為同一次呼叫的記錄鍵）
+        log_writer.log(
+            message.id,
+            command=message.content.split()[0][1:] if message.content.split() else '',  # 移除 ! 並獲取命令名
+            content=message.content,
+            timestamp=utc_timestamp(),
+            **_author_fields(message.author, message.guild, message.channel)
+        )
     
     await bot.process_commands(message)
 
 #get quote function
 # ✅ 修正版: 適用於 Lambda 回傳純文字
-@bot.command(help="隨機獲取一條棒球名言")
+@bot.hybrid_command(help="隨機獲取一條棒球名言")
 async def quote(ctx):
     """使用 API Gateway 觸發 Lambda 並獲取棒球名言"""
     try:
@@ -299,11 +535,8 @@ async def quote(ctx):
         api_url = "https://9fy9znkf2m.execute-api.ap-northeast-1.amazonaws.com"
 
         # ✅ 發送 GET 請求到 API Gateway
-        response = requests.get(api_url)
-        response.raise_for_status()  # 自動捕捉 HTTP 錯誤
-
-        # ✅ 直接使用純文字解析 (適用於 Lambda 回傳純文字)
-        quote = response.text
+        # ✅ 直接使用純文字解析 (適用於 Lambda 回傳純文字)，非 2xx 會拋出 HTTPError
+        quote = await run_blocking(http_client.get_text, api_url)
         await ctx.send(f"🎯 **棒球名言** 🎯\n{quote}")
 
     except requests.exceptions.RequestException as e:
@@ -314,14 +547,60 @@ async def quote(ctx):
 #end of get quote
 
 
-try:
-    bot.run(config['token'])
-except discord.errors.LoginFailure:
-    print("錯誤：Discord Bot Token 無效")
-except Exception as e:
-    print(f"錯誤：Bot 無法啟動")
-    print(f"錯誤詳情：{str(e)}")
-    print("請檢查：")
-    print("1. 網路連接是否正常")
-    print("2. Discord Bot Token 是否正確")
-    print("3. Discord API 服務是否正常")
\ No newline at end of file
+async def main():
+    discord.utils.setup_logging()
+    # 由啟動器啟動時，各程序透過共用快取伺服器交換回應與賽程分區；
+    # 其後為磁碟快取（"disk_cache"，設為 null 停用），重啟後球隊、已完賽比賽、球員索引與數據直接由磁碟取得
+    shared_backend = await run_blocking(backend_from_env)
+    disk_path = config.get('disk_cache', DISK_CACHE_FILE)
+    cache_backend = combine_backends(shared_backend, SQLiteBackend(disk_path) if disk_path else None)
+    if cache_backend is not None:
+        for component in (response_cache, schedule_index, team_directory, game_store, player_stats.index,
+                          league_stats, probable_pitchers):
+            component.backend = cache_backend
+    # 設定 "metrics_port" 時提供 Prometheus /metrics 端點（多程序分片時各程序依第一個分片編號錯開埠號）
+    metrics_runner = None
+    if config.get('metrics_port'):
+        port = int(config['metrics_port']) + (min(bot.shard_ids) if sharded and bot.shard_ids else 0)
+        metrics_runner = await start_http_server(metrics, config.get('metrics_host', '127.0.0.1'), port)
+    async with bot:
+        # 啟動器停止或部署時以 SIGTERM 結束工作程序：先關閉 bot，讓下方 finally 寫入日誌與使用量彙總
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.ensure_future(bot.close()))
+        except NotImplementedError:
+            # Windows 的事件迴圈不支援
+            pass
+        log_writer.start()
+        # 背景預先載入只由一個程序向上游請求，其他程序由共用快取讀取賽程分區、球隊與預計先發
+        if is_primary_process():
+            await bot.add_cog(PrefetchCog(bot))
+        # 比分輪詢只由一個程序執行，推送到所有分片的訂閱頻道
+        await bot.add_cog(LiveScoreCog(bot, poll=is_primary_process()))
+        # 夜間重建只由一個程序抓取，其他程序由共用快取載入
+        await bot.add_cog(LeagueStatsCog(bot, primary=is_primary_process()))
+        try:
+            await bot.start(config['token'])
+        finally:
+            # 關閉前寫入所有尚未寫入的日誌
+            await log_writer.close()
+            if metrics_runner is not None:
+                await metrics_runner.cleanup()
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    except discord.errors.LoginFailure:
+        # 正常結束：Token 無效時分片啟動器不重新啟動
+        print("錯誤：Discord Bot Token 無效")
+    except Exception as e:
+        print(f"錯誤：Bot 無法啟動")
+        print(f"錯誤詳情：{str(e)}")
+        print("請檢查：")
+        print("1. 網路連接是否正常")
+        print("2. Discord Bot Token 是否正確")
+        print("3. Discord API 服務是否正常")
+        # 以非 0 代碼結束，分片啟動器才會重新啟動此工作程序
+        sys.exit(1)
\ No newline at end of file
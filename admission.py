@@ -0,0 +1,139 @@
+import asyncio
+import contextvars
+import math
+import time
+
+from discord.ext import commands
+
+# 每位用戶：平均每 10 秒 1 個權杖，最多連續 5 個
+USER_RATE = 0.1
+USER_BURST = 5
+# 每個伺服器：平均每秒 0.5 個權杖，最多連續 20 個
+GUILD_RATE = 0.5
+GUILD_BURST = 20
+# 同時進行中的上游查詢（statsapi / Lex）上限
+UPSTREAM_LIMIT = 8
+# 上游滿載時最多排隊等待幾秒
+UPSTREAM_WAIT = 10
+# 權杖桶數量超過此值時清除已回滿的閒置桶
+MAX_BUCKETS = 10000
+
+# 目前指令是否可直接由快取回答（由 admit 設定，fetch 時讀取）
+cheap_request = contextvars.ContextVar('cheap_request', default=False)
+
+
+class RateLimited(commands.CommandError):
+    """請求被准入控制拒絕"""
+
+    def __init__(self, scope, retry_after):
+        self.scope = scope
+        self.retry_after = retry_after
+        super().__init__(f"請求過於頻繁（{scope}），請在 {max(1, math.ceil(retry_after))} 秒後再試")
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def retry_after(self, cost, now):
+        """權杖足夠時回傳 0，否則回傳需等待的秒數（不扣除）"""
+        self._refill(now)
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def take(self, cost):
+        self.tokens -= cost
+
+    def is_full(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class AdmissionController:
+    """指令准入控制：每位用戶與每個伺服器的權杖桶，加上全域的上游並行上限
+
+    可直接由快取回答的指令（cost 為 0）不消耗權杖，也不佔用上游名額
+    """
+
+    def __init__(self, user_rate=USER_RATE, user_burst=USER_BURST, guild_rate=GUILD_RATE,
+                 guild_burst=GUILD_BURST, upstream_limit=UPSTREAM_LIMIT, upstream_wait=UPSTREAM_WAIT):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.guild_rate = guild_rate
+        self.guild_burst = guild_burst
+        self.upstream_wait = upstream_wait
+        self._upstream = asyncio.Semaphore(upstream_limit)
+        self._users = {}
+        self._guilds = {}
+        self.admitted = 0
+        self.cheap = 0
+        self.rejected = {'user': 0, 'guild': 0, 'upstream': 0}
+
+    def _bucket(self, buckets, key, rate, burst, now):
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) >= MAX_BUCKETS:
+                for stale in [k for k, b in buckets.items() if b.is_full(now)]:
+                    del buckets[stale]
+            bucket = buckets[key] = TokenBucket(rate, burst, now)
+        return bucket
+
+    def admit(self, user_id, guild_id, cost):
+        """依成本扣除權杖；不足時拋出 RateLimited（兩個桶都足夠才扣除）"""
+        cheap_request.set(cost <= 0)
+        if cost <= 0:
+            self.cheap += 1
+            return
+        now = time.monotonic()
+        user = self._bucket(self._users, user_id, self.user_rate, self.user_burst, now)
+        wait = user.retry_after(min(cost, self.user_burst), now)
+        if wait:
+            self.rejected['user'] += 1
+            raise RateLimited('用戶', wait)
+        guild = None
+        if guild_id is not None:
+            guild = self._bucket(self._guilds, guild_id, self.guild_rate, self.guild_burst, now)
+            wait = guild.retry_after(min(cost, self.guild_burst), now)
+            if wait:
+                self.rejected['guild'] += 1
+                raise RateLimited('伺服器', wait)
+        user.take(min(cost, self.user_burst))
+        if guild is not None:
+            guild.take(min(cost, self.guild_burst))
+        self.admitted += 1
+
+    async def upstream(self, coro_factory):
+        """在全域上游名額內執行；快取可回答的請求直接執行，滿載過久則拋出 RateLimited"""
+        if cheap_request.get():
+            return await coro_factory()
+        try:
+            await asyncio.wait_for(self._upstream.acquire(), self.upstream_wait)
+        except asyncio.TimeoutError:
+            self.rejected['upstream'] += 1
+            raise RateLimited('系統忙碌', self.upstream_wait) from None
+        try:
+            return await coro_factory()
+        finally:
+            self._upstream.release()
+
+    def stats(self):
+        return {
+            'admitted': self.admitted,
+            'cheap': self.cheap,
+            'rejected': dict(self.rejected),
+            'users': len(self._users),
+            'guilds': len(self._guilds),
+        }
+
+
+admission = AdmissionController()
@@ -0,0 +1,36 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# 同時執行的阻塞呼叫上限（HTTP、mlbstatsapi、boto3）
+MAX_WORKERS = 16
+# 每個呼叫的預設逾時秒數
+DEFAULT_TIMEOUT = 20
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='mlb-io')
+
+
+class UpstreamTimeout(Exception):
+    """阻塞呼叫超過逾時時間"""
+
+    def __init__(self, name, timeout):
+        super().__init__(f"查詢 {name} 逾時（超過 {timeout} 秒），請稍後再試")
+        self.name = name
+        self.timeout = timeout
+
+
+async def run_blocking(func, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """在有上限的執行緒池中執行同步函式，避免阻塞 Discord 事件迴圈"""
+    loop = asyncio.get_running_loop()
+    # 與 asyncio.to_thread 相同，將目前的 contextvars（如指令名稱）帶入執行緒
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    try:
+        return await asyncio.wait_for(loop.run_in_executor(_executor, call), timeout)
+    except asyncio.TimeoutError:
+        raise UpstreamTimeout(getattr(func, '__name__', repr(func)), timeout) from None
+
+
+def shutdown():
+    """關閉執行緒池（不等待仍在進行的呼叫）"""
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,422 @@
+"""離線指令效能測試：以重播的 statsapi / Lex / DynamoDB 回應，透過假的 ctx 執行 Discord.py 的所有指令
+
+不連線 Discord 與任何上游服務。指令經由 bot.invoke 執行（含 before_invoke、准入控制、日誌管線與計時），
+只有 ctx.send 改為寫入假的頻道。回報吞吐量、各指令延遲百分位數、各階段耗時與記憶體配置（tracemalloc）。
+
+上游回應來源：
+- 預設：benchmarks/replay.py 的模擬 statsapi（依請求即時產生，不需錄製檔）
+- --fixtures：先以 --record 連線錄製一次的真實回應；重播時時間固定在錄製當下，請求與錄製時完全相同
+
+用法：
+  python benchmarks/commands.py --requests 2000 --concurrency 32 --latency 50
+  python benchmarks/commands.py --record fixtures.json --config config.json   # 需要網路與 Lex 金鑰
+  python benchmarks/commands.py --fixtures fixtures.json --json result.json
+  python benchmarks/commands.py --baseline result.json --tolerance 0.25         # p95 或吞吐量退步超過 25% 時結束碼為 1
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import replay  # noqa: E402
+
+# 假的 Discord ID（與實際 snowflake 同長度，Lex 的 userId 至少需 2 個字元）
+OWNER_ID = 10 ** 17
+# 每種指令至少一個（包含 Lex 自由文字查詢與擁有者指令）
+WORKLOAD = (
+    '!help',
+    '!teams',
+    '!schedule',
+    '!schedule this week',
+    '!schedule last week',
+    '!history NYY last week',
+    '!history LAD yesterday',
+    '!recent NYY 5',
+    '!recent BOS',
+    '!recent LAD 50',
+    '!hstat Freddie Freeman',
+    '!hstat Aaron Judge',
+    '!pstat Yoshinobu Yamamoto',
+    '!pstat Gerrit Cole',
+    '!compare Aaron Judge, Shohei Ohtani, Juan Soto, Mookie Betts, Freddie Freeman',
+    '!compare p Gerrit Cole, Tarik Skubal, Zack Wheeler',
+    '!leaders ops',
+    '!leaders whip 50',
+    '!pitcher NYY',
+    '!pitcher who is pitching for the dodgers',
+    '!quote',
+    '!follow NYY',
+    '!unfollow NYY',
+    '!cachestats',
+    '!perf',
+)
+# 匯入 Discord.py 用的設定（token 不會被使用）
+BENCH_CONFIG = {
+    'token': 'benchmark',
+    'sync_commands': False,
+    'aws_access_key_id': 'benchmark',
+    'aws_secret_access_key': 'benchmark',
+}
+# 依目前時間查詢的模組（重播錄製檔時固定在錄製當下）
+CLOCK_MODULES = ('Crawling', 'game_store', 'probables', 'schedule_index', 'seasons')
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.bot = False
+        self.name = f'user{user_id}'
+
+    def __str__(self):
+        return self.name
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.shard_id = 0
+
+    def __str__(self):
+        return f'guild{self.id}'
+
+
+class FakeChannel:
+    """記錄送出的訊息數與字數，取代 Discord 傳送"""
+
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.sent = 0
+        self.chars = 0
+
+    def __str__(self):
+        return f'channel{self.id}'
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+        self.chars += len(content or '')
+        return FakeMessage(0, content, None, None, self)
+
+
+class FakeMessage:
+    def __init__(self, message_id, content, author, guild, channel):
+        self.id = message_id
+        self.content = content
+        self.author = author
+        self.guild = guild
+        self.channel = channel
+        self.attachments = []
+        self._state = None
+
+    async def edit(self, content=None, **kwargs):
+        self.channel.chars += len(content or '')
+        return self
+
+
+def freeze_clock(moment):
+    """讓依目前時間產生請求的模組使用固定時間（重播錄製檔時請求才會與錄製時相同）"""
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return moment if tz is None else moment.astimezone(tz)
+
+    for name in CLOCK_MODULES:
+        sys.modules[name].datetime = FrozenDatetime
+
+
+def load_bot(config):
+    """在暫存目錄中以測試設定匯入 Discord.py（球員索引等檔案也寫在暫存目錄）"""
+    workdir = tempfile.mkdtemp(prefix='mlb-bench-')
+    with open(os.path.join(workdir, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+    # DynamoDB 回應為重播，但 boto3 簽章仍需要憑證
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+    os.chdir(workdir)
+    import Discord
+    return Discord
+
+
+def context_class(Discord):
+    from discord.ext import commands
+
+    class Outbox(commands.Context):
+        async def send(self, content=None, **kwargs):
+            return await self.channel.send(content, **kwargs)
+
+    # TimedContext.send 的計時仍然有效，只是實際傳送改為假的頻道
+    class BenchContext(Discord.TimedContext, Outbox):
+        pass
+
+    return BenchContext
+
+
+def percentile(values, q):
+    """nearest-rank 百分位數"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Runner:
+    """以固定並行度執行指令，記錄每個指令的延遲與錯誤"""
+
+    def __init__(self, Discord, users=50, guilds=5):
+        self.Discord = Discord
+        self.bot = Discord.bot
+        self.Context = context_class(Discord)
+        self.users = [FakeUser(OWNER_ID + 1 + i) for i in range(users)]
+        self.owner = FakeUser(OWNER_ID)
+        self.guilds = [FakeGuild(OWNER_ID + 10 ** 6 + i) for i in range(guilds)]
+        self.channels = [FakeChannel(OWNER_ID + 2 * 10 ** 6 + i) for i in range(guilds)]
+        self._ids = itertools.count(OWNER_ID * 10)
+        self.latencies = {}
+        self.errors = {}
+        self.bot.add_listener(self._on_error, 'on_command_error')
+
+    async def _on_error(self, ctx, error):
+        name = ctx.command.qualified_name if ctx.command else 'unknown'
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    async def invoke(self, line, index):
+        from discord.ext.commands.view import StringView
+
+        view = StringView(line)
+        view.skip_string('!')
+        invoked_with = view.get_word()
+        guild = index % len(self.guilds)
+        author = self.owner if invoked_with in ('cachestats', 'perf') else self.users[index % len(self.users)]
+        message = FakeMessage(next(self._ids), line, author, self.guilds[guild], self.channels[guild])
+        ctx = self.Context(message=message, bot=self.bot, view=view, prefix='!')
+        ctx.invoked_with = invoked_with
+        ctx.command = self.bot.all_commands.get(invoked_with)
+        started = time.perf_counter()
+        await self.bot.invoke(ctx)
+        elapsed = time.perf_counter() - started
+        self.latencies.setdefault(invoked_with, []).append(elapsed)
+        return elapsed
+
+    async def run(self, lines, total, concurrency):
+        """共 total 次指令、concurrency 個並行的呼叫者，回傳經過秒數"""
+        jobs = iter(range(total))
+
+        async def worker():
+            for index in jobs:
+                await self.invoke(lines[index % len(lines)], index)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+    def reset(self):
+        self.latencies = {}
+        self.errors = {}
+
+
+def summarize(runner, elapsed, adapter):
+    rows = {}
+    for name, values in sorted(runner.latencies.items()):
+        rows[name] = {
+            'count': len(values),
+            'errors': runner.errors.get(name, 0),
+            'p50': percentile(values, 0.5),
+            'p95': percentile(values, 0.95),
+            'p99': percentile(values, 0.99),
+        }
+    everything = [value for values in runner.latencies.values() for value in values]
+    return {
+        'requests': len(everything),
+        'seconds': elapsed,
+        'throughput': len(everything) / elapsed if elapsed else 0.0,
+        'overall': {
+            'count': len(everything),
+            'errors': sum(runner.errors.values()),
+            'p50': percentile(everything, 0.5),
+            'p95': percentile(everything, 0.95),
+            'p99': percentile(everything, 0.99),
+        },
+        'commands': rows,
+        'upstream_requests': adapter.requests,
+        'unrecorded': dict(adapter.misses),
+    }
+
+
+async def measure_allocations(runner, lines, total, concurrency):
+    """在 tracemalloc 下再跑一輪：回報峰值、殘留增加量與專案內配置最多的程式行"""
+    tracemalloc.start(1)
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    await runner.run(lines, total, concurrency)
+    current, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    project = [tracemalloc.Filter(True, os.path.join(ROOT, '*')),
+               tracemalloc.Filter(False, os.path.join(BENCH_DIR, '*'))]
+    diff = after.filter_traces(project).compare_to(before.filter_traces(project), 'lineno')
+    top = [{'line': f"{os.path.relpath(stat.traceback[0].filename, ROOT)}:{stat.traceback[0].lineno}",
+            'size_diff': stat.size_diff, 'count_diff': stat.count_diff}
+           for stat in diff[:10] if stat.size_diff > 0]
+    return {
+        'requests': total,
+        'peak_bytes': peak - baseline,
+        'retained_bytes': current - baseline,
+        'per_request_peak_bytes': (peak - baseline) / max(total, 1),
+        'top': top,
+    }
+
+
+def print_report(result, Discord):
+    print(f"共 {result['requests']} 次指令，{result['seconds']:.2f} 秒，"
+          f"吞吐量 {result['throughput']:.1f} 次/秒，上游請求 {result['upstream_requests']} 次")
+    print(f"{'指令':<14}{'次數':>7}{'錯誤':>6}{'p50':>10}{'p95':>10}{'p99':>10}")
+    rows = dict(result['commands'], 全部=result['overall'])
+    for name, row in rows.items():
+        print(f"{name:<16}{row['count']:>7}{row['errors']:>6}{row['p50'] * 1000:>8.2f}ms"
+              f"{row['p95'] * 1000:>8.2f}ms{row['p99'] * 1000:>8.2f}ms")
+    print("\n各階段耗時（Discord.py 的指標）")
+    for stage, (count, p50, p95, p99) in Discord.metrics.summary('stage_seconds', by='stage').items():
+        print(f"{stage:<16}{count:>7}{'':>6}{p50 * 1000:>8.2f}ms{p95 * 1000:>8.2f}ms{p99 * 1000:>8.2f}ms")
+    if result['unrecorded']:
+        print(f"\n⚠ {len(result['unrecorded'])} 種請求沒有錄製回應（回覆 404）：")
+        for key, count in sorted(result['unrecorded'].items())[:10]:
+            print(f"  {count:>5} × {key}")
+    alloc = result.get('allocations')
+    if alloc:
+        print(f"\n記憶體配置（tracemalloc，{alloc['requests']} 次指令）：峰值 {alloc['peak_bytes'] / 1024:.0f} KB"
+              f"（每次指令 {alloc['per_request_peak_bytes'] / 1024:.1f} KB），殘留 {alloc['retained_bytes'] / 1024:.0f} KB")
+        for entry in alloc['top']:
+            print(f"  {entry['size_diff'] / 1024:>8.1f} KB {entry['count_diff']:>7} 個  {entry['line']}")
+
+
+def compare(result, baseline, tolerance):
+    """與基準結果比較，回傳退步項目"""
+    regressions = []
+    if result['throughput'] < baseline['throughput'] * (1 - tolerance):
+        regressions.append(f"吞吐量 {baseline['throughput']:.1f} -> {result['throughput']:.1f} 次/秒")
+    for name, row in result['commands'].items():
+        old = baseline['commands'].get(name)
+        if old and row['p95'] > old['p95'] * (1 + tolerance):
+            regressions.append(f"{name} p95 {old['p95'] * 1000:.2f} -> {row['p95'] * 1000:.2f} ms")
+    return regressions
+
+
+async def benchmark(args, Discord, adapter):
+    runner = Runner(Discord, users=args.users, guilds=args.guilds)
+    lines = [line for line in WORKLOAD
+             if not args.commands or line[1:].split()[0] in args.commands]
+    if not lines:
+        raise SystemExit(f"沒有符合的指令：{', '.join(args.commands)}")
+    if not args.admission:
+        # 測量處理能力而非限流：不限制用戶/伺服器頻率（上游並行上限保留）
+        Discord.admission.user_burst = Discord.admission.guild_burst = float('inf')
+    async with Discord.bot:
+        Discord.bot.owner_id = OWNER_ID
+        live = Discord.LiveScoreCog(Discord.bot)
+        live.poll_scores.cancel()
+        await Discord.bot.add_cog(live)
+        Discord.log_writer.start()
+        # 排行榜資料表平常由夜間工作建立
+        await Discord.run_blocking(Discord.league_stats.refresh)
+        try:
+            if args.record:
+                await runner.run(lines, len(lines), 1)
+                return None
+            if not args.cold:
+                await runner.run(lines, len(lines), 1)
+                runner.reset()
+                adapter.requests = 0
+            elapsed = await runner.run(lines, args.requests, args.concurrency)
+            result = summarize(runner, elapsed, adapter)
+            if args.alloc_requests:
+                result['allocations'] = await measure_allocations(
+                    runner, lines, args.alloc_requests, args.concurrency)
+            return result
+        finally:
+            await Discord.log_writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='離線執行所有指令並回報吞吐量、延遲與記憶體配置')
+    parser.add_argument('--requests', type=int, default=1000, help='量測的指令總數')
+    parser.add_argument('--concurrency', type=int, default=16, help='同時進行的指令數')
+    parser.add_argument('--latency', type=float, default=0.0, help='每個上游請求模擬的網路延遲（毫秒）')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--guilds', type=int, default=5)
+    parser.add_argument('--commands', nargs='*', help='只執行指定的指令（如 schedule hstat）')
+    parser.add_argument('--cold', action='store_true', help='不先暖機（第一輪查詢會未命中快取）')
+    parser.add_argument('--admission', action='store_true', help='保留用戶/伺服器頻率限制')
+    parser.add_argument('--alloc-requests', type=int, default=200, help='tracemalloc 量測的指令數（0 表示略過）')
+    parser.add_argument('--fixtures', help='重播錄製檔（預設使用模擬 statsapi）')
+    parser.add_argument('--record', help='連線實際服務執行每個指令一次，將回應錄製到此檔案')
+    parser.add_argument('--config', help='錄製時使用的 config.json（讀取 Lex 金鑰）')
+    parser.add_argument('--json', help='將結果寫入 JSON 檔')
+    parser.add_argument('--baseline', help='與先前的 JSON 結果比較')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='允許的退步比例')
+    args = parser.parse_args()
+
+    config = dict(BENCH_CONFIG)
+    if args.config:
+        with open(os.path.abspath(args.config), encoding='utf-8') as f:
+            config.update({key: value for key, value in json.load(f).items()
+                           if key.startswith('aws_')})
+    for name in ('fixtures', 'record', 'json', 'baseline'):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    Discord = load_bot(config)
+    import http_client
+
+    latency = args.latency / 1000
+    dynamodb = Discord.dynamodb.meta.client
+    if args.record:
+        source = replay.RecordedResponses()
+        adapter = replay.RecordingAdapter(source, pool_maxsize=http_client.POOL_SIZE)
+        replay.install(http_client.session, adapter)
+        replay.record_lex(Discord.lex_client, source)
+        replay.replay_aws(dynamodb, source)
+    else:
+        if args.fixtures:
+            source = replay.RecordedResponses.load(args.fixtures)
+            freeze_clock(datetime.fromisoformat(source.recorded_at))
+        else:
+            source = replay.SyntheticStatsApi()
+        adapter = replay.ReplayAdapter(source, latency=latency)
+        replay.install(http_client.session, adapter)
+        replay.replay_aws(Discord.lex_client, source, latency=latency)
+        replay.replay_aws(dynamodb, source, latency=latency)
+
+    result = asyncio.run(benchmark(args, Discord, adapter))
+    if args.record:
+        source.save(args.record)
+        print(f"已錄製 {len(source.http)} 個 HTTP 回應、{len(source.lex)} 個 Lex 回應到 {args.record}")
+        return
+
+    print_report(result, Discord)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print("\n效能退步：")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n與基準相比沒有超過容許範圍的退步")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""比較每場比賽在記憶體中的大小：statsapi 原始 JSON dict、精簡 dict 與 models.Game
+
+以 tracemalloc 量測由 JSON 文字解析後仍保留的配置；同時量測渲染一行比分時
+每列以 strptime 解析 gameDate 與使用預先解析的 Game.start 的耗時。
+
+用法：python benchmarks/game_memory.py --days 186
+      python benchmarks/game_memory.py --fixtures fixtures.json（使用 commands.py --record 錄製的真實賽程）
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Game  # noqa: E402
+from schedule_index import SCHEDULE_URL  # noqa: E402
+from replay import RecordedResponses, SyntheticStatsApi  # noqa: E402
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def synthetic_payloads(days, start):
+    """模擬整季的 schedule 回應（每天一份 JSON 文字）"""
+    source = SyntheticStatsApi(today=(datetime.strptime(start, DATE_FORMAT)
+                                      + timedelta(days=days)).strftime(DATE_FORMAT))
+    payloads = []
+    day = datetime.strptime(start, DATE_FORMAT)
+    for _ in range(days):
+        date = day.strftime(DATE_FORMAT)
+        _, _, body = source.respond('GET', f"{SCHEDULE_URL}?sportId=1&startDate={date}&endDate={date}")
+        payloads.append(body)
+        day += timedelta(days=1)
+    return payloads
+
+
+def recorded_payloads(path):
+    """錄製檔中所有 schedule 回應"""
+    recorded = RecordedResponses.load(path)
+    return [body for key, (status, _, body) in recorded.http.items()
+            if '/api/v1/schedule' in key and status == 200]
+
+
+def _games(data):
+    return [(entry['date'], game) for entry in data.get('dates', []) for game in entry['games']]
+
+
+def _compact(date, game):
+    """改用 models 之前 schedule_index 保存的精簡 dict"""
+    away = game['teams']['away']
+    home = game['teams']['home']
+    return {
+        'gamePk': game['gamePk'],
+        'date': date,
+        'gameDate': game['gameDate'],
+        'state': game['status'].get('abstractGameState'),
+        'statusCode': game['status'].get('statusCode'),
+        'away_id': away['team']['id'],
+        'away_name': away['team']['name'],
+        'away_score': away.get('score'),
+        'home_id': home['team']['id'],
+        'home_name': home['team']['name'],
+        'home_score': home.get('score'),
+    }
+
+
+BUILDERS = {
+    'raw': lambda data: [game for _, game in _games(data)],
+    'compact': lambda data: [_compact(date, game) for date, game in _games(data)],
+    'models': lambda data: [Game.from_api(game, date) for date, game in _games(data)],
+}
+
+
+def measure(payloads, build):
+    """回傳 (保留的比賽清單, 保留的位元組)；解析途中的暫存物件不計入"""
+    gc.collect()
+    tracemalloc.start()
+    games = []
+    for payload in payloads:
+        games.extend(build(json.loads(payload)))
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return games, retained
+
+
+def render_dict(games):
+    return [f"{datetime.strptime(game['gameDate'], '%Y-%m-%dT%H:%M:%SZ').strftime('%H:%M')} "
+            f"{game['away_name']} @ {game['home_name']}" for game in games]
+
+
+def render_model(games):
+    return [f"{game.start.strftime('%H:%M')} {game.away_name} @ {game.home_name}" for game in games]
+
+
+def _timed(render, games, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        render(games)
+    return (time.perf_counter() - started) / repeat / max(len(games), 1) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比較每場比賽的記憶體用量')
+    parser.add_argument('--days', type=int, default=186, help='模擬幾天的賽程（預設約一整季）')
+    parser.add_argument('--start', default='2026-03-27', help='模擬賽程的開始日期')
+    parser.add_argument('--fixtures', help='改用錄製檔中的 schedule 回應')
+    parser.add_argument('--repeat', type=int, default=5, help='渲染耗時量測的重複次數')
+    args = parser.parse_args()
+
+    payloads = recorded_payloads(args.fixtures) if args.fixtures else synthetic_payloads(args.days, args.start)
+    results = {}
+    for name, build in BUILDERS.items():
+        games, retained = measure(payloads, build)
+        results[name] = (games, retained)
+    count = len(results['models'][0])
+    if not count:
+        print("沒有比賽資料")
+        return
+
+    print(f"共 {count} 場比賽（{len(payloads)} 份 schedule 回應）")
+    print(f"{'格式':<10}{'總計 (KB)':>12}{'每場 (bytes)':>14}{'相對 raw':>10}")
+    raw_bytes = results['raw'][1]
+    for name, (_, retained) in results.items():
+        print(f"{name:<10}{retained / 1024:>12.1f}{retained / count:>14.0f}{retained / raw_bytes:>10.0%}")
+
+    compact = results['compact'][0]
+    models = results['models'][0]
+    print(f"渲染一行（每場 µs）：compact + strptime {_timed(render_dict, compact, args.repeat):.2f}，"
+          f"models {_timed(render_model, models, args.repeat):.2f}")
+
+
+if __name__ == '__main__':
+    main()
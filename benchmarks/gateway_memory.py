@@ -0,0 +1,128 @@
+"""比較各執行設定檔在大量伺服器下的常駐記憶體（RSS）
+
+以模擬的 GUILD_CREATE / MESSAGE_CREATE 事件餵給 discord.py 的連線狀態，不需連線 Discord。
+每個設定檔在獨立的子程序中執行，避免互相影響。
+
+用法：python benchmarks/gateway_memory.py --guilds 2000 --members 200 --messages 5000
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiles import PROFILES, bot_options  # noqa: E402
+
+BOT_ID = 1
+
+
+def rss_mb():
+    """目前程序的 RSS（MB）"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # 非 Linux 只能取得峰值
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / 1024 / (1024 if sys.platform == 'darwin' else 1)
+
+
+def _user(user_id):
+    return {'id': str(user_id), 'username': f'user{user_id}', 'discriminator': '0',
+            'global_name': None, 'avatar': None}
+
+
+def guild_payload(guild_id, members, intents):
+    """模擬 Discord 依 intents 送出的 GUILD_CREATE（沒有 members/presences intent 時不含成員與上線狀態）"""
+    member_ids = [guild_id * 100000 + i for i in range(members)] if intents.members else []
+    member_ids.append(BOT_ID)
+    data = {
+        'id': str(guild_id),
+        'name': f'guild{guild_id}',
+        'owner_id': str(member_ids[0]),
+        'member_count': members,
+        'large': members > 250,
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0,
+                   'color': 0, 'hoist': False, 'managed': False, 'mentionable': False}],
+        'channels': [{'id': str(guild_id * 10 + 1), 'type': 0, 'name': 'general', 'position': 0,
+                      'permission_overwrites': []}],
+        'members': [{'user': _user(user_id), 'roles': [], 'joined_at': '2024-01-01T00:00:00+00:00',
+                     'deaf': False, 'mute': False, 'flags': 0} for user_id in member_ids],
+    }
+    if intents.presences:
+        data['presences'] = [{'user': {'id': str(user_id)}, 'status': 'online', 'activities': [],
+                              'client_status': {'desktop': 'online'}} for user_id in member_ids]
+    return data
+
+
+def message_payload(message_id, guild_id, intents):
+    return {
+        'id': str(message_id),
+        'channel_id': str(guild_id * 10 + 1),
+        'guild_id': str(guild_id),
+        'author': _user(guild_id * 100000),
+        'content': '!schedule this week' if intents.message_content else '',
+        'timestamp': '2024-01-01T00:00:00+00:00',
+        'edited_timestamp': None, 'tts': False, 'mention_everyone': False,
+        'mentions': [], 'mention_roles': [], 'attachments': [], 'embeds': [],
+        'pinned': False, 'type': 0,
+    }
+
+
+def run_profile(profile, guilds, members, messages):
+    """在目前程序中模擬設定檔，回傳量測結果"""
+    import discord
+
+    options = bot_options(profile)
+    intents = options['intents']
+    gc.collect()
+    baseline = rss_mb()
+    client = discord.Client(**options)
+    state = client._connection
+    state.user = discord.ClientUser(state=state, data=_user(BOT_ID))
+    for guild_id in range(1, guilds + 1):
+        state._add_guild_from_data(guild_payload(guild_id, members, intents))
+    if intents.guild_messages:
+        for i in range(messages):
+            state.parse_message_create(message_payload(10 ** 9 + i, i % guilds + 1, intents))
+    gc.collect()
+    return {
+        'profile': profile,
+        'rss_mb': round(rss_mb() - baseline, 1),
+        'cached_members': sum(len(guild._members) for guild in state.guilds),
+        'cached_messages': len(state._messages or ()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比較各執行設定檔的記憶體用量')
+    parser.add_argument('--guilds', type=int, default=2000)
+    parser.add_argument('--members', type=int, default=200, help='每個伺服器的成員數')
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--profile', choices=list(PROFILES), help='（內部使用）在子程序中量測單一設定檔')
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args.profile, args.guilds, args.members, args.messages)))
+        return
+
+    print(f"模擬 {args.guilds} 個伺服器 × {args.members} 位成員、{args.messages} 則訊息")
+    print(f"{'設定檔':<12}{'RSS 增加 (MB)':>16}{'快取成員':>12}{'快取訊息':>12}")
+    for profile in PROFILES:
+        output = subprocess.run(
+            [sys.executable, __file__, '--profile', profile, '--guilds', str(args.guilds),
+             '--members', str(args.members), '--messages', str(args.messages)],
+            check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{profile:<12}{result['rss_mb']:>16}{result['cached_members']:>12}{result['cached_messages']:>12}")
+
+
+if __name__ == '__main__':
+    main()
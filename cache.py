@@ -0,0 +1,200 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlsplit
+
+# 不過期（只會被 LRU 淘汰），用於已完賽的歷史資料
+FOREVER = None
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_MISSING = object()
+
+
+def _approx_size(value, _depth=0):
+    """粗略估計物件佔用的記憶體（只在寫入快取時計算一次）"""
+    size = sys.getsizeof(value)
+    if _depth > 8:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += _approx_size(k, _depth + 1) + _approx_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for v in value:
+            size += _approx_size(v, _depth + 1)
+    else:
+        if hasattr(value, '__dict__'):
+            size += _approx_size(vars(value), _depth + 1)
+        # 模型類別（Game、StatLine 等）以 __slots__ 儲存屬性，沒有 __dict__
+        for name in _slot_names(type(value)):
+            attr = getattr(value, name, _MISSING)
+            if attr is not _MISSING:
+                size += _approx_size(attr, _depth + 1)
+    return size
+
+
+def _slot_names(cls):
+    names = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        names.extend(name for name in slots if name not in ('__dict__', '__weakref__'))
+    return names
+
+
+def shared_get(backend, key):
+    """讀取快取層（共用快取 / 磁碟快取），回傳 (value, 剩餘 TTL)；沒有 backend、未命中或讀取失敗時回傳 None"""
+    if backend is None:
+        return None
+    try:
+        return backend.get(key)
+    except Exception as e:
+        print(f"共用快取讀取錯誤: {str(e)}")
+        return None
+
+
+def shared_set(backend, key, value, ttl=FOREVER):
+    """寫入快取層；失敗時只記錄錯誤，不影響呼叫端"""
+    if backend is None:
+        return
+    try:
+        backend.set(key, value, ttl)
+    except Exception as e:
+        print(f"共用快取寫入錯誤: {str(e)}")
+
+
+def request_key(url, params=None):
+    """將 URL 與查詢參數正規化為快取鍵（參數排序，與順序無關）"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query.extend((k, str(v)) for k, v in params.items())
+    return (parts.netloc.lower(), parts.path.rstrip('/'), tuple(sorted(query)))
+
+
+class TTLCache:
+    """具 TTL 與記憶體上限的 LRU 快取，記錄命中/未命中次數
+
+    可選的 backend（如多程序共用快取）作為第二層：本地未命中時先查詢 backend，寫入時同步寫入 backend
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, sizeof=_approx_size, backend=None):
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self._sizeof = sizeof
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.backend_hits = 0
+
+    def get(self, key, default=None):
+        value = self._get_local(key)
+        if value is not _MISSING:
+            return value
+        if self.backend is not None:
+            found = shared_get(self.backend, key)
+            if found is not None:
+                value, ttl = found
+                self._set_local(key, value, ttl)
+                with self._lock:
+                    self.backend_hits += 1
+                return value
+        return default
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return _MISSING
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=FOREVER):
+        self._set_local(key, value, ttl)
+        shared_set(self.backend, key, value, ttl)
+
+    def _set_local(self, key, value, ttl):
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        expires_at = None if ttl is FOREVER else time.monotonic() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader, ttl=FOREVER):
+        """命中時直接回傳；否則呼叫 loader 並依 ttl（秒數或以結果計算秒數的函式）寫入"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = loader()
+        self.set(key, value, ttl(value) if callable(ttl) else ttl)
+        return value
+
+    def contains(self, key):
+        """本地或 backend 是否有未過期的項目（不計入命中統計）；backend 命中時一併載入本地"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                return True
+        found = shared_get(self.backend, key)
+        if found is None:
+            return False
+        value, ttl = found
+        self._set_local(key, value, ttl)
+        return True
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+        if self.backend is not None:
+            try:
+                self.backend.delete(key)
+            except Exception as e:
+                print(f"共用快取刪除錯誤: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        """命中統計"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'backend_hits': self.backend_hits,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+# Crawling 共用的回應快取
+response_cache = TTLCache()
@@ -0,0 +1,233 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing.managers import BaseManager
+
+# 啟動器以環境變數告知各工作程序共用快取的位址與驗證金鑰
+ADDRESS_ENV = 'MLB_CACHE_ADDRESS'
+AUTHKEY_ENV = 'MLB_CACHE_AUTHKEY'
+
+MAX_ENTRIES = 50000
+
+# 磁碟快取：同一台主機上的多個程序可共用（WAL 模式），重啟後仍保留
+DISK_CACHE_FILE = 'mlb_cache.sqlite3'
+DISK_MAX_ENTRIES = 200000
+# 每寫入多少次清理一次過期項目
+DISK_PRUNE_EVERY = 1000
+# 其他程序寫入中時最多等待幾秒
+DISK_BUSY_TIMEOUT = 5
+
+
+class MemoryBackend:
+    """以實際時間判斷過期的 LRU 鍵值儲存，放在啟動器程序中供所有分片程序共用"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+
+    def get(self, key):
+        """回傳 (value, 剩餘秒數)，不存在或已過期時回傳 None；剩餘秒數為 None 表示不過期"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is None:
+                self._entries.move_to_end(key)
+                return value, None
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value, remaining
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (value, None if ttl is None else time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteBackend:
+    """以 SQLite（WAL 模式）保存的鍵值快取，介面與 MemoryBackend 相同
+
+    第一次讀寫時才開啟資料庫，每個執行緒使用各自的連線；只在查詢時讀取單一項目，不在啟動時載入全部資料。
+    過期時間以實際時間記錄，重啟後剩餘的 TTL 仍然有效。
+    """
+
+    def __init__(self, path=DISK_CACHE_FILE, max_entries=DISK_MAX_ENTRIES, prune_every=DISK_PRUNE_EVERY):
+        self.path = path
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._writes = 0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        conn = sqlite3.connect(self.path, timeout=DISK_BUSY_TIMEOUT, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with self._schema_lock:
+            if not self._schema_ready:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS cache ('
+                    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL, updated_at REAL NOT NULL)')
+                conn.execute('CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)')
+                self._schema_ready = True
+        self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(key):
+        # 快取鍵為字串、數字與 tuple 的組合，repr 在各程序間一致
+        return repr(key)
+
+    def get(self, key):
+        """回傳 (value, 剩餘秒數)，不存在或已過期時回傳 None；剩餘秒數為 None 表示不過期"""
+        row = self._connect().execute(
+            'SELECT value, expires_at FROM cache WHERE key = ?', (self._key(key),)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is None:
+            return pickle.loads(value), None
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            return None
+        return pickle.loads(value), remaining
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        self._connect().execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at, updated_at) VALUES (?, ?, ?, ?)',
+            (self._key(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+             None if ttl is None else now + ttl, now))
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+
+    def delete(self, key):
+        self._connect().execute('DELETE FROM cache WHERE key = ?', (self._key(key),))
+
+    def size(self):
+        return self._connect().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def prune(self):
+        """刪除過期項目；超過上限時刪除最久沒有更新的項目"""
+        conn = self._connect()
+        conn.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+        excess = self.size() - self.max_entries
+        if excess > 0:
+            conn.execute('DELETE FROM cache WHERE key IN '
+                         '(SELECT key FROM cache ORDER BY updated_at LIMIT ?)', (excess,))
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class TieredBackend:
+    """依序查詢多層快取（如多程序共用快取、磁碟快取），較後層命中時回填較前層；寫入與刪除所有層"""
+
+    def __init__(self, *tiers):
+        self.tiers = tiers
+
+    def get(self, key):
+        for index, tier in enumerate(self.tiers):
+            found = tier.get(key)
+            if found is not None:
+                value, ttl = found
+                for earlier in self.tiers[:index]:
+                    earlier.set(key, value, ttl)
+                return found
+        return None
+
+    def set(self, key, value, ttl=None):
+        for tier in self.tiers:
+            tier.set(key, value, ttl)
+
+    def delete(self, key):
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def size(self):
+        return self.tiers[-1].size()
+
+
+def combine_backends(*backends):
+    """略過 None，只有一層時直接回傳該層，全部為 None 時回傳 None"""
+    backends = [backend for backend in backends if backend is not None]
+    if not backends:
+        return None
+    return backends[0] if len(backends) == 1 else TieredBackend(*backends)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _get_store():
+    # 在快取伺服器程序內建立（每個伺服器只有一份）
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MemoryBackend()
+        return _store
+
+
+class _CacheManager(BaseManager):
+    pass
+
+
+_CacheManager.register('backend', callable=_get_store, exposed=('get', 'set', 'delete', 'size'))
+
+
+def serve_backend(address=('127.0.0.1', 0), authkey=None):
+    """在子程序中啟動共用快取伺服器，回傳 (manager, address, authkey)"""
+    authkey = authkey or os.urandom(16)
+    manager = _CacheManager(address=address, authkey=authkey)
+    manager.start()
+    return manager, manager.address, authkey
+
+
+def connect_backend(address, authkey):
+    """連線到啟動器的共用快取，回傳可跨執行緒使用的代理物件"""
+    manager = _CacheManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager.backend()
+
+
+def backend_env(address, authkey):
+    """傳給工作程序的環境變數"""
+    host, port = address
+    return {ADDRESS_ENV: f"{host}:{port}", AUTHKEY_ENV: authkey.hex()}
+
+
+def backend_from_env(environ=None):
+    """由啟動器設定的環境變數連線共用快取；未設定（單一程序部署）時回傳 None"""
+    environ = os.environ if environ is None else environ
+    address = environ.get(ADDRESS_ENV)
+    if not address:
+        return None
+    host, port = address.rsplit(':', 1)
+    return connect_backend((host, int(port)), bytes.fromhex(environ[AUTHKEY_ENV]))
@@ -0,0 +1,124 @@
+import bisect
+import threading
+import time
+from datetime import datetime, timedelta
+
+from cache import shared_get, shared_set
+import http_client
+from models import MODEL_VERSION, Game, is_final
+from seasons import current_season
+
+SCHEDULE_URL = "https://statsapi.mlb.com/api/v1/schedule"
+# 只要求渲染所需的欄位，縮小回應大小
+SCHEDULE_FIELDS = (
+    "dates,date,games,gamePk,gameDate,status,statusCode,"
+    "teams,away,home,team,id,name,score"
+)
+# 同一支球隊兩次增量同步之間的最短間隔
+SYNC_INTERVAL = 5 * 60
+
+
+class _TeamGames:
+    def __init__(self, season_id):
+        self.season_id = season_id
+        self.keys = []  # (start, game_pk)，與 games 平行並保持排序
+        self.games = []
+        self.by_pk = {}
+        self.synced_through = None
+        self.synced_at = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, game):
+        old = self.by_pk.get(game.game_pk)
+        if old is not None:
+            index = bisect.bisect_left(self.keys, (old.start, old.game_pk))
+            del self.keys[index]
+            del self.games[index]
+        key = (game.start, game.game_pk)
+        index = bisect.bisect_left(self.keys, key)
+        self.keys.insert(index, key)
+        self.games.insert(index, game)
+        self.by_pk[game.game_pk] = game
+
+
+class TeamGameStore:
+    """本季各隊已完賽比賽的增量儲存：首次回填整季，之後只查詢小範圍日期
+
+    設定 backend（共用快取 / 磁碟快取）時保存每隊已同步的比賽，重啟後只需補抓最近幾天
+    """
+
+    def __init__(self, fetch=http_client.get_json, backend=None):
+        self._fetch = fetch
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._teams = {}
+
+    def _entry(self, team_id, season_id):
+        with self._lock:
+            entry = self._teams.get(team_id)
+            if entry is None or entry.season_id != season_id:
+                entry = _TeamGames(season_id)
+                self._teams[team_id] = entry
+            return entry
+
+    def _load_saved(self, team_id, entry):
+        found = shared_get(self.backend, ('team_games', team_id, MODEL_VERSION))
+        if found is None or found[0]['season_id'] != entry.season_id:
+            return
+        for game in found[0]['games']:
+            entry.add(game)
+        entry.synced_through = found[0]['synced_through']
+
+    def _save(self, team_id, entry):
+        # 已完賽的比賽不會再變動，不設過期；換季時以 season_id 判斷是否沿用
+        shared_set(self.backend, ('team_games', team_id, MODEL_VERSION), {
+            'season_id': entry.season_id,
+            'games': entry.games,
+            'synced_through': entry.synced_through,
+        })
+
+    def _sync(self, team_id):
+        season = current_season()
+        entry = self._entry(team_id, season['seasonId'])
+        with entry.lock:
+            if entry.synced_through is None:
+                self._load_saved(team_id, entry)
+            if entry.synced_through and time.monotonic() - entry.synced_at < SYNC_INTERVAL:
+                return entry
+            today = datetime.now().strftime("%Y-%m-%d")
+            end = min(today, season['regularSeasonEndDate'])
+            if entry.synced_through is None:
+                start = season['regularSeasonStartDate']
+            else:
+                # 往回多查一天，涵蓋跨日結束或當時尚未完賽的比賽
+                start = (datetime.strptime(entry.synced_through, "%Y-%m-%d")
+                         - timedelta(days=1)).strftime("%Y-%m-%d")
+                start = max(start, season['regularSeasonStartDate'])
+            if start <= end:
+                data = self._fetch(SCHEDULE_URL, params={
+                    'teamId': team_id,
+                    'sportId': 1,
+                    'gameType': 'R',
+                    'season': season['seasonId'],
+                    'startDate': start,
+                    'endDate': end,
+                    'fields': SCHEDULE_FIELDS,
+                })
+                for date in data.get('dates', []):
+                    for game in date['games']:
+                        game = Game.from_api(game, date['date'])
+                        if is_final(game):
+                            entry.add(game)
+                entry.synced_through = end
+                self._save(team_id, entry)
+            entry.synced_at = time.monotonic()
+            return entry
+
+    def recent(self, team_id, count):
+        """回傳球隊最近 count 場已完賽比賽（由舊到新）"""
+        entry = self._sync(team_id)
+        with entry.lock:
+            return entry.games[-count:] if count > 0 else []
+
+
+game_store = TeamGameStore()
@@ -0,0 +1,172 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import metrics
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# (連線逾時, 讀取逾時) 秒數
+DEFAULT_TIMEOUT = (3.05, 8)
+# 單次呼叫（含重試）的總時間上限
+TOTAL_BUDGET = 15
+# 最多重試次數（不含第一次請求）
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.3
+BACKOFF_CAP = 2.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# 可重試的請求錯誤；其他 requests 錯誤（如 ContentDecodingError、InvalidHeader）記為失敗後直接拋出
+RETRY_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+# 斷路器：連續失敗達門檻後在冷卻期間直接失敗
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30
+
+POOL_SIZE = 16
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """上游服務暫停使用中（斷路器開啟）"""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"{host} 暫時無法連線，請 {int(retry_in) + 1} 秒後再試")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """簡單的斷路器：closed -> open -> half-open"""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def before_request(self, host):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed < self.cooldown or self._probing:
+                raise CircuitOpenError(host, max(self.cooldown - elapsed, 0))
+            # 冷卻結束：只放行一個探測請求
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+
+def _build_session():
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+session = _build_session()
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(host):
+    """取得指定主機的斷路器"""
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker()
+        return _breakers[host]
+
+
+def _backoff(attempt, response=None):
+    # 429 時優先使用伺服器提供的 Retry-After
+    if response is not None and response.headers.get('Retry-After', '').isdigit():
+        return min(float(response.headers['Retry-After']), BACKOFF_CAP)
+    # full jitter
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def get(url, params=None, timeout=DEFAULT_TIMEOUT):
+    """使用共用連線池發送 GET 請求，對 5xx/429 與連線錯誤做有限次數的退避重試"""
+    host = urlsplit(url).netloc
+    breaker = breaker_for(host)
+    started = time.monotonic()
+    attempt = 0
+
+    while True:
+        breaker.before_request(host)
+        response = None
+        error = None
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except requests.exceptions.RequestException as exc:
+            breaker.record_failure()
+            metrics.inc('upstream_requests_total', host=host, status='error')
+            if not isinstance(exc, RETRY_ERRORS):
+                raise
+            error = exc
+        except Exception:
+            # 任何失敗都要記錄，否則半開探測的旗標不會清除，斷路器會一直開啟
+            breaker.record_failure()
+            raise
+        else:
+            metrics.inc('upstream_requests_total', host=host, status=response.status_code)
+            if response.status_code not in RETRY_STATUS:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+
+        delay = _backoff(attempt, response)
+        out_of_budget = time.monotonic() - started + delay > TOTAL_BUDGET
+        if attempt >= MAX_RETRIES or out_of_budget:
+            if error is not None:
+                raise error
+            return response
+        attempt += 1
+        time.sleep(delay)
+
+
+def get_json(url, params=None, timeout=DEFAULT_TIMEOUT):
+    """GET 並解析 JSON，非 2xx 回應會拋出 HTTPError"""
+    with metrics.stage('http_fetch'):
+        response = get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    with metrics.stage('json_parse'):
+        return response.json()
+
+
+def get_text(url, params=None, timeout=DEFAULT_TIMEOUT):
+    """GET 並回傳純文字內容"""
+    with metrics.stage('http_fetch'):
+        response = get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.text
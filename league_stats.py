@@ -0,0 +1,313 @@
+import asyncio
+import math
+import threading
+import time
+from datetime import time as dt_time, timezone
+
+import numpy as np
+from discord.ext import commands, tasks
+
+import http_client
+from async_runner import run_blocking
+from cache import shared_get, shared_set
+from seasons import current_season_year
+
+STATS_URL = "https://statsapi.mlb.com/api/v1/stats"
+# 每頁最多幾位球員（playerPool=ALL 約 700 位打者、900 位投手）
+PAGE_SIZE = 1000
+# 每天 UTC 10:00（美東清晨）所有比賽結束後重建
+NIGHTLY_TIME = dt_time(hour=10, tzinfo=timezone.utc)
+# 多程序分片時其他程序晚 30 分鐘由快取層載入主程序建立的資料表
+FOLLOWER_TIME = dt_time(hour=10, minute=30, tzinfo=timezone.utc)
+# 資料表在快取層保存的時間，以及距上次建立多久內不重新抓取
+TABLE_TTL = 36 * 60 * 60
+REFRESH_AFTER = 12 * 60 * 60
+# 規定打席 / 投球局數：每場球隊比賽 3.1 打席、1 局
+PA_PER_GAME = 3.1
+IP_PER_GAME = 1.0
+
+# 資料表保存的欄位（statsapi 的欄位名稱）
+COLUMNS = {
+    'hitting': (
+        'gamesPlayed', 'plateAppearances', 'atBats', 'runs', 'hits', 'doubles', 'triples', 'homeRuns',
+        'rbi', 'stolenBases', 'baseOnBalls', 'strikeOuts', 'avg', 'obp', 'slg', 'ops', 'babip',
+    ),
+    'pitching': (
+        'gamesPlayed', 'gamesStarted', 'wins', 'losses', 'saves', 'holds', 'inningsPitched',
+        'strikeOuts', 'baseOnBalls', 'homeRuns', 'era', 'whip', 'strikeoutsPer9Inn', 'walksPer9Inn',
+        'homeRunsPer9', 'strikeoutWalkRatio', 'battersFaced',
+    ),
+}
+# 規定門檻使用的欄位
+QUALIFIER = {'hitting': 'plateAppearances', 'pitching': 'inningsPitched'}
+QUALIFIER_LABEL = {'hitting': '打席', 'pitching': '局'}
+
+# !leaders 可用的數據：別名 -> (類別, 欄位, 顯示名稱, 越低越好, 小數位數)
+LEADER_STATS = {
+    'avg': ('hitting', 'avg', 'AVG', False, 3),
+    'obp': ('hitting', 'obp', 'OBP', False, 3),
+    'slg': ('hitting', 'slg', 'SLG', False, 3),
+    'ops': ('hitting', 'ops', 'OPS', False, 3),
+    'babip': ('hitting', 'babip', 'BABIP', False, 3),
+    'hr': ('hitting', 'homeRuns', 'HR', False, 0),
+    'rbi': ('hitting', 'rbi', 'RBI', False, 0),
+    'sb': ('hitting', 'stolenBases', 'SB', False, 0),
+    'h': ('hitting', 'hits', 'H', False, 0),
+    'r': ('hitting', 'runs', 'R', False, 0),
+    'era': ('pitching', 'era', 'ERA', True, 2),
+    'whip': ('pitching', 'whip', 'WHIP', True, 2),
+    'k': ('pitching', 'strikeOuts', 'K', False, 0),
+    'k9': ('pitching', 'strikeoutsPer9Inn', 'K/9', False, 2),
+    'bb9': ('pitching', 'walksPer9Inn', 'BB/9', True, 2),
+    'hr9': ('pitching', 'homeRunsPer9', 'HR/9', True, 2),
+    'kbb': ('pitching', 'strikeoutWalkRatio', 'K/BB', False, 2),
+    'w': ('pitching', 'wins', 'W', False, 0),
+    'sv': ('pitching', 'saves', 'SV', False, 0),
+}
+LEADER_ALIASES = {
+    'homeruns': 'hr', 'hits': 'h', 'runs': 'r', 'so': 'k', 'strikeouts': 'k', 'wins': 'w',
+    'saves': 'sv', 'k/9': 'k9', 'bb/9': 'bb9', 'hr/9': 'hr9', 'k/bb': 'kbb',
+}
+# hstat / pstat 顯示百分位的數據
+PERCENTILE_STATS = {
+    'hitting': ('avg', 'obp', 'slg', 'ops', 'hr', 'sb'),
+    'pitching': ('era', 'whip', 'k9', 'bb9', 'kbb'),
+}
+
+
+def _number(value):
+    """statsapi 的數值多為字串（'.300'），無法計算時為 '-.--'"""
+    if value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return math.nan
+
+
+def _innings(value):
+    """投球局數 '163.2' 表示 163 又 2/3 局"""
+    whole, _, outs = str(value).partition('.')
+    try:
+        return int(whole) + int(outs or 0) / 3
+    except ValueError:
+        return math.nan
+
+
+class StatTable:
+    """單一球季、單一類別的欄式數據表：每個欄位一個 float64 陣列，排序與篩選以向量運算完成
+
+    建立時預先計算規定門檻以上球員各數據的排序值，百分位查詢只需一次二分搜尋
+    """
+
+    def __init__(self, group, season, splits, team_games):
+        self.group = group
+        self.season = season
+        self.built_at = time.time()
+        self.team_games = team_games
+        rows = _dedupe(splits, QUALIFIER[group])
+        self.ids = np.fromiter((split['player']['id'] for split in rows), dtype=np.int64, count=len(rows))
+        self.names = [split['player'].get('fullName', '') for split in rows]
+        self.teams = [(split.get('team') or {}).get('abbreviation') or (split.get('team') or {}).get('name', '')
+                      for split in rows]
+        self.columns = {}
+        for column in COLUMNS[group]:
+            parse = _innings if column == 'inningsPitched' else _number
+            self.columns[column] = np.fromiter(
+                (parse(split['stat'].get(column)) for split in rows), dtype=np.float64, count=len(rows))
+        self.qualifier = self.columns[QUALIFIER[group]]
+        self.min_qualified = team_games * (PA_PER_GAME if group == 'hitting' else IP_PER_GAME)
+        self._rows = {int(player_id): index for index, player_id in enumerate(self.ids)}
+        qualified = self.qualifier >= self.min_qualified
+        self._ranked = {}
+        for alias in PERCENTILE_STATS[group]:
+            values = self.columns[LEADER_STATS[alias][1]][qualified]
+            self._ranked[alias] = np.sort(values[~np.isnan(values)])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def leaders(self, alias, count=10, minimum=None):
+        """回傳 [(名稱, 球隊, 數值, 打席或局數)]，只包含達到門檻（預設為規定打席 / 局數）的球員"""
+        _, column, _, lower_is_better, _ = LEADER_STATS[alias]
+        values = self.columns[column]
+        minimum = self.min_qualified if minimum is None else minimum
+        candidates = np.flatnonzero((self.qualifier >= minimum) & ~np.isnan(values))
+        keys = values[candidates] if lower_is_better else -values[candidates]
+        if len(candidates) > count:
+            top = np.argpartition(keys, count)[:count]
+            candidates, keys = candidates[top], keys[top]
+        order = candidates[np.argsort(keys, kind='stable')]
+        return [(self.names[i], self.teams[i], float(values[i]), float(self.qualifier[i])) for i in order]
+
+    def percentiles(self, player_id):
+        """球員各數據在規定門檻以上球員中的百分位（0-100，越高越好），不在表中時回傳 None"""
+        index = self._rows.get(int(player_id))
+        if index is None:
+            return None
+        ranks = []
+        for alias in PERCENTILE_STATS[self.group]:
+            _, column, label, lower_is_better, _ = LEADER_STATS[alias]
+            value = self.columns[column][index]
+            ranked = self._ranked[alias]
+            if math.isnan(value) or not len(ranked):
+                continue
+            if lower_is_better:
+                better_than = len(ranked) - np.searchsorted(ranked, value, side='right')
+            else:
+                better_than = np.searchsorted(ranked, value, side='left')
+            ranks.append((label, min(99, int(100 * better_than / len(ranked)))))
+        return ranks
+
+
+def _dedupe(splits, qualifier):
+    """季中轉隊的球員有各隊分項：優先使用不含 team 的合計，否則使用打席 / 局數最多的一筆"""
+    chosen = {}
+    for split in splits:
+        player_id = split['player']['id']
+        current = chosen.get(player_id)
+        if current is None or ('team' not in split and 'team' in current):
+            chosen[player_id] = split
+        elif ('team' in split) == ('team' in current):
+            if _innings(split['stat'].get(qualifier, 0)) > _innings(current['stat'].get(qualifier, 0)):
+                chosen[player_id] = split
+    return list(chosen.values())
+
+
+def format_value(value, decimals):
+    if decimals == 0:
+        return str(int(value))
+    text = f"{value:.{decimals}f}"
+    # 打擊率類數據依慣例省略開頭的 0（.300）
+    return text[1:] if decimals == 3 and text.startswith('0.') else text
+
+
+def leader_stat(name):
+    """將使用者輸入的數據名稱轉為 LEADER_STATS 的鍵，無法辨識時回傳 None"""
+    key = str(name or '').lower()
+    key = LEADER_ALIASES.get(key, key)
+    return key if key in LEADER_STATS else None
+
+
+class LeagueStats:
+    """全聯盟本季打擊與投球數據表：每晚以分頁的 /stats 請求重建，查詢時不發出任何上游請求
+
+    設定 backend（共用快取 / 磁碟快取）時保存資料表，其他程序與重啟後直接載入
+    """
+
+    def __init__(self, fetch=http_client.get_json, backend=None):
+        self._fetch = fetch
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._tables = {}
+
+    def _fetch_splits(self, group, season):
+        splits = []
+        while True:
+            data = self._fetch(STATS_URL, params={
+                'stats': 'season',
+                'group': group,
+                'season': season,
+                'sportId': 1,
+                'playerPool': 'ALL',
+                'limit': PAGE_SIZE,
+                'offset': len(splits),
+            })
+            block = (data.get('stats') or [{}])[0]
+            page = block.get('splits') or []
+            splits.extend(page)
+            if not page or len(splits) >= block.get('totalSplits', 0):
+                return splits
+
+    def refresh(self, season=None):
+        """重新抓取全聯盟數據並重建資料表"""
+        season = season or current_season_year()
+        hitting = self._fetch_splits('hitting', season)
+        # 以打者出賽數估計球隊已賽場數，作為規定打席 / 局數的基準
+        team_games = max((split['stat'].get('gamesPlayed', 0) for split in hitting), default=0)
+        tables = {
+            'hitting': StatTable('hitting', season, hitting, team_games),
+            'pitching': StatTable('pitching', season, self._fetch_splits('pitching', season), team_games),
+        }
+        with self._lock:
+            self._tables = tables
+        shared_set(self.backend, ('league_stats', season), tables, TABLE_TTL)
+        return tables
+
+    def load_saved(self, season=None):
+        """由快取層載入其他程序或上次執行建立的資料表，成功時回傳 True"""
+        if self.backend is None:
+            return False
+        found = shared_get(self.backend, ('league_stats', season or current_season_year()))
+        if found is None:
+            return False
+        with self._lock:
+            self._tables = found[0]
+        return True
+
+    def _is_fresh(self, max_age):
+        table = self._tables.get('hitting')
+        return table is not None and time.time() - table.built_at < max_age
+
+    def ensure_fresh(self, max_age=REFRESH_AFTER):
+        """資料表不存在或超過 max_age 秒時重建（先嘗試由快取層載入其他程序建立的資料表）"""
+        if self._is_fresh(max_age):
+            return
+        if self.load_saved() and self._is_fresh(max_age):
+            return
+        self.refresh()
+
+    def table(self, group):
+        return self._tables.get(group)
+
+    def percentiles(self, player_id, group):
+        """回傳 ([(數據名稱, 百分位)], 門檻)；資料表尚未建立或球員不在表中時回傳 None"""
+        table = self._tables.get(group)
+        if table is None:
+            return None
+        ranks = table.percentiles(player_id)
+        if not ranks:
+            return None
+        return ranks, table.min_qualified
+
+
+league_stats = LeagueStats()
+
+
+class LeagueStatsCog(commands.Cog):
+    """啟動時載入（或建立）全聯盟數據表，之後每晚重建一次
+
+    多程序分片時只有一個程序（primary=True）在 NIGHTLY_TIME 抓取上游，
+    其他程序在 FOLLOWER_TIME 由快取層載入；資料表仍未更新時（例如主程序抓取失敗）才自行抓取
+    """
+
+    def __init__(self, bot: commands.Bot, primary=True):
+        self.bot = bot
+        self._warm_task = None
+        if not primary:
+            self.nightly.change_interval(time=FOLLOWER_TIME)
+        self.nightly.start()
+
+    async def cog_load(self):
+        self._warm_task = asyncio.get_running_loop().create_task(self._warm())
+
+    def cog_unload(self):
+        self.nightly.cancel()
+        if self._warm_task is not None:
+            self._warm_task.cancel()
+
+    async def _warm(self):
+        try:
+            await run_blocking(league_stats.ensure_fresh, timeout=120)
+        except Exception as e:
+            print(f"聯盟數據表載入錯誤: {str(e)}")
+
+    @tasks.loop(time=NIGHTLY_TIME)
+    async def nightly(self):
+        # ensure_fresh 先由快取層載入，一小時內建立過的資料表不重新抓取
+        try:
+            await run_blocking(league_stats.ensure_fresh, 60 * 60, timeout=120)
+        except Exception as e:
+            print(f"聯盟數據表更新錯誤: {str(e)}")
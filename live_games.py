@@ -0,0 +1,317 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows 沒有 fcntl，只在單一程序下使用
+    fcntl = None
+
+import discord
+from discord.ext import commands, tasks
+
+import http_client
+from async_runner import run_blocking
+from schedule_index import schedule_index
+from team_directory import resolve_team, team_not_found
+
+FEED_URL = "https://statsapi.mlb.com/api/v1.1/game/{game_pk}/feed/live"
+DIFF_URL = "https://statsapi.mlb.com/api/v1.1/game/{game_pk}/feed/live/diffPatch"
+# 完整 feed 只取追蹤比分需要的欄位
+FEED_FIELDS = (
+    "metaData,timeStamp,gameData,status,abstractGameState,teams,away,home,id,name,"
+    "liveData,linescore,currentInning,inningHalf,runs"
+)
+POLL_SECONDS = 20
+SUBSCRIPTIONS_FILE = 'subscriptions.json'
+
+# diffPatch 路徑 -> 比賽狀態欄位
+_TRACKED_PATHS = {
+    '/liveData/linescore/teams/away/runs': 'away_runs',
+    '/liveData/linescore/teams/home/runs': 'home_runs',
+    '/liveData/linescore/currentInning': 'inning',
+    '/liveData/linescore/inningHalf': 'inning_half',
+    '/gameData/status/abstractGameState': 'status',
+    '/metaData/timeStamp': 'timecode',
+}
+
+
+class GameState:
+    """單場比賽的精簡狀態"""
+
+    __slots__ = ('game_pk', 'away_id', 'home_id', 'away_name', 'home_name',
+                 'away_runs', 'home_runs', 'inning', 'inning_half', 'status', 'timecode')
+
+    def __init__(self, game_pk):
+        self.game_pk = game_pk
+        self.away_id = self.home_id = None
+        self.away_name = self.home_name = ''
+        self.away_runs = self.home_runs = 0
+        self.inning = 0
+        self.inning_half = ''
+        self.status = 'Preview'
+        self.timecode = None
+
+    def load_feed(self, feed):
+        """由完整 feed 初始化狀態"""
+        teams = feed['gameData']['teams']
+        linescore = feed['liveData'].get('linescore', {})
+        self.away_id = teams['away']['id']
+        self.home_id = teams['home']['id']
+        self.away_name = teams['away']['name']
+        self.home_name = teams['home']['name']
+        self.away_runs = linescore.get('teams', {}).get('away', {}).get('runs', 0)
+        self.home_runs = linescore.get('teams', {}).get('home', {}).get('runs', 0)
+        self.inning = linescore.get('currentInning', 0)
+        self.inning_half = linescore.get('inningHalf', '')
+        self.status = feed['gameData']['status']['abstractGameState']
+        self.timecode = feed['metaData']['timeStamp']
+
+    def apply_patch(self, ops):
+        """套用 JSON Patch 操作，只處理有追蹤的路徑"""
+        for op in ops:
+            field = _TRACKED_PATHS.get(op.get('path'))
+            if field is not None and op.get('op') in ('add', 'replace'):
+                setattr(self, field, op['value'])
+
+    def snapshot(self):
+        return (self.away_runs, self.home_runs, self.status)
+
+    def describe(self):
+        if self.status == 'Final':
+            progress = "比賽結束"
+        else:
+            half = {'Top': '上', 'Bottom': '下'}.get(self.inning_half, self.inning_half)
+            progress = f"{self.inning} 局{half}"
+        return f"⚾ {self.away_name} {self.away_runs} : {self.home_runs} {self.home_name}（{progress}）"
+
+
+def _patch_ops(response):
+    """diffPatch 可能回傳 patch 清單或（差異過多時）完整 feed"""
+    if isinstance(response, dict):
+        return None
+    ops = []
+    for entry in response:
+        if isinstance(entry, dict) and 'diff' in entry:
+            ops.extend(entry['diff'])
+        elif isinstance(entry, dict):
+            ops.append(entry)
+    return ops
+
+
+class LiveGameTracker:
+    """只輪詢進行中的比賽，以 diffPatch 取得增量變化並回報比分變動"""
+
+    def __init__(self, fetch=http_client.get_json):
+        self._fetch = fetch
+        self.games = {}
+
+    def sync_games(self, games, team_ids):
+        """依今日賽程開始追蹤（或停止追蹤）訂閱球隊的進行中比賽"""
+        live = {
+            game.game_pk for game in games
+            if game.state == 'Live' and {game.away_id, game.home_id} & team_ids
+        }
+        for game_pk in live - set(self.games):
+            self.games[game_pk] = None
+        for game_pk in set(self.games) - live:
+            state = self.games[game_pk]
+            # 已結束的比賽在下一次輪詢回報終場後移除
+            if state is None or state.status == 'Final':
+                del self.games[game_pk]
+
+    def poll_game(self, game_pk):
+        """輪詢單場比賽，比分或狀態有變化時回傳 GameState，否則回傳 None
+
+        第一次載入只建立基準狀態、不視為變化，避免重新啟動後把所有進行中比賽的目前比分再推送一次
+        """
+        state = self.games.get(game_pk)
+        if state is None or state.timecode is None:
+            state = GameState(game_pk)
+            state.load_feed(self._fetch(FEED_URL.format(game_pk=game_pk), params={'fields': FEED_FIELDS}))
+            self.games[game_pk] = state
+            return None
+        before = state.snapshot()
+        response = self._fetch(DIFF_URL.format(game_pk=game_pk), params={'startTimecode': state.timecode})
+        ops = _patch_ops(response)
+        if ops is None:
+            state.load_feed(response)
+        else:
+            state.apply_patch(ops)
+        return state if state.snapshot() != before else None
+
+    def poll(self):
+        """輪詢所有追蹤中的比賽，回傳有變化的比賽狀態"""
+        changed = []
+        for game_pk in list(self.games):
+            try:
+                state = self.poll_game(game_pk)
+            except Exception as e:
+                print(f"比分更新錯誤 {game_pk}: {str(e)}")
+                continue
+            if state is not None:
+                changed.append(state)
+        return changed
+
+
+class Subscriptions:
+    """頻道 -> 訂閱球隊，保存於本地檔案
+
+    多程序分片時各工作程序共用同一個檔案：修改時以檔案鎖做讀取-修改-寫入，讀取時若檔案已被其他程序更新則重新載入
+    """
+
+    def __init__(self, path=SUBSCRIPTIONS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.by_channel = {}
+        self._mtime = None
+        with self._lock:
+            self._reload()
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _reload(self):
+        """檔案修改時間改變時重新載入（呼叫端持有 self._lock）"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.by_channel = {int(k): set(v) for k, v in json.load(f).items()}
+            self._mtime = mtime
+        except (OSError, ValueError) as e:
+            print(f"訂閱讀取失敗: {str(e)}")
+
+    def _save(self):
+        try:
+            # 先寫入暫存檔再取代，其他程序不會讀到寫到一半的檔案
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({str(k): sorted(v) for k, v in self.by_channel.items()}, f)
+            os.replace(temp_path, self.path)
+            self._mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            print(f"訂閱儲存失敗: {str(e)}")
+
+    def add(self, channel_id, team_id):
+        with self._lock, self._file_lock():
+            self._reload()
+            self.by_channel.setdefault(channel_id, set()).add(team_id)
+            self._save()
+
+    def remove(self, channel_id, team_id=None):
+        with self._lock, self._file_lock():
+            self._reload()
+            teams = self.by_channel.get(channel_id, set())
+            if team_id is None:
+                teams.clear()
+            else:
+                teams.discard(team_id)
+            if not teams:
+                self.by_channel.pop(channel_id, None)
+            self._save()
+
+    def team_ids(self):
+        with self._lock:
+            self._reload()
+            return set().union(*self.by_channel.values()) if self.by_channel else set()
+
+    def channels_for(self, team_ids):
+        with self._lock:
+            self._reload()
+            return [channel_id for channel_id, teams in self.by_channel.items() if teams & team_ids]
+
+
+class LiveScoreCog(commands.Cog):
+    """一個上游輪詢者取代多位用戶反覆查詢：比分變動時推送到訂閱頻道
+
+    多程序分片時只有一個程序（poll=True）輪詢並推送，其他程序只處理 !follow / !unfollow
+    """
+
+    def __init__(self, bot: commands.Bot, poll=True):
+        self.bot = bot
+        self.tracker = LiveGameTracker()
+        self.subscriptions = Subscriptions()
+        # tracker 只在 _poll_once 中使用；逾時的輪詢仍在執行緒中進行時，下一輪不會同時修改
+        self._poll_lock = threading.Lock()
+        if poll:
+            self.poll_scores.start()
+
+    def cog_unload(self):
+        self.poll_scores.cancel()
+
+    def _poll_once(self):
+        """讀取訂閱、同步今日賽程並輪詢（同步函式，在執行緒池中執行），回傳 [(訊息, 頻道 ID 列表)]"""
+        if not self._poll_lock.acquire(blocking=False):
+            print("上一輪比分輪詢尚未結束，略過")
+            return []
+        try:
+            team_ids = self.subscriptions.team_ids()
+            if not team_ids:
+                return []
+            self.tracker.sync_games(schedule_index.games_on(), team_ids)
+            return [(state.describe(), self.subscriptions.channels_for({state.away_id, state.home_id}))
+                    for state in self.tracker.poll()]
+        finally:
+            self._poll_lock.release()
+
+    @tasks.loop(seconds=POLL_SECONDS)
+    async def poll_scores(self):
+        try:
+            updates = await run_blocking(self._poll_once)
+        except Exception as e:
+            print(f"比分追蹤錯誤: {str(e)}")
+            return
+        for message, channel_ids in updates:
+            for channel_id in channel_ids:
+                # 其他分片的頻道不在此程序的快取中，改以頻道 ID 直接透過 REST 傳送
+                channel = self.bot.get_channel(channel_id) or self.bot.get_partial_messageable(channel_id)
+                try:
+                    await channel.send(message)
+                except discord.HTTPException as e:
+                    print(f"比分推送失敗 {channel_id}: {str(e)}")
+
+    @poll_scores.before_loop
+    async def before_poll_scores(self):
+        await self.bot.wait_until_ready()
+
+    @commands.hybrid_command(help='訂閱球隊比分推送，比分變動時自動通知此頻道\n例：!follow NYY')
+    async def follow(self, ctx, team=None):
+        """訂閱球隊比分推送"""
+        if team is None:
+            await ctx.send("請提供球隊代號！例如：!follow NYY")
+            return
+        team_info = await run_blocking(resolve_team, team)
+        if not team_info:
+            await ctx.send(await run_blocking(team_not_found, team))
+            return
+        await run_blocking(self.subscriptions.add, ctx.channel.id, team_info.id)
+        await ctx.send(f"✅ 已訂閱 {team_info.name} 的比分推送")
+
+    @commands.hybrid_command(help='取消訂閱球隊比分推送（不指定球隊則取消全部）\n例：!unfollow NYY')
+    async def unfollow(self, ctx, team=None):
+        """取消訂閱球隊比分推送"""
+        if team is None:
+            await run_blocking(self.subscriptions.remove, ctx.channel.id)
+            await ctx.send("✅ 已取消此頻道的所有比分推送")
+            return
+        team_info = await run_blocking(resolve_team, team)
+        if not team_info:
+            await ctx.send(await run_blocking(team_not_found, team))
+            return
+        await run_blocking(self.subscriptions.remove, ctx.channel.id, team_info.id)
+        await ctx.send(f"✅ 已取消 {team_info.name} 的比分推送")
@@ -0,0 +1,154 @@
+import asyncio
+import time
+from decimal import Decimal
+
+from async_runner import run_blocking
+from log_store import date_bucket, utc_timestamp
+from metrics import metrics
+from rollups import ROLLUP_FLUSH_INTERVAL
+
+# 佇列上限：超過時丟棄新紀錄並計數，避免記錄拖慢指令
+MAX_QUEUE = 10000
+# DynamoDB BatchWriteItem 每批最多 25 筆
+BATCH_SIZE = 25
+# 最長多久寫入一次
+FLUSH_INTERVAL = 2.0
+# 尚未完成的指令最多等待多久就先寫入
+MAX_LINGER = 30.0
+
+
+def _sanitize(value):
+    # boto3 的 DynamoDB resource 不接受 float
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {k: _sanitize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_sanitize(v) for v in value]
+    return value
+
+
+class CommandLogWriter:
+    """背景指令日誌管線：同一次呼叫的多筆記錄合併為一筆，依數量與時間批次寫入 DynamoDB"""
+
+    def __init__(self, table, rollups=None, max_queue=MAX_QUEUE, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, max_linger=MAX_LINGER,
+                 rollup_interval=ROLLUP_FLUSH_INTERVAL):
+        self.table = table
+        self.rollups = rollups
+        self.rollup_interval = rollup_interval
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_linger = max_linger
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._pending = {}  # command_id -> [record, first_seen, final]
+        self._ready = []
+        self._task = None
+        self._closing = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def log(self, command_id, final=False, **fields):
+        """非阻塞地加入一筆記錄；final=True 表示此呼叫已結束可寫入"""
+        try:
+            self._queue.put_nowait((str(command_id), final, fields))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        """停止背景工作並寫入所有尚未寫入的記錄"""
+        # 以旗標停止背景迴圈（最多等待一個寫入週期），避免取消進行中的批次寫入
+        self._closing = True
+        if self._task is not None:
+            await self._task
+            self._task = None
+        self._drain_queue()
+        self._ready.extend(record for record, _, _ in self._pending.values())
+        self._pending.clear()
+        while self._ready:
+            await self._flush()
+        await self._flush_rollups()
+
+    def _merge(self, command_id, final, fields):
+        entry = self._pending.get(command_id)
+        if entry is None:
+            record = {'command_id': command_id, 'timestamp': utc_timestamp()}
+            entry = self._pending[command_id] = [record, time.monotonic(), False]
+        entry[0].update(fields)
+        entry[2] = entry[2] or final
+
+    def _drain_queue(self):
+        while True:
+            try:
+                self._merge(*self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return
+
+    def _collect_ready(self):
+        now = time.monotonic()
+        for command_id in list(self._pending):
+            record, first_seen, final = self._pending[command_id]
+            if final or now - first_seen >= self.max_linger:
+                self._ready.append(record)
+                del self._pending[command_id]
+
+    async def _run(self):
+        last_flush = last_rollup = time.monotonic()
+        while not self._closing:
+            timeout = max(self.flush_interval - (time.monotonic() - last_flush), 0)
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+                self._merge(*item)
+                self._drain_queue()
+            except asyncio.TimeoutError:
+                pass
+            self._collect_ready()
+            due = time.monotonic() - last_flush >= self.flush_interval
+            while len(self._ready) >= self.batch_size or (due and self._ready):
+                await self._flush()
+            if due:
+                last_flush = time.monotonic()
+            if time.monotonic() - last_rollup >= self.rollup_interval:
+                await self._flush_rollups()
+                last_rollup = time.monotonic()
+
+    async def _flush(self):
+        batch, self._ready = self._ready[:self.batch_size], self._ready[self.batch_size:]
+        try:
+            await run_blocking(self._write_batch, batch)
+            self.written += len(batch)
+            if self.rollups is not None:
+                for record in batch:
+                    self.rollups.add(record)
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"日誌批次寫入錯誤: {str(e)}")
+
+    async def _flush_rollups(self):
+        if self.rollups is None:
+            return
+        try:
+            await run_blocking(self.rollups.flush)
+        except Exception as e:
+            print(f"使用量彙總寫入錯誤: {str(e)}")
+
+    def _write_batch(self, batch):
+        with metrics.stage('log_write'), self.table.batch_writer(overwrite_by_pkeys=['command_id']) as writer:
+            for record in batch:
+                # date_bucket 為時間索引的分區鍵
+                record['date_bucket'] = date_bucket(record['timestamp'])
+                writer.put_item(Item=_sanitize(record))
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'pending': len(self._pending) + len(self._ready),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
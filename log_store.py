@@ -0,0 +1,108 @@
+import sys
+from datetime import datetime, timedelta, timezone
+
+import boto3
+from boto3.dynamodb.conditions import Attr, Key
+
+LOG_TABLE = 'mlb_bot_logs'
+LOG_REGION = 'ap-northeast-1'
+# GSI：以 UTC 日期分區、timestamp 排序，查詢時只讀取所需時間範圍
+LOG_INDEX = 'date_bucket-timestamp-index'
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+
+def utc_timestamp(dt=None):
+    """日誌使用的 UTC 時間字串（可依字典順序排序）"""
+    dt = dt or datetime.now(timezone.utc)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.strftime(TIMESTAMP_FORMAT)
+
+
+def date_bucket(timestamp):
+    """由日誌時間字串取得分區鍵（UTC 日期）"""
+    return timestamp[:10]
+
+
+def query_window(table, start, end):
+    """逐頁產生 [start, end] 之間的日誌（datetime 視為 UTC），不做全表掃描"""
+    start_ts = utc_timestamp(start)
+    end_ts = utc_timestamp(end)
+    day = datetime.strptime(start_ts[:10], '%Y-%m-%d')
+    last_day = datetime.strptime(end_ts[:10], '%Y-%m-%d')
+    while day <= last_day:
+        kwargs = {
+            'IndexName': LOG_INDEX,
+            'KeyConditionExpression': (
+                Key('date_bucket').eq(day.strftime('%Y-%m-%d'))
+                & Key('timestamp').between(start_ts, end_ts)
+            ),
+        }
+        while True:
+            response = table.query(**kwargs)
+            yield response['Items']
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        day += timedelta(days=1)
+
+
+def ensure_log_index(client, table_name=LOG_TABLE):
+    """若 GSI 不存在則建立（一次性遷移）"""
+    description = client.describe_table(TableName=table_name)['Table']
+    existing = {index['IndexName'] for index in description.get('GlobalSecondaryIndexes', [])}
+    if LOG_INDEX in existing:
+        return False
+    index = {
+        'IndexName': LOG_INDEX,
+        'KeySchema': [
+            {'AttributeName': 'date_bucket', 'KeyType': 'HASH'},
+            {'AttributeName': 'timestamp', 'KeyType': 'RANGE'},
+        ],
+        'Projection': {'ProjectionType': 'ALL'},
+    }
+    if description.get('BillingModeSummary', {}).get('BillingMode') != 'PAY_PER_REQUEST':
+        index['ProvisionedThroughput'] = {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
+    client.update_table(
+        TableName=table_name,
+        AttributeDefinitions=[
+            {'AttributeName': 'date_bucket', 'AttributeType': 'S'},
+            {'AttributeName': 'timestamp', 'AttributeType': 'S'},
+        ],
+        GlobalSecondaryIndexUpdates=[{'Create': index}],
+    )
+    return True
+
+
+def backfill_date_buckets(table):
+    """為舊日誌補上 date_bucket（一次性遷移，僅掃描缺少該欄位的項目）"""
+    updated = 0
+    kwargs = {'FilterExpression': Attr('date_bucket').not_exists() & Attr('timestamp').exists()}
+    while True:
+        response = table.scan(**kwargs)
+        for item in response['Items']:
+            table.update_item(
+                Key={'command_id': item['command_id']},
+                UpdateExpression='SET date_bucket = :bucket',
+                ExpressionAttributeValues={':bucket': date_bucket(item['timestamp'])},
+            )
+            updated += 1
+        if 'LastEvaluatedKey' not in response:
+            return updated
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+if __name__ == '__main__':
+    # 用法：python log_store.py migrate
+    if sys.argv[1:] == ['migrate']:
+        client = boto3.client('dynamodb', region_name=LOG_REGION)
+        if ensure_log_index(client):
+            print(f"已建立索引 {LOG_INDEX}")
+        table = boto3.resource('dynamodb', region_name=LOG_REGION).Table(LOG_TABLE)
+        print(f"已補上 date_bucket：{backfill_date_buckets(table)} 筆")
+        from rollups import ROLLUP_TABLE, ensure_rollup_table
+        if ensure_rollup_table(client):
+            print(f"已建立使用量彙總表 {ROLLUP_TABLE}")
+    else:
+        print("用法：python log_store.py migrate")
@@ -0,0 +1,158 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# 直方圖的上界（秒）：1ms 起每格乘以 √2，約到 90 秒
+BUCKETS = tuple(0.001 * 2 ** (i / 2) for i in range(34))
+METRIC_PREFIX = 'mlb_bot_'
+
+# 目前執行中的指令名稱，讓各階段計時可依指令分類（經由 run_blocking 傳入執行緒池）
+current_command = contextvars.ContextVar('current_command', default='-')
+
+
+class Histogram:
+    """固定分桶的延遲直方圖，記錄次數與總和，百分位數以桶內線性內插估計"""
+
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else BUCKETS[-1] * 2
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-1]
+
+
+class MetricsRegistry:
+    """指令延遲、各階段耗時與計數器；可輸出 Prometheus 文字格式"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}  # (name, labels) -> value
+        self._collectors = []
+        self.started_at = time.monotonic()
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def stage(self, stage):
+        """記錄一個處理階段的耗時（依目前指令分類）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_seconds', time.perf_counter() - started,
+                         stage=stage, command=current_command.get())
+
+    def add_collector(self, collector):
+        """登記回傳 [(name, labels, value)] 的函式，輸出時讀取即時數值（如快取統計）"""
+        self._collectors.append(collector)
+
+    def summary(self, name, by):
+        """依某個標籤合併直方圖，回傳 {標籤值: (count, p50, p95, p99)}"""
+        merged = {}
+        with self._lock:
+            for (metric, labels), histogram in self._histograms.items():
+                if metric != name:
+                    continue
+                total = merged.setdefault(dict(labels).get(by, '-'), Histogram())
+                total.counts = [a + b for a, b in zip(total.counts, histogram.counts)]
+                total.count += histogram.count
+                total.sum += histogram.sum
+        return {key: (h.count, h.percentile(0.5), h.percentile(0.95), h.percentile(0.99))
+                for key, h in sorted(merged.items())}
+
+    def render_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        typed = set()
+        for (name, labels), histogram in histograms:
+            metric = METRIC_PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ('+Inf',), histogram.counts):
+                cumulative += count
+                le = bound if bound == '+Inf' else f"{bound:.6g}"
+                lines.append(f"{metric}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{metric}_sum{_labels(labels)} {histogram.sum:.6f}")
+            lines.append(f"{metric}_count{_labels(labels)} {histogram.count}")
+        for (name, labels), value in counters:
+            metric = METRIC_PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {value}")
+        for collector in self._collectors:
+            try:
+                samples = collector()
+            except Exception as e:
+                print(f"指標收集錯誤: {str(e)}")
+                continue
+            for name, labels, value in samples:
+                metric = METRIC_PREFIX + name
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} gauge")
+                    typed.add(metric)
+                lines.append(f"{metric}{_labels(tuple(sorted(labels.items())))} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+async def start_http_server(registry, host='127.0.0.1', port=9108):
+    """以 aiohttp 提供 /metrics 端點，回傳 runner（關閉時呼叫 runner.cleanup()）"""
+    from aiohttp import web
+
+    async def handle(_request):
+        return web.Response(text=registry.render_prometheus(), content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,157 @@
+"""精簡的領域模型：每份上游 payload 只解析一次，只保留渲染需要的欄位
+
+statsapi 的 JSON dict 巢狀且欄位多，快取數千場比賽時每場都要保留整串 dict；
+這裡改以 __slots__ 物件保存，時間預先解析為 datetime，重複出現的字串（隊名、狀態）共用同一份。
+"""
+import sys
+from datetime import datetime, timezone
+
+GAME_DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+# 模型格式版本：欄位變動時遞增，快取層（共用快取 / 磁碟快取）中的舊格式資料即不再沿用
+MODEL_VERSION = 1
+# 比賽已結束的狀態碼（F: Final, FR/FT: 因雨/平手提前結束, O: Game Over）
+FINAL_STATUS_CODES = frozenset({'F', 'FR', 'FT', 'O'})
+
+# hstat / pstat / compare 顯示的欄位（mlbstatsapi 的小寫屬性名稱）
+HITTER_FIELDS = ("gamesplayed", "groundouts", "airouts", "runs", "doubles", "triples", "homeruns", "strikeouts", "baseonballs", "intentionalwalks", "hits", "hitbypitch", "avg", "atbats", "obp", "slg", "ops", "caughtstealing", "stolenbases", "stolenbasepercentage", "plateappearances", "sacbunts", "sacflies", "babip", "groundoutstoairouts", "atbatsperhomerun")
+PITCHER_FIELDS = ("gamesplayed", "gamesstarted", "groundouts", "airouts", "runs", "doubles", "triples", "homeruns", "strikeouts", "baseonballs", "hits", "hitbypitch", "avg", "atbats", "obp", "slg", "ops", "caughtstealing", "stolenbases", "stolenbasepercentage", "numberofpitches", "inningspitched", "whip", "strikepercentage", "wildpitches", "pickoffs", "groundoutstoairouts", "pitchesperinning", "strikeoutwalkratio", "strikeoutsper9inn", "walksper9inn", "hitsper9inn", "runsscoredper9", "homerunsper9", "sacbunts", "sacflies", "battersfaced")
+# 格式化時的成員判斷使用 set（O(1)）
+HITTER_FIELD_SET = frozenset(HITTER_FIELDS)
+PITCHER_FIELD_SET = frozenset(PITCHER_FIELDS)
+STAT_FIELDS = {'hitting': HITTER_FIELDS, 'pitching': PITCHER_FIELDS}
+
+
+def _intern(text):
+    return None if text is None else sys.intern(text)
+
+
+def parse_game_date(text):
+    """statsapi 的 gameDate（UTC，如 2024-09-01T23:05:00Z）-> 帶時區的 datetime"""
+    return datetime.strptime(text, GAME_DATE_FORMAT).replace(tzinfo=timezone.utc)
+
+
+class Team:
+    """大聯盟球隊；除了顯示用的 id / name / abbreviation，也保留球隊目錄建立查詢索引的名稱欄位"""
+
+    __slots__ = ('id', 'name', 'abbreviation', 'team_name', 'club_name', 'short_name',
+                 'file_code', 'team_code', 'franchise_name', 'location_name')
+
+    def __init__(self, id, name, abbreviation, team_name=None, club_name=None, short_name=None,
+                 file_code=None, team_code=None, franchise_name=None, location_name=None):
+        self.id = id
+        self.name = _intern(name)
+        self.abbreviation = _intern(abbreviation)
+        self.team_name = team_name
+        self.club_name = club_name
+        self.short_name = short_name
+        self.file_code = file_code
+        self.team_code = team_code
+        self.franchise_name = franchise_name
+        self.location_name = location_name
+
+    @classmethod
+    def from_api(cls, team):
+        """由 /api/v1/teams 的單一球隊建立"""
+        return cls(team['id'], team['name'], team['abbreviation'], team.get('teamName'),
+                   team.get('clubName'), team.get('shortName'), team.get('fileCode'),
+                   team.get('teamCode'), team.get('franchiseName'), team.get('locationName'))
+
+    def __repr__(self):
+        return f"Team({self.id}, {self.abbreviation!r})"
+
+
+class Game:
+    """賽程中的單場比賽（比分尚未產生時為 None）"""
+
+    __slots__ = ('game_pk', 'date', 'start', 'state', 'status_code',
+                 'away_id', 'away_name', 'away_score', 'home_id', 'home_name', 'home_score')
+
+    def __init__(self, game_pk, date, start, state, status_code,
+                 away_id, away_name, away_score, home_id, home_name, home_score):
+        self.game_pk = game_pk
+        self.date = date
+        self.start = start
+        self.state = state
+        self.status_code = status_code
+        self.away_id = away_id
+        self.away_name = away_name
+        self.away_score = away_score
+        self.home_id = home_id
+        self.home_name = home_name
+        self.home_score = home_score
+
+    @classmethod
+    def from_api(cls, game, date=None):
+        """由 schedule 回應中的單場比賽建立；date 為賽程分組的日期（美東當地日期）"""
+        away = game['teams']['away']
+        home = game['teams']['home']
+        status = game['status']
+        return cls(
+            game['gamePk'],
+            _intern(date),
+            parse_game_date(game['gameDate']),
+            _intern(status.get('abstractGameState')),
+            _intern(status.get('statusCode')),
+            away['team']['id'],
+            _intern(away['team']['name']),
+            away.get('score'),
+            home['team']['id'],
+            _intern(home['team']['name']),
+            home.get('score'),
+        )
+
+    def involves(self, team_id):
+        return team_id == self.away_id or team_id == self.home_id
+
+    def __repr__(self):
+        return f"Game({self.game_pk}, {self.away_name!r} @ {self.home_name!r})"
+
+
+def is_final(game):
+    """比賽是否已結束（賽程索引與球隊比賽記錄共用的判斷）"""
+    return game.status_code in FINAL_STATUS_CODES or game.state == 'Final'
+
+
+class ProbableStart:
+    """球隊接下來一場比賽的預計先發"""
+
+    __slots__ = ('date', 'start', 'home', 'opponent', 'pitcher', 'opposing_pitcher')
+
+    def __init__(self, date, start, home, opponent, pitcher, opposing_pitcher):
+        self.date = date
+        self.start = start
+        self.home = home
+        self.opponent = opponent
+        self.pitcher = pitcher
+        self.opposing_pitcher = opposing_pitcher
+
+
+class StatLine:
+    """球員本季的打擊與投球數據；數據依 HITTER_FIELDS / PITCHER_FIELDS 的順序存成 tuple（沒有數據時為 None）"""
+
+    __slots__ = ('player_id', 'name', 'position', 'hitting', 'pitching')
+
+    def __init__(self, player_id, name, position, hitting=None, pitching=None):
+        self.player_id = player_id
+        self.name = name
+        self.position = _intern(position)
+        self.hitting = hitting
+        self.pitching = pitching
+
+    @staticmethod
+    def pack(stat, group):
+        """statsapi 的 stat dict -> 依顯示欄位排列的 tuple（欄位名稱不分大小寫，缺少的欄位為 None）"""
+        if not stat:
+            return None
+        lowered = {key.lower(): value for key, value in stat.items()}
+        return tuple(lowered.get(field) for field in STAT_FIELDS[group])
+
+    def stats(self, group):
+        """回傳 {欄位: 數值}（只含有數值的欄位），沒有該組數據時回傳 None"""
+        values = getattr(self, group)
+        if values is None:
+            return None
+        return {field: value for field, value in zip(STAT_FIELDS[group], values) if value is not None}
+
+    def __repr__(self):
+        return f"StatLine({self.player_id}, {self.name!r})"
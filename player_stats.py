@@ -0,0 +1,204 @@
+import json
+import threading
+import time
+import unicodedata
+
+import mlbstatsapi
+
+from cache import shared_get, shared_set
+import http_client
+from metrics import metrics
+from models import StatLine
+from seasons import current_season_year
+
+PLAYERS_URL = "https://statsapi.mlb.com/api/v1/sports/1/players"
+PEOPLE_URL = "https://statsapi.mlb.com/api/v1/people"
+# people?personIds=... 每次請求最多帶幾位球員
+PEOPLE_BATCH = 25
+STAT_GROUPS = ('hitting', 'pitching')
+# 球員名稱索引的本地檔案（重啟後不必重新下載全部球員）
+PLAYER_INDEX_FILE = 'player_index.json'
+PLAYER_INDEX_TTL = 24 * 60 * 60
+
+_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv'}
+
+
+def season_line(person):
+    """將 people?hydrate=stats(...) 的單一球員轉為 StatLine（只保留顯示的欄位）"""
+    line = StatLine(person['id'], person.get('fullName', ''),
+                    (person.get('primaryPosition') or {}).get('abbreviation', ''))
+    for entry in person.get('stats', []):
+        group = (entry.get('group') or {}).get('displayName')
+        splits = entry.get('splits') or []
+        if group in STAT_GROUPS and splits:
+            # 季中轉隊的球員有各隊分項與一筆不含 team 的合計
+            total = next((split for split in splits if 'team' not in split), splits[0])
+            setattr(line, group, StatLine.pack(total['stat'], group))
+    return line
+
+
+def normalize_name(name):
+    """去除重音與標點、轉小寫：'José Ramírez' -> 'jose ramirez'，'J.D. Martinez' -> 'jd martinez'"""
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch))
+    name = ''.join(ch if ch.isalnum() or ch.isspace() else ('' if ch in ".'" else ' ') for ch in name)
+    return ' '.join(name.lower().split())
+
+
+class PlayerIndex:
+    """持久化的球員名稱 -> ID 索引，支援不分重音查詢與姓氏備援
+
+    設定 backend（共用快取 / 磁碟快取）時保存在快取層（多個程序共用），否則保存在本地 JSON 檔
+    """
+
+    def __init__(self, path=PLAYER_INDEX_FILE, ttl=PLAYER_INDEX_TTL, backend=None):
+        self.path = path
+        self.ttl = ttl
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._season = None
+        self._fetched_at = 0.0
+        self._players = []
+        self._by_name = {}
+        self._by_last = {}
+
+    def _build(self, players):
+        by_name = {}
+        by_last = {}
+        for player_id, full_name in players:
+            key = normalize_name(full_name)
+            by_name.setdefault(key, player_id)
+            words = key.split()
+            if len(words) > 1 and words[-1] in _SUFFIXES:
+                words = words[:-1]
+                by_name.setdefault(' '.join(words), player_id)
+            if words:
+                by_last.setdefault(words[-1], []).append(player_id)
+        self._players = players
+        self._by_name = by_name
+        self._by_last = by_last
+
+    def _read_saved(self, season):
+        if self.backend is not None:
+            found = shared_get(self.backend, ('player_index', season))
+            return found[0] if found else None
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_saved(self, data):
+        if self.backend is not None:
+            shared_set(self.backend, ('player_index', data['season']), data, self.ttl)
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"球員索引寫入失敗: {str(e)}")
+
+    def _load_saved(self, season):
+        data = self._read_saved(season)
+        if data is None:
+            return False
+        if data.get('season') != season or time.time() - data.get('fetched_at', 0) >= self.ttl:
+            return False
+        self._season = season
+        self._fetched_at = data['fetched_at']
+        self._build([tuple(player) for player in data['players']])
+        return True
+
+    def _download(self, season):
+        data = http_client.get_json(PLAYERS_URL, params={
+            'season': season,
+            'fields': 'people,id,fullName',
+        })
+        players = [(person['id'], person['fullName']) for person in data.get('people', [])]
+        self._season = season
+        self._fetched_at = time.time()
+        self._build(players)
+        self._write_saved({'season': season, 'fetched_at': self._fetched_at, 'players': players})
+
+    def _ensure_loaded(self, season):
+        if self._season == season and time.time() - self._fetched_at < self.ttl:
+            return
+        with self._lock:
+            if self._season == season and time.time() - self._fetched_at < self.ttl:
+                return
+            if not self._load_saved(season):
+                self._download(season)
+
+    def resolve(self, name, season):
+        """解析球員 ID：先比對全名，再以唯一的姓氏備援；找不到回傳 None"""
+        self._ensure_loaded(season)
+        key = normalize_name(name)
+        if key in self._by_name:
+            return self._by_name[key]
+        candidates = self._by_last.get(key.split()[-1] if key else '', [])
+        if len(candidates) == 1:
+            return candidates[0]
+        return None
+
+
+class PlayerStatsService:
+    """共用單一 mlbstatsapi 客戶端與球員索引，每次查詢只發出一次數據請求"""
+
+    def __init__(self, index=None):
+        try:
+            # 新版 mlbstatsapi 可共用連線池
+            self.mlb = mlbstatsapi.Mlb(session=http_client.session)
+        except TypeError:
+            self.mlb = mlbstatsapi.Mlb()
+        self.index = index or PlayerIndex()
+
+    def resolve(self, name, season=None):
+        season = season or current_season_year()
+        player_id = self.index.resolve(name, season)
+        if player_id is None:
+            raise LookupError(f"找不到球員：{name}")
+        return player_id
+
+    def resolve_many(self, names, season=None):
+        """一次解析多位球員（只載入一次索引），回傳 ({名稱: ID}, [找不到的名稱])"""
+        season = season or current_season_year()
+        found = {}
+        missing = []
+        for name in names:
+            player_id = self.index.resolve(name, season)
+            if player_id is None:
+                missing.append(name)
+            else:
+                found[name] = player_id
+        return found, missing
+
+    def season_lines(self, player_ids, season=None):
+        """以 people?personIds=...&hydrate=stats(...) 批次取得多位球員的本季打擊與投球數據
+
+        每 PEOPLE_BATCH 位球員一次請求，回傳 {player_id: season_line}
+        """
+        season = season or current_season_year()
+        player_ids = list(dict.fromkeys(player_ids))
+        lines = {}
+        for start in range(0, len(player_ids), PEOPLE_BATCH):
+            batch = player_ids[start:start + PEOPLE_BATCH]
+            data = http_client.get_json(PEOPLE_URL, params={
+                'personIds': ','.join(str(player_id) for player_id in batch),
+                'hydrate': f"stats(group=[{','.join(STAT_GROUPS)}],type=[season],season={season})",
+            })
+            for person in data.get('people', []):
+                lines[person['id']] = season_line(person)
+        return lines
+
+    def season_splits(self, name, group):
+        """取得球員本季的 season 分項數據（group 為 'hitting' 或 'pitching'）"""
+        season = current_season_year()
+        player_id = self.resolve(name, season)
+        with metrics.stage('http_fetch'):
+            stat_dict = self.mlb.get_player_stats(player_id, stats=['season'], groups=[group], season=season)
+        if group not in stat_dict or 'season' not in stat_dict[group]:
+            raise LookupError(f"{name} 在 {season} 球季沒有{'打擊' if group == 'hitting' else '投球'}數據")
+        return stat_dict[group]['season'].splits
+
+
+player_stats = PlayerStatsService()
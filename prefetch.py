@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+from discord.ext import commands, tasks
+
+from async_runner import run_blocking
+from probables import probable_pitchers
+from schedule_index import schedule_index
+from team_directory import team_directory
+
+# 各情境的刷新間隔（分鐘）
+LIVE_INTERVAL = 1
+PREGAME_INTERVAL = 2
+GAMEDAY_INTERVAL = 15
+IDLE_INTERVAL = 60
+# 開賽前多久開始密集刷新
+PREGAME_WINDOW = timedelta(hours=1)
+# 距離開賽超過此時間視為夜間/離峰
+IDLE_WINDOW = timedelta(hours=6)
+# 球隊目錄刷新間隔
+TEAM_REFRESH = timedelta(hours=6)
+
+
+def next_interval(games, now=None):
+    """依今日賽程決定下次刷新的間隔：比賽中與開賽前頻繁，夜間與無比賽時稀疏"""
+    now = now or datetime.now(timezone.utc)
+    if any(game.state == 'Live' for game in games):
+        return LIVE_INTERVAL
+    upcoming = [game.start for game in games if game.state == 'Preview']
+    if not upcoming:
+        return IDLE_INTERVAL
+    until_first_pitch = min(upcoming) - now
+    if until_first_pitch <= PREGAME_WINDOW:
+        return PREGAME_INTERVAL
+    if until_first_pitch > IDLE_WINDOW:
+        return IDLE_INTERVAL
+    return GAMEDAY_INTERVAL
+
+
+class PrefetchCog(commands.Cog):
+    """背景預先載入比賽日資料，讓互動指令幾乎都能直接命中快取"""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.team_refreshed_at = None
+        self.prefetch.start()
+
+    def cog_unload(self):
+        self.prefetch.cancel()
+
+    @tasks.loop(minutes=GAMEDAY_INTERVAL)
+    async def prefetch(self):
+        now = datetime.now(timezone.utc)
+        interval = GAMEDAY_INTERVAL
+        try:
+            if self.team_refreshed_at is None:
+                # 啟動時依 TTL 載入：快取層（共用快取 / 磁碟快取）仍有效時不重新抓取
+                await run_blocking(team_directory.teams)
+                self.team_refreshed_at = now
+            elif now - self.team_refreshed_at >= TEAM_REFRESH:
+                await run_blocking(team_directory.refresh)
+                self.team_refreshed_at = now
+            # 今日賽程（含比分）與預計先發
+            games = await run_blocking(schedule_index.refresh)
+            await run_blocking(probable_pitchers.refresh)
+            interval = next_interval(games, now)
+        except Exception as e:
+            print(f"預先載入錯誤: {str(e)}")
+        if self.prefetch.minutes != interval:
+            self.prefetch.change_interval(minutes=interval)
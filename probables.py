@@ -0,0 +1,95 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from cache import shared_get, shared_set
+import http_client
+from models import MODEL_VERSION, ProbableStart, parse_game_date
+
+SCHEDULE_URL = "https://statsapi.mlb.com/api/v1/schedule"
+SCHEDULE_FIELDS = (
+    "dates,date,games,gamePk,gameDate,status,abstractGameState,"
+    "teams,away,home,team,id,name,probablePitcher,fullName"
+)
+# 預計先發通常在賽前數天公布
+DAYS_AHEAD = 3
+PROBABLES_TTL = 10 * 60
+# 快取層（共用快取）中的鍵
+PROBABLES_KEY = ('probables', MODEL_VERSION)
+
+
+class ProbablePitchers:
+    """全聯盟預計先發投手表：每次刷新只發出一次 schedule?hydrate=probablePitcher 請求
+
+    設定 backend（多程序共用快取）時，過期後先讀取其他程序（背景預先載入）抓取的表再向上游請求
+    """
+
+    def __init__(self, ttl=PROBABLES_TTL, fetch=http_client.get_json, backend=None):
+        self.ttl = ttl
+        self.backend = backend
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._by_team = {}
+        self._loaded_at = None
+
+    def _is_fresh(self):
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def refresh(self):
+        """重新抓取今天起 DAYS_AHEAD 天內全聯盟的預計先發"""
+        today = datetime.now()
+        data = self._fetch(SCHEDULE_URL, params={
+            'sportId': 1,
+            'startDate': today.strftime("%Y-%m-%d"),
+            'endDate': (today + timedelta(days=DAYS_AHEAD)).strftime("%Y-%m-%d"),
+            'hydrate': 'probablePitcher',
+            'fields': SCHEDULE_FIELDS,
+        })
+        by_team = {}
+        for date in data.get('dates', []):
+            for game in date['games']:
+                if game['status'].get('abstractGameState') == 'Final':
+                    continue
+                start = parse_game_date(game['gameDate'])
+                sides = game['teams']
+                for side, other in (('away', 'home'), ('home', 'away')):
+                    pitcher = sides[side].get('probablePitcher') or {}
+                    opposing = sides[other].get('probablePitcher') or {}
+                    by_team.setdefault(sides[side]['team']['id'], []).append(ProbableStart(
+                        date['date'],
+                        start,
+                        side == 'home',
+                        sides[other]['team']['name'],
+                        pitcher.get('fullName'),
+                        opposing.get('fullName'),
+                    ))
+        self._by_team = by_team
+        self._loaded_at = time.monotonic()
+        shared_set(self.backend, PROBABLES_KEY, by_team, self.ttl)
+
+    def _load_saved(self):
+        found = shared_get(self.backend, PROBABLES_KEY)
+        if found is None:
+            return False
+        self._by_team, remaining = found
+        self._loaded_at = time.monotonic()
+        if remaining is not None:
+            # 依剩餘 TTL 決定下次刷新時間
+            self._loaded_at -= max(self.ttl - remaining, 0)
+        return True
+
+    def for_team(self, team_id):
+        """回傳球隊接下來比賽的預計先發（依比賽時間排序）"""
+        if not self._is_fresh():
+            with self._lock:
+                if not self._is_fresh() and not self._load_saved():
+                    try:
+                        self.refresh()
+                    except Exception:
+                        # 已有舊資料時繼續使用
+                        if self._loaded_at is None:
+                            raise
+        return self._by_team.get(team_id, [])
+
+
+probable_pitchers = ProbablePitchers()
@@ -0,0 +1,59 @@
+import discord
+
+# 執行設定檔：控制 gateway intents 與 discord.py 的成員/訊息快取
+# full：舊版設定（成員、上線狀態全開），standard：指令不需要的成員與上線狀態快取全部關閉（預設），
+# low_memory：最少 intents、不快取成員與訊息、不需 message_content（以斜線指令使用）
+DEFAULT_PROFILE = 'standard'
+
+
+def _full():
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.members = True
+    intents.presences = True
+    return {
+        'intents': intents,
+        'member_cache_flags': discord.MemberCacheFlags.from_intents(intents),
+        'max_messages': 1000,
+        'chunk_guilds_at_startup': True,
+    }
+
+
+def _standard():
+    intents = discord.Intents.default()
+    intents.message_content = True
+    return {
+        'intents': intents,
+        'member_cache_flags': discord.MemberCacheFlags.from_intents(intents),
+        'max_messages': 1000,
+        'chunk_guilds_at_startup': False,
+    }
+
+
+def _low_memory():
+    # 只需要伺服器（頻道）與訊息事件；斜線指令經由 interaction 送達，不需要額外 intents
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.dm_messages = True
+    return {
+        'intents': intents,
+        'member_cache_flags': discord.MemberCacheFlags.none(),
+        'max_messages': None,
+        'chunk_guilds_at_startup': False,
+    }
+
+
+PROFILES = {
+    'full': _full,
+    'standard': _standard,
+    'low_memory': _low_memory,
+}
+
+
+def bot_options(name=None):
+    """回傳設定檔對應的 Bot 參數（intents、member_cache_flags、max_messages、chunk_guilds_at_startup）"""
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"未知的執行設定檔：{name}（可用：{', '.join(PROFILES)}）")
+    return PROFILES[name]()
@@ -1,33 +1,33 @@
+import argparse
 import boto3
-from datetime import datetime, timedelta
+import heapq
+from datetime import datetime, timedelta, timezone
 from collections import Counter
 from tabulate import tabulate
 import pytz  # 需要安裝: pip3 install pytz
+from log_store import LOG_REGION, LOG_TABLE, query_window
 
 # 設置台灣時區
 tw_tz = pytz.timezone('Asia/Taipei')
+# 台灣沒有日光節約時間，固定為 UTC+8，可直接用整數位移換算小時
+TW_OFFSET_HOURS = 8
 
-dynamodb = boto3.resource('dynamodb', region_name='ap-northeast-1')
-table = dynamodb.Table('mlb_bot_logs')
+# 報告中列出的最近命令筆數上限（維持固定記憶體用量）
+RECENT_LIMIT = 200
+
+dynamodb = boto3.resource('dynamodb', region_name=LOG_REGION)
+table = dynamodb.Table(LOG_TABLE)
 
 def convert_to_tw_time(timestamp_str):
-    # 將字符串轉換為 datetime 對象
-    dt = datetime.strptime(timestamp_str.split('.')[0], '%Y-%m-%d %H:%M:%S')
-    # 設置為 UTC 時間
-    dt = pytz.utc.localize(dt)
+    # 日誌時間為 UTC，格式為 YYYY-MM-DD HH:MM:SS[.ffffff]
+    dt = datetime.fromisoformat(timestamp_str.split('.')[0])
     # 轉換為台灣時間
-    tw_time = dt.astimezone(tw_tz)
+    tw_time = dt + timedelta(hours=TW_OFFSET_HOURS)
     return tw_time.strftime('%Y-%m-%d %H:%M:%S')
 
-def print_logs(items):
-    for item in sorted(items, key=lambda x: x['timestamp'], reverse=True):
-        print(f"\n時間: {convert_to_tw_time(item['timestamp'])} (台灣時間)")
-        print(f"命令: {item['command']}")
-        print(f"用戶: {item['user']}")
-        print(f"伺服器: {item['guild']}")
-        print(f"頻道: {item.get('channel', 'N/A')}")
-        print(f"完整命令: {item.get('content', 'N/A')}")
-        print("-" * 50)
+def tw_hour(timestamp_str):
+    """直接從字串取出 UTC 小時並換算台灣時間小時，不建立 datetime"""
+    return (int(timestamp_str[11:13]) + TW_OFFSET_HOURS) % 24
 
 def get_team_from_command(content):
     """從命令內容中提取球隊名稱"""
@@ -38,201 +38,182 @@ def get_team_from_command(content):
         return parts[1].upper()
     return None
 
-def print_detailed_stats(items):
-    stats = {
-        'total_commands': 0,
-        'commands_by_type': Counter(),
-        'users_by_command': {},
-        'guilds_by_command': {},
-        'hourly_usage': Counter(),
-        'channel_usage': Counter(),
-        'active_users': Counter(),
-        'active_guilds': Counter(),
-        'team_queries': Counter()  # 新增：球隊查詢統計
-    }
-    
-    for item in items:
-        # 轉換為台灣時間
-        tw_time = datetime.strptime(convert_to_tw_time(item['timestamp']), '%Y-%m-%d %H:%M:%S')
-        
-        # 基本計數
-        stats['total_commands'] += 1
-        command = item['command']
-        user = item['user']
-        guild = item['guild']
+
+class LogStats:
+    """單次走訪即更新所有統計的串流彙總器"""
+
+    def __init__(self, recent_limit=RECENT_LIMIT):
+        self.total_commands = 0
+        self.commands_by_type = Counter()
+        self.users_by_command = {}
+        self.guilds_by_command = {}
+        self.hourly_usage = Counter()
+        self.channel_usage = Counter()
+        self.active_users = Counter()
+        self.active_guilds = Counter()
+        self.team_queries = Counter()
+        self.user_team_prefs = {}
+        self.recent_limit = recent_limit
+        self._recent = []  # (timestamp, 序號, 記錄) 的最小堆積，只保留最新的幾筆
+        self._seq = 0
+
+    def add(self, item):
+        command = item.get('command', 'unknown')
+        user = item.get('user', 'unknown')
+        guild = item.get('guild', 'unknown')
         channel = item.get('channel', 'unknown')
-        
+        timestamp = item['timestamp']
+
+        # 基本計數
+        self.total_commands += 1
         # 命令使用統計
-        stats['commands_by_type'][command] += 1
-        
+        self.commands_by_type[command] += 1
         # 用戶活躍度
-        stats['active_users'][user] += 1
-        
+        self.active_users[user] += 1
         # 伺服器活躍度
-        stats['active_guilds'][guild] += 1
-        
+        self.active_guilds[guild] += 1
         # 頻道使用統計
-        stats['channel_usage'][channel] += 1
-        
+        self.channel_usage[channel] += 1
         # 每小時使用統計 (使用台灣時間)
-        stats['hourly_usage'][tw_time.hour] += 1
-        
+        self.hourly_usage[tw_hour(timestamp)] += 1
         # 用戶命令偏好
-        if command not in stats['users_by_command']:
-            stats['users_by_command'][command] = Counter()
-        stats['users_by_command'][command][user] += 1
-        
+        self.users_by_command.setdefault(command, Counter())[user] += 1
         # 伺服器命令偏好
-        if command not in stats['guilds_by_command']:
-            stats['guilds_by_command'][command] = Counter()
-        stats['guilds_by_command'][command][guild] += 1
-        
-        # 添加球隊統計
+        self.guilds_by_command.setdefault(command, Counter())[guild] += 1
+
+        # 球隊統計與用戶最愛球隊
         content = item.get('content')
         team = get_team_from_command(content)
         if team:
-            stats['team_queries'][team] += 1
+            self.team_queries[team] += 1
+            self.user_team_prefs.setdefault(user, Counter())[team] += 1
+
+        # 最近的命令記錄（只保留顯示需要的欄位）
+        if self.recent_limit:
+            self._seq += 1
+            record = (timestamp, self._seq, {
+                'timestamp': timestamp,
+                'command': command,
+                'user': user,
+                'guild': guild,
+                'channel': item.get('channel', 'N/A'),
+                'content': item.get('content', 'N/A'),
+            })
+            if len(self._recent) < self.recent_limit:
+                heapq.heappush(self._recent, record)
+            elif record > self._recent[0]:
+                heapq.heapreplace(self._recent, record)
+
+    def consume(self, pages):
+        """消耗分頁產生器（每頁為一串日誌），處理完即丟棄"""
+        for page in pages:
+            for item in page:
+                self.add(item)
+        return self
+
+    def recent(self):
+        """最近的命令記錄（新到舊）"""
+        return [record for _, _, record in sorted(self._recent, reverse=True)]
+
+    def favorite_teams(self):
+        """每個用戶最常查詢的球隊"""
+        rows = []
+        for user, team_counts in self.user_team_prefs.items():
+            favorite_team, count = team_counts.most_common(1)[0]
+            rows.append([user, favorite_team, count])
+        return rows
+
+
+def report_sections(stats):
+    """產生 (標題, 表格) 段落，供主控台與檔案輸出共用"""
+    sections = [
+        ("命令使用排行:", tabulate(
+            [[cmd, count] for cmd, count in stats.commands_by_type.most_common()],
+            headers=['命令', '次數'], tablefmt='grid')),
+        ("最活躍用戶:", tabulate(
+            [[user, count] for user, count in stats.active_users.most_common(5)],
+            headers=['用戶', '命令次數'], tablefmt='grid')),
+        ("最活躍伺服器:", tabulate(
+            [[guild, count] for guild, count in stats.active_guilds.most_common(5)],
+            headers=['伺服器', '命令次數'], tablefmt='grid')),
+        ("頻道使用統計:", tabulate(
+            [[channel, count] for channel, count in stats.channel_usage.most_common()],
+            headers=['頻道', '次數'], tablefmt='grid')),
+        ("每小時使用統計 (台灣時間):", tabulate(
+            [[f"{hour:02d}:00", stats.hourly_usage[hour]] for hour in range(24)],
+            headers=['時段', '次數'], tablefmt='grid')),
+    ]
+    if stats.team_queries:
+        sections.append(("最常查詢的球隊:", tabulate(
+            [[team, count] for team, count in stats.team_queries.most_common()],
+            headers=['球隊', '查詢次數'], tablefmt='grid')))
+        sections.append(("用戶最愛查詢的球隊:", tabulate(
+            stats.favorite_teams(), headers=['用戶', '最愛球隊', '查詢次數'], tablefmt='grid')))
+    return sections
+
+def format_log(record):
+    return "\n".join([
+        f"時間: {convert_to_tw_time(record['timestamp'])} (台灣時間)",
+        f"命令: {record['command']}",
+        f"用戶: {record['user']}",
+        f"伺服器: {record['guild']}",
+        f"頻道: {record['channel']}",
+        f"完整命令: {record['content']}",
+        "-" * 50,
+    ])
 
-    # 輸出統計結果
+def print_logs(stats):
+    for record in stats.recent():
+        print("\n" + format_log(record))
+
+def print_detailed_stats(stats):
     print("\n=== 詳細統計資料 ===")
-    print(f"\n總命令使用次數: {stats['total_commands']}")
-    
-    print("\n命令使用排行:")
-    command_table = [[cmd, count] for cmd, count in stats['commands_by_type'].most_common()]
-    print(tabulate(command_table, headers=['命令', '次數'], tablefmt='grid'))
-    
-    print("\n最活躍用戶:")
-    user_table = [[user, count] for user, count in stats['active_users'].most_common(5)]
-    print(tabulate(user_table, headers=['用戶', '命令次數'], tablefmt='grid'))
-    
-    print("\n最活躍伺服器:")
-    guild_table = [[guild, count] for guild, count in stats['active_guilds'].most_common(5)]
-    print(tabulate(guild_table, headers=['伺服器', '命令次數'], tablefmt='grid'))
-    
-    print("\n頻道使用統計:")
-    channel_table = [[channel, count] for channel, count in stats['channel_usage'].most_common()]
-    print(tabulate(channel_table, headers=['頻道', '次數'], tablefmt='grid'))
-    
-    print("\n每小時使用統計 (台灣時間):")
-    hours = range(24)
-    hour_table = [[f"{hour:02d}:00", stats['hourly_usage'][hour]] for hour in hours]
-    print(tabulate(hour_table, headers=['時段', '次數'], tablefmt='grid'))
-    
-    # 添加球隊統計輸出
-    if stats['team_queries']:
-        print("\n最常查詢的球隊:")
-        team_table = [[team, count] for team, count in stats['team_queries'].most_common()]
-        print(tabulate(team_table, headers=['球隊', '查詢次數'], tablefmt='grid'))
-        
-        # 計算每個用戶最常查詢的球隊
-        user_team_prefs = {}
-        for item in items:
-            user = item['user']
-            team = get_team_from_command(item.get('content'))
-            if team:
-                if user not in user_team_prefs:
-                    user_team_prefs[user] = Counter()
-                user_team_prefs[user][team] += 1
-        
-        print("\n用戶最愛查詢的球隊:")
-        user_team_table = []
-        for user, team_counts in user_team_prefs.items():
-            if team_counts:
-                favorite_team, count = team_counts.most_common(1)[0]
-                user_team_table.append([user, favorite_team, count])
-        print(tabulate(user_team_table, headers=['用戶', '最愛球隊', '查詢次數'], tablefmt='grid'))
-
-    return stats
-
-def save_stats_to_file(stats, items):
+    print(f"\n總命令使用次數: {stats.total_commands}")
+    for title, table_text in report_sections(stats):
+        print("\n" + title)
+        print(table_text)
+
+def save_stats_to_file(stats):
     """將統計結果保存到文件"""
     current_time = datetime.now(tw_tz).strftime('%Y%m%d_%H%M%S')
     filename = f'bot_stats_{current_time}.txt'
-    
+
     with open(filename, 'w', encoding='utf-8') as f:
         f.write("=== MLB Bot 使用統計報告 ===\n")
         f.write(f"生成時間: {datetime.now(tw_tz).strftime('%Y-%m-%d %H:%M:%S')} (台灣時間)\n\n")
-        
+
         # 基本統計
-        f.write(f"總命令使用次數: {stats['total_commands']}\n\n")
-        
-        # 命令使用排行
-        f.write("命令使用排行:\n")
-        command_table = [[cmd, count] for cmd, count in stats['commands_by_type'].most_common()]
-        f.write(tabulate(command_table, headers=['命令', '次數'], tablefmt='grid'))
-        f.write("\n\n")
-        
-        # 最活躍用戶
-        f.write("最活躍用戶:\n")
-        user_table = [[user, count] for user, count in stats['active_users'].most_common(5)]
-        f.write(tabulate(user_table, headers=['用戶', '命令次數'], tablefmt='grid'))
-        f.write("\n\n")
-        
-        # 頻道使用統計
-        f.write("頻道使用統計:\n")
-        channel_table = [[channel, count] for channel, count in stats['channel_usage'].most_common()]
-        f.write(tabulate(channel_table, headers=['頻道', '次數'], tablefmt='grid'))
-        f.write("\n\n")
-        
-        # 每小時使用統計
-        f.write("每小時使用統計 (台灣時間):\n")
-        hours = range(24)
-        hour_table = [[f"{hour:02d}:00", stats['hourly_usage'][hour]] for hour in hours]
-        f.write(tabulate(hour_table, headers=['時段', '次數'], tablefmt='grid'))
-        f.write("\n\n")
-        
-        # 球隊統計
-        if stats['team_queries']:
-            f.write("最常查詢的球隊:\n")
-            team_table = [[team, count] for team, count in stats['team_queries'].most_common()]
-            f.write(tabulate(team_table, headers=['球隊', '查詢次數'], tablefmt='grid'))
-            f.write("\n\n")
-            
-            # 用戶最愛球隊
-            user_team_prefs = {}
-            for item in items:
-                user = item['user']
-                team = get_team_from_command(item.get('content'))
-                if team:
-                    if user not in user_team_prefs:
-                        user_team_prefs[user] = Counter()
-                    user_team_prefs[user][team] += 1
-            
-            f.write("用戶最愛查詢的球隊:\n")
-            user_team_table = []
-            for user, team_counts in user_team_prefs.items():
-                if team_counts:
-                    favorite_team, count = team_counts.most_common(1)[0]
-                    user_team_table.append([user, favorite_team, count])
-            f.write(tabulate(user_team_table, headers=['用戶', '最愛球隊', '查詢次數'], tablefmt='grid'))
+        f.write(f"總命令使用次數: {stats.total_commands}\n\n")
+
+        for title, table_text in report_sections(stats):
+            f.write(title + "\n")
+            f.write(table_text)
             f.write("\n\n")
-        
+
         # 最近的命令記錄
-        f.write("=== 最近的命令記錄 ===\n")
-        for item in sorted(items, key=lambda x: x['timestamp'], reverse=True):
-            f.write(f"\n時間: {convert_to_tw_time(item['timestamp'])} (台灣時間)\n")
-            f.write(f"命令: {item['command']}\n")
-            f.write(f"用戶: {item['user']}\n")
-            f.write(f"伺服器: {item['guild']}\n")
-            f.write(f"頻道: {item.get('channel', 'N/A')}\n")
-            f.write(f"完整命令: {item.get('content', 'N/A')}\n")
-            f.write("-" * 50 + "\n")
-    
+        f.write(f"=== 最近的命令記錄（最多 {stats.recent_limit} 筆） ===\n")
+        for record in stats.recent():
+            f.write("\n" + format_log(record) + "\n")
+
     print(f"\n統計報告已保存到文件: {filename}")
 
-# 獲取最近24小時的日誌
-now = datetime.now(tw_tz)
-response = table.scan(
-    FilterExpression='#ts >= :start_time',
-    ExpressionAttributeNames={
-        '#ts': 'timestamp'
-    },
-    ExpressionAttributeValues={
-        ':start_time': str(now - timedelta(hours=24))
-    }
-)
-
-print("=== 最近的命令記錄 ===")
-print_logs(response['Items'])
-stats = print_detailed_stats(response['Items'])
-save_stats_to_file(stats, response['Items'])
+
+def main():
+    parser = argparse.ArgumentParser(description='MLB Bot 使用統計報告')
+    parser.add_argument('--hours', type=float, default=24, help='統計最近幾小時（預設 24）')
+    parser.add_argument('--recent', type=int, default=RECENT_LIMIT, help='列出最近幾筆命令記錄')
+    args = parser.parse_args()
+
+    # 透過時間索引分頁查詢，邊讀取邊彙總，不保留原始日誌
+    now = datetime.now(timezone.utc)
+    stats = LogStats(recent_limit=args.recent)
+    stats.consume(query_window(table, now - timedelta(hours=args.hours), now))
+
+    print("=== 最近的命令記錄 ===")
+    print_logs(stats)
+    print_detailed_stats(stats)
+    save_stats_to_file(stats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import threading
+from collections import OrderedDict
+
+# Discord 單則訊息的字數上限
+MESSAGE_LIMIT = 2000
+# 渲染結果最多記住幾個項目
+RENDER_CACHE_ENTRIES = 2048
+
+_FENCE = '```'
+
+
+def text_lines(lines):
+    """以 join 組合多行文字（每行結尾換行，與逐行 += 的結果相同）"""
+    return ''.join(f"{line}\n" for line in lines)
+
+
+def _split_block(block, limit):
+    """單一段落超過上限時依行切開；切點落在 ``` 程式碼區塊內時補上結尾並在下一段重新開啟"""
+    room = limit - len(_FENCE) - 1
+    pieces = []
+    while len(block) > limit:
+        cut = block.rfind('\n', 0, room) + 1 or room
+        piece, block = block[:cut].rstrip('\n'), block[cut:]
+        if piece.count(_FENCE) % 2:
+            piece += '\n' + _FENCE
+            block = _FENCE + '\n' + block
+        pieces.append(piece)
+    pieces.append(block)
+    return pieces
+
+
+def message_chunks(text, limit=MESSAGE_LIMIT):
+    """將長訊息依段落（空行）合併為不超過 Discord 上限的多則訊息，過長的段落再依行切開"""
+    chunks = []
+    current = ''
+    for block in text.split('\n\n'):
+        for piece in _split_block(block, limit):
+            if current and len(current) + 2 + len(piece) > limit:
+                chunks.append(current)
+                current = ''
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class RenderCache:
+    """依快取項目記住渲染後的文字：來源資料仍是快取中的同一份時直接回傳，不重新格式化
+
+    來源（賽程分區、球隊比賽清單、排行榜資料表等）刷新時會換成新的物件，比對不符即重新渲染
+    """
+
+    def __init__(self, max_entries=RENDER_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (source, text)
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, key, source, render):
+        """source 與上次相同（同一物件，或內容為相同物件的 tuple / list）時回傳上次的結果，否則呼叫 render()"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is source or entry[0] == source):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        text = render()
+        with self._lock:
+            self._entries[key] = (source, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return text
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+# Crawling 共用的渲染結果快取
+render_cache = RenderCache()
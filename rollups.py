@@ -0,0 +1,191 @@
+import threading
+from collections import Counter
+from datetime import timedelta, timezone
+
+ROLLUP_TABLE = 'mlb_bot_rollups'
+# 本地累積多久寫入一次（秒）
+ROLLUP_FLUSH_INTERVAL = 60
+# BatchGetItem 每次最多 100 個鍵
+_BATCH_GET_LIMIT = 100
+_MAX_COMMAND_NAME = 64
+
+
+def hour_bucket(timestamp):
+    """'2024-05-01 13:10:00.1' -> 'H#2024-05-01T13'"""
+    return f"H#{timestamp[:10]}T{timestamp[11:13]}"
+
+
+def day_bucket(timestamp):
+    """'2024-05-01 13:10:00.1' -> 'D#2024-05-01'"""
+    return f"D#{timestamp[:10]}"
+
+
+def bucket_keys(start, end):
+    """以最少的桶涵蓋 [start, end]：整天用日桶，頭尾不足一天的部分用小時桶"""
+    start = start.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0, tzinfo=None)
+    end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    keys = []
+    current = start
+    while current <= end:
+        if current.hour == 0 and current + timedelta(days=1) <= end:
+            keys.append(f"D#{current:%Y-%m-%d}")
+            current += timedelta(days=1)
+        else:
+            keys.append(f"H#{current:%Y-%m-%dT%H}")
+            current += timedelta(hours=1)
+    return keys
+
+
+def hour_keys(start, end):
+    """[start, end] 涵蓋的所有小時桶（不重複用戶 / 伺服器只保存在小時桶）"""
+    current = start.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0, tzinfo=None)
+    end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    keys = []
+    while current <= end:
+        keys.append(f"H#{current:%Y-%m-%dT%H}")
+        current += timedelta(hours=1)
+    return keys
+
+
+def _command_attr(command):
+    name = ''.join(ch if ch.isalnum() or ch == '_' else '_' for ch in str(command))
+    return 'cmd_' + (name[:_MAX_COMMAND_NAME] or 'unknown')
+
+
+class _Bucket:
+    __slots__ = ('total', 'commands', 'users', 'guilds')
+
+    def __init__(self):
+        self.total = 0
+        self.commands = Counter()
+        self.users = set()
+        self.guilds = set()
+
+    def merge(self, other):
+        self.total += other.total
+        self.commands.update(other.commands)
+        self.users |= other.users
+        self.guilds |= other.guilds
+
+
+class RollupStore:
+    """在記錄日誌時增量累積每小時/每日使用量，定期以原子 ADD 寫入 DynamoDB
+
+    日桶只保存計數；不重複用戶 / 伺服器的集合只保存在小時桶，避免熱門日子的日桶超過 DynamoDB 400 KB 的項目上限
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def add(self, record):
+        """累積一筆已寫入的指令日誌"""
+        timestamp = record['timestamp']
+        with self._lock:
+            for key in (hour_bucket(timestamp), day_bucket(timestamp)):
+                bucket = self._pending.get(key)
+                if bucket is None:
+                    bucket = self._pending[key] = _Bucket()
+                bucket.total += 1
+                bucket.commands[record.get('command') or 'unknown'] += 1
+            hour = self._pending[hour_bucket(timestamp)]
+            if record.get('user'):
+                hour.users.add(str(record['user']))
+            if record.get('guild'):
+                hour.guilds.add(str(record['guild']))
+
+    def flush(self):
+        """將累積的計數以 ADD 寫入（同步函式，請在執行緒池中呼叫）；寫入失敗的桶放回待寫入，下次重試"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        failed = {}
+        for key, bucket in pending.items():
+            names = {}
+            values = {':total': bucket.total}
+            parts = ['#total :total']
+            names['#total'] = 'total'
+            for i, (command, count) in enumerate(bucket.commands.items()):
+                names[f'#c{i}'] = _command_attr(command)
+                values[f':c{i}'] = count
+                parts.append(f'#c{i} :c{i}')
+            # DynamoDB 不接受空集合
+            if bucket.users:
+                names['#users'] = 'users'
+                values[':users'] = bucket.users
+                parts.append('#users :users')
+            if bucket.guilds:
+                names['#guilds'] = 'guilds'
+                values[':guilds'] = bucket.guilds
+                parts.append('#guilds :guilds')
+            try:
+                self.table.update_item(
+                    Key={'bucket': key},
+                    UpdateExpression='ADD ' + ', '.join(parts),
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues=values,
+                )
+            except Exception as e:
+                failed[key] = bucket
+                print(f"使用量彙總寫入錯誤 {key}: {str(e)}")
+        if failed:
+            self._restore(failed)
+
+    def _restore(self, failed):
+        # 與 flush 期間新累積的計數合併
+        with self._lock:
+            for key, bucket in failed.items():
+                current = self._pending.get(key)
+                if current is not None:
+                    bucket.merge(current)
+                self._pending[key] = bucket
+
+    def usage(self, start, end):
+        """加總時間範圍內的使用量：計數讀取少數彙總項目，不重複用戶 / 伺服器由範圍內的小時桶合併"""
+        stats = {
+            'total_commands': 0,
+            'commands_by_type': {},
+            'active_users': set(),
+            'active_guilds': set()
+        }
+        count_keys = set(bucket_keys(start, end))
+        distinct_keys = set(hour_keys(start, end))
+        for item in self._get_buckets(sorted(count_keys | distinct_keys)):
+            if item['bucket'] in count_keys:
+                stats['total_commands'] += int(item.get('total', 0))
+                for attr, value in item.items():
+                    if attr.startswith('cmd_'):
+                        command = attr[4:]
+                        stats['commands_by_type'][command] = stats['commands_by_type'].get(command, 0) + int(value)
+            if item['bucket'] in distinct_keys:
+                stats['active_users'].update(item.get('users', ()))
+                stats['active_guilds'].update(item.get('guilds', ()))
+        return stats
+
+    def _get_buckets(self, keys):
+        # resource 的 client 會自動轉換 DynamoDB 型別
+        client = self.table.meta.client
+        name = self.table.name
+        for i in range(0, len(keys), _BATCH_GET_LIMIT):
+            request = {name: {'Keys': [{'bucket': key} for key in keys[i:i + _BATCH_GET_LIMIT]]}}
+            while request:
+                response = client.batch_get_item(RequestItems=request)
+                for item in response['Responses'].get(name, []):
+                    yield item
+                request = response.get('UnprocessedKeys') or None
+
+
+def ensure_rollup_table(client, table_name=ROLLUP_TABLE):
+    """若彙總表不存在則建立"""
+    try:
+        client.describe_table(TableName=table_name)
+        return False
+    except client.exceptions.ResourceNotFoundException:
+        pass
+    client.create_table(
+        TableName=table_name,
+        KeySchema=[{'AttributeName': 'bucket', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'bucket', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    return True
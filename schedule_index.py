@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+
+from cache import TTLCache, shared_get, shared_set
+import http_client
+from models import MODEL_VERSION, Game, is_final
+
+SCHEDULE_URL = "https://statsapi.mlb.com/api/v1/schedule"
+SCHEDULE_FIELDS = (
+    "dates,date,games,gamePk,gameDate,status,abstractGameState,statusCode,"
+    "teams,away,home,team,id,name,score"
+)
+
+# 各日期分區的快取秒數（None 表示不過期）
+LIVE_SCHEDULE_TTL = 60
+TODAY_SCHEDULE_TTL = 5 * 60
+FUTURE_SCHEDULE_TTL = 15 * 60
+UNSETTLED_SCHEDULE_TTL = 60 * 60
+
+# 單次查詢最多幾天
+MAX_RANGE_DAYS = 31
+# 單次批次請求最多涵蓋幾天
+FETCH_CHUNK_DAYS = 31
+
+DATE_FORMAT = "%Y-%m-%d"
+# 本地分區的記憶體上限（LRU 淘汰；被淘汰的日期可再由共用快取 / 磁碟快取載入）
+SCHEDULE_MAX_BYTES = 16 * 1024 * 1024
+
+_MISSING = object()
+
+
+def partition_ttl(date, games, today=None):
+    """依日期與比賽狀態決定分區的快取時間：已完賽的過去日期永不過期"""
+    today = today or datetime.now().strftime(DATE_FORMAT)
+    if date > today:
+        return FUTURE_SCHEDULE_TTL
+    if date < today:
+        return None if all(is_final(game) for game in games) else UNSETTLED_SCHEDULE_TTL
+    if any(game.state == 'Live' for game in games):
+        return LIVE_SCHEDULE_TTL
+    return TODAY_SCHEDULE_TTL
+
+
+def parse_date_range(text=None, today=None):
+    """解析日期範圍，回傳 (start, end) 字串
+
+    支援：today/今天、yesterday/昨天、tomorrow/明天、this week/本週、last week/上週、
+    next week/下週、this month/本月、YYYY-MM-DD、YYYY-MM-DD..YYYY-MM-DD
+    """
+    today = datetime.strptime(today, DATE_FORMAT) if today else datetime.now()
+    today = today.replace(hour=0, minute=0, second=0, microsecond=0)
+    key = ' '.join((text or 'today').lower().split())
+    monday = today - timedelta(days=today.weekday())
+    named = {
+        'today': (today, today),
+        '今天': (today, today),
+        'yesterday': (today - timedelta(days=1),) * 2,
+        '昨天': (today - timedelta(days=1),) * 2,
+        'tomorrow': (today + timedelta(days=1),) * 2,
+        '明天': (today + timedelta(days=1),) * 2,
+        'this week': (monday, monday + timedelta(days=6)),
+        '本週': (monday, monday + timedelta(days=6)),
+        'last week': (monday - timedelta(days=7), monday - timedelta(days=1)),
+        '上週': (monday - timedelta(days=7), monday - timedelta(days=1)),
+        'next week': (monday + timedelta(days=7), monday + timedelta(days=13)),
+        '下週': (monday + timedelta(days=7), monday + timedelta(days=13)),
+    }
+    if key in ('this month', '本月'):
+        first = today.replace(day=1)
+        next_month = (first + timedelta(days=32)).replace(day=1)
+        start, end = first, next_month - timedelta(days=1)
+    elif key in named:
+        start, end = named[key]
+    else:
+        parts = key.split('..') if '..' in key else [key, key]
+        try:
+            start, end = (datetime.strptime(part.strip(), DATE_FORMAT) for part in parts)
+        except ValueError:
+            raise ValueError(f"無法解析日期範圍：{text}（格式為 YYYY-MM-DD 或 YYYY-MM-DD..YYYY-MM-DD）") from None
+    if end < start:
+        start, end = end, start
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise ValueError(f"日期範圍最多 {MAX_RANGE_DAYS} 天")
+    return start.strftime(DATE_FORMAT), end.strftime(DATE_FORMAT)
+
+
+def _dates(start, end):
+    day = datetime.strptime(start, DATE_FORMAT)
+    last = datetime.strptime(end, DATE_FORMAT)
+    while day <= last:
+        yield day.strftime(DATE_FORMAT)
+        day += timedelta(days=1)
+
+
+def _runs(dates):
+    """將排序後的日期合併為連續區段（每段最多 FETCH_CHUNK_DAYS 天），每段只需一次批次請求"""
+    runs = []
+    for date in dates:
+        day = datetime.strptime(date, DATE_FORMAT)
+        if runs:
+            start, end = runs[-1]
+            if (day - end).days == 1 and (day - start).days < FETCH_CHUNK_DAYS:
+                runs[-1] = (start, day)
+                continue
+        runs.append((day, day))
+    return [(start.strftime(DATE_FORMAT), end.strftime(DATE_FORMAT)) for start, end in runs]
+
+
+class ScheduleIndex:
+    """依日期分區的全聯盟賽程索引：缺少的日期以少數 startDate/endDate 批次請求補齊，跨球隊與用戶共用
+
+    設定 backend（多程序共用快取）時，各程序先讀取其他程序已抓取的分區再向上游請求；
+    本地分區以 TTLCache 保存（有記憶體上限），已完賽的過去日期不過期但仍會被 LRU 淘汰
+    """
+
+    def __init__(self, fetch=http_client.get_json, backend=None, max_bytes=SCHEDULE_MAX_BYTES):
+        self._fetch = fetch
+        self.backend = backend
+        self._partitions = TTLCache(max_bytes)  # date -> games
+
+    def _fill(self, start, end):
+        """向上游抓取日期範圍，回傳 date -> games"""
+        data = self._fetch(SCHEDULE_URL, params={
+            'sportId': 1,
+            'startDate': start,
+            'endDate': end,
+            'fields': SCHEDULE_FIELDS,
+        })
+        by_date = {date: [] for date in _dates(start, end)}
+        for entry in data.get('dates', []):
+            by_date[entry['date']] = [Game.from_api(game, entry['date']) for game in entry['games']]
+        today = datetime.now().strftime(DATE_FORMAT)
+        for date, games in by_date.items():
+            ttl = partition_ttl(date, games, today)
+            self._partitions.set(date, games, ttl)
+            if self.backend is not None:
+                shared_set(self.backend, ('schedule', date, MODEL_VERSION), games, ttl)
+        return by_date
+
+    def _load_shared(self, dates, found):
+        """由共用快取載入分區（加入 found），回傳仍然缺少的日期"""
+        if self.backend is None:
+            return dates
+        missing = []
+        for date in dates:
+            shared = shared_get(self.backend, ('schedule', date, MODEL_VERSION))
+            if shared is None:
+                missing.append(date)
+                continue
+            games, ttl = shared
+            self._partitions.set(date, games, ttl)
+            found[date] = games
+        return missing
+
+    def refresh(self, start=None, end=None):
+        """強制重新抓取日期範圍（預設今天），回傳範圍內的比賽清單，供背景預先載入使用"""
+        start = start or datetime.now().strftime(DATE_FORMAT)
+        end = end or start
+        by_date = self._fill(start, end)
+        return [game for date in _dates(start, end) for game in by_date[date]]
+
+    def games_between(self, start, end):
+        """回傳日期範圍內的所有比賽（依日期排序的 date -> games dict），只補抓缺少或過期的日期"""
+        dates = list(_dates(start, end))
+        found = {}
+        missing = []
+        for date in dates:
+            games = self._partitions.get(date, _MISSING)
+            if games is _MISSING:
+                missing.append(date)
+            else:
+                found[date] = games
+        for run_start, run_end in _runs(self._load_shared(missing, found)):
+            found.update(self._fill(run_start, run_end))
+        return {date: found[date] for date in dates if date in found}
+
+    def is_cached(self, start, end):
+        """日期範圍是否都已在本地或共用快取中且未過期（不發出上游請求；共用快取中的分區一併載入本地）"""
+        missing = [date for date in _dates(start, end) if not self._partitions.contains(date)]
+        return not missing or not self._load_shared(missing, {})
+
+    def stats(self):
+        """本地分區的快取統計"""
+        return self._partitions.stats()
+
+    def games_on(self, date=None):
+        """單日比賽（預設今天）"""
+        date = date or datetime.now().strftime(DATE_FORMAT)
+        return self.games_between(date, date).get(date, [])
+
+
+schedule_index = ScheduleIndex()
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+import http_client
+from cache import request_key, response_cache
+
+SEASON_URL = "https://statsapi.mlb.com/api/v1/seasons/{year}?sportId=1"
+SEASON_TTL = 12 * 60 * 60
+
+
+def _fetch_season(year):
+    url = SEASON_URL.format(year=year)
+    data = response_cache.get_or_load(
+        request_key(url), lambda: http_client.get_json(url), SEASON_TTL)
+    seasons = data.get('seasons') or []
+    return seasons[0] if seasons else None
+
+
+def current_season(today=None):
+    """自動判斷目前球季：開幕日之前視為上一個球季
+
+    回傳 statsapi 的球季資料（含 seasonId、regularSeasonStartDate、regularSeasonEndDate）
+    """
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    year = int(today[:4])
+    season = _fetch_season(year)
+    if season is None or today < season['regularSeasonStartDate']:
+        season = _fetch_season(year - 1)
+    if season is None:
+        raise LookupError(f"找不到 {year} 球季資料")
+    return season
+
+
+def current_season_year(today=None):
+    """目前球季年份"""
+    return int(current_season(today)['seasonId'])
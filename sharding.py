@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import http_client
+from cache_backends import backend_env, serve_backend
+
+# 啟動器以環境變數告知各工作程序負責的分片
+SHARD_IDS_ENV = 'MLB_SHARD_IDS'
+SHARD_COUNT_ENV = 'MLB_SHARD_COUNT'
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Discord.py')
+# Discord 限制每 5 秒只能 identify 一個分片，依前一個程序的分片數錯開啟動
+IDENTIFY_INTERVAL = 5
+# 工作程序異常結束後等待多久重新啟動
+RESTART_DELAY = 10
+
+
+def shard_ranges(shard_count, processes):
+    """將 0..shard_count-1 切成 processes 段連續區間（前面的區間多分配餘數）"""
+    processes = max(1, min(processes, shard_count))
+    base, extra = divmod(shard_count, processes)
+    ranges = []
+    start = 0
+    for index in range(processes):
+        size = base + (1 if index < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+def recommended_shard_count(token):
+    """向 Discord 查詢建議的分片數"""
+    response = http_client.session.get(
+        GATEWAY_URL, headers={'Authorization': f'Bot {token}'}, timeout=http_client.DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    return response.json()['shards']
+
+
+def shard_config(config, environ=None):
+    """回傳 (是否分片, Bot 的分片參數)
+
+    由啟動器啟動時使用環境變數指定的分片；單獨執行時 config.json 的 "sharded": true
+    會啟用 AutoShardedBot（可再以 "shard_count" 指定分片數）
+    """
+    environ = os.environ if environ is None else environ
+    if environ.get(SHARD_IDS_ENV):
+        shard_ids = [int(shard_id) for shard_id in environ[SHARD_IDS_ENV].split(',')]
+        return True, {'shard_ids': shard_ids, 'shard_count': int(environ[SHARD_COUNT_ENV])}
+    if config.get('sharded'):
+        shard_count = config.get('shard_count')
+        return True, {'shard_count': int(shard_count)} if shard_count else {}
+    return False, {}
+
+
+class Launcher:
+    """多程序分片啟動器：每個工作程序以 AutoShardedBot 負責一段分片，並共用同一個快取伺服器"""
+
+    def __init__(self, shard_count, processes, command=None, env=None):
+        self.shard_count = shard_count
+        self.plan = shard_ranges(shard_count, processes)
+        self.command = command or [sys.executable, WORKER_SCRIPT]
+        self.env = dict(os.environ if env is None else env)
+        self.workers = [None] * len(self.plan)
+        self._manager = None
+        self._stopping = False
+
+    def worker_env(self, shard_ids):
+        env = dict(self.env)
+        env[SHARD_IDS_ENV] = ','.join(str(shard_id) for shard_id in shard_ids)
+        env[SHARD_COUNT_ENV] = str(self.shard_count)
+        return env
+
+    def start_worker(self, index):
+        shard_ids = self.plan[index]
+        print(f"啟動工作程序 {index}：分片 {shard_ids[0]}-{shard_ids[-1]} / {self.shard_count}")
+        self.workers[index] = subprocess.Popen(self.command, env=self.worker_env(shard_ids))
+
+    def start(self):
+        self._manager, address, authkey = serve_backend()
+        self.env.update(backend_env(address, authkey))
+        for index, shard_ids in enumerate(self.plan):
+            if index:
+                time.sleep(IDENTIFY_INTERVAL * len(self.plan[index - 1]))
+            if self._stopping:
+                return
+            self.start_worker(index)
+
+    def stop(self, *_):
+        self._stopping = True
+        for worker in self.workers:
+            if worker is not None and worker.poll() is None:
+                worker.terminate()
+
+    def run(self):
+        """啟動所有工作程序並監看，異常結束的程序延遲後重新啟動"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        restart_at = {}
+        try:
+            self.start()
+            while not self._stopping:
+                for index, worker in enumerate(self.workers):
+                    if worker is None or worker.poll() is None:
+                        continue
+                    if worker.returncode == 0:
+                        # 正常結束（例如 Token 無效）不重新啟動
+                        continue
+                    restart_at.setdefault(index, time.monotonic() + RESTART_DELAY)
+                    if time.monotonic() >= restart_at[index]:
+                        print(f"工作程序 {index} 結束（代碼 {worker.returncode}），重新啟動")
+                        del restart_at[index]
+                        self.start_worker(index)
+                if all(worker is not None and worker.returncode == 0 for worker in self.workers):
+                    break
+                time.sleep(1)
+        finally:
+            self.stop()
+            for worker in self.workers:
+                if worker is not None:
+                    try:
+                        worker.wait(timeout=30)
+                    except subprocess.TimeoutExpired:
+                        worker.kill()
+            if self._manager is not None:
+                self._manager.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='以多個程序執行分片的 Discord 機器人')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='工作程序數（預設為 CPU 核心數）')
+    parser.add_argument('--shards', type=int, default=None, help='總分片數（預設向 Discord 查詢建議值）')
+    parser.add_argument('--dry-run', action='store_true', help='只顯示分片分配，不啟動')
+    args = parser.parse_args(argv)
+
+    shard_count = args.shards
+    if shard_count is None:
+        with open('config.json') as f:
+            shard_count = recommended_shard_count(json.load(f)['token'])
+    launcher = Launcher(shard_count, args.processes)
+    if args.dry_run:
+        for index, shard_ids in enumerate(launcher.plan):
+            print(f"工作程序 {index}：分片 {shard_ids}")
+        return
+    launcher.run()
+
+
+if __name__ == '__main__':
+    # 用法：python sharding.py --processes 4 [--shards 16]
+    main()
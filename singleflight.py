@@ -0,0 +1,36 @@
+import asyncio
+
+
+class SingleFlight:
+    """合併相同鍵的並行請求：同一時間只有一個上游呼叫，其餘等待並共用結果"""
+
+    def __init__(self):
+        self._inflight = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key, factory):
+        """factory 為回傳 awaitable 的函式，只會在沒有進行中的相同請求時呼叫"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        # shield：單一呼叫者被取消時不影響其他等待者
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # 所有等待者都已取消時避免出現 "exception was never retrieved"
+            task.exception()
+
+    def stats(self):
+        return {'calls': self.calls, 'shared': self.shared, 'inflight': len(self._inflight)}
+
+
+flights = SingleFlight()
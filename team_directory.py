@@ -0,0 +1,206 @@
+import threading
+import time
+import unicodedata
+
+from cache import shared_get, shared_set
+import http_client
+from metrics import metrics
+from models import MODEL_VERSION, Team
+
+TEAMS_URL = "https://statsapi.mlb.com/api/v1/teams?sportId=1"
+
+# 球隊列表很少變動，預設六小時刷新一次
+TEAM_TTL = 6 * 60 * 60
+# 快取層（共用快取 / 磁碟快取）中的鍵
+TEAMS_KEY = ('teams', MODEL_VERSION)
+
+# 常見別名 -> 官方代號（多個代號表示依序嘗試，用於球隊改名或搬遷）
+TEAM_ALIASES = {
+    'YANKS': ('NYY',),
+    'BOSOX': ('BOS',),
+    'CHISOX': ('CWS',),
+    'CHW': ('CWS',),
+    'DBACKS': ('AZ', 'ARI'),
+    'ARI': ('AZ',),
+    'AZ': ('ARI',),
+    'KCR': ('KC',),
+    'SDP': ('SD',),
+    'SFG': ('SF',),
+    'TBR': ('TB',),
+    'WSN': ('WSH',),
+    'WAS': ('WSH',),
+    'NATS': ('WSH',),
+    'ANA': ('LAA',),
+    'HALOS': ('LAA',),
+    'BUCS': ('PIT',),
+    'JAYS': ('TOR',),
+    'CARDS': ('STL',),
+    'OAK': ('ATH',),
+    'ATH': ('OAK',),
+}
+
+# 索引欄位優先順序：數字越小優先權越高，同優先權衝突時視為模稜兩可
+_KEY_FIELDS = (
+    (0, 'abbreviation'),
+    (0, 'id'),
+    (1, 'team_name'),
+    (1, 'name'),
+    (1, 'club_name'),
+    (1, 'short_name'),
+    (2, 'file_code'),
+    (2, 'team_code'),
+    (3, 'franchise_name'),
+    (3, 'location_name'),
+)
+_ALIAS_RANK = 4
+
+
+def normalize_key(text):
+    """將球隊查詢字串正規化（去除重音、空白與標點並轉為大寫）"""
+    text = unicodedata.normalize('NFKD', str(text))
+    return ''.join(ch for ch in text if ch.isalnum()).upper()
+
+
+def _fetch_teams():
+    return [Team.from_api(team) for team in http_client.get_json(TEAMS_URL)['teams']]
+
+
+class TeamDirectory:
+    """共用的球隊目錄：只載入一次球隊列表並依 TTL 刷新，提供 O(1) 查詢索引
+
+    設定 backend（共用快取 / 磁碟快取）時，啟動後第一次載入先讀取其他程序或上次執行保存的球隊列表
+    """
+
+    def __init__(self, ttl=TEAM_TTL, fetch=_fetch_teams, backend=None):
+        self.ttl = ttl
+        self.backend = backend
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._teams = []
+        self._by_id = {}
+        self._index = {}
+        self._ambiguous = {}
+        self._loaded_at = None
+
+    def _is_fresh(self):
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def _ensure_loaded(self):
+        if self._is_fresh():
+            return
+        with self._lock:
+            if self._is_fresh():
+                return
+            if not self._teams and self._load_saved():
+                return
+            try:
+                self._build(self._fetch())
+                self._save()
+            except Exception:
+                # 已有舊資料時繼續使用，避免 statsapi 暫時失效時所有指令一起失敗
+                if not self._teams:
+                    raise
+                self._loaded_at = time.monotonic()
+
+    def _build(self, teams):
+        teams = sorted(teams, key=lambda t: t.name)
+        by_id = {team.id: team for team in teams}
+        ranked = {}
+        ambiguous = {}  # key -> 同優先權衝突的球隊
+
+        def add(key, rank, team):
+            key = normalize_key(key)
+            if not key:
+                return
+            current = ranked.get(key)
+            if current is None or rank < current[0]:
+                ranked[key] = (rank, team)
+                ambiguous.pop(key, None)
+            elif rank == current[0] and current[1].id != team.id:
+                conflicts = ambiguous.setdefault(key, [current[1]])
+                if all(other.id != team.id for other in conflicts):
+                    conflicts.append(team)
+
+        for team in teams:
+            for rank, field in _KEY_FIELDS:
+                value = getattr(team, field)
+                if value:
+                    add(value, rank, team)
+
+        by_abbreviation = {normalize_key(team.abbreviation): team for team in teams}
+        for alias, targets in TEAM_ALIASES.items():
+            for target in targets:
+                if target in by_abbreviation:
+                    add(alias, _ALIAS_RANK, by_abbreviation[target])
+                    break
+
+        self._teams = teams
+        self._by_id = by_id
+        self._index = {key: team for key, (rank, team) in ranked.items() if key not in ambiguous}
+        self._ambiguous = ambiguous
+        self._loaded_at = time.monotonic()
+
+    def _load_saved(self):
+        found = shared_get(self.backend, TEAMS_KEY)
+        if found is None:
+            return False
+        teams, remaining = found
+        self._build(teams)
+        if remaining is not None:
+            # 依剩餘 TTL 決定下次刷新時間
+            self._loaded_at -= max(self.ttl - remaining, 0)
+        return True
+
+    def _save(self):
+        shared_set(self.backend, TEAMS_KEY, self._teams, self.ttl)
+
+    def refresh(self):
+        """強制重新載入球隊列表"""
+        with self._lock:
+            self._build(self._fetch())
+            self._save()
+
+    def teams(self):
+        """回傳所有大聯盟球隊（依隊名排序）"""
+        self._ensure_loaded()
+        return list(self._teams)
+
+    def get(self, team_id):
+        """依球隊 ID 取得球隊資料"""
+        self._ensure_loaded()
+        return self._by_id.get(int(team_id))
+
+    def resolve(self, query):
+        """將代號、ID、隊名、城市或別名解析為球隊資料，找不到或不唯一時回傳 None"""
+        if query is None:
+            return None
+        self._ensure_loaded()
+        return self._index.get(normalize_key(query))
+
+    def candidates(self, query):
+        """查詢字串對應多支球隊時（例如 New York）回傳這些球隊，否則回傳空列表"""
+        if query is None:
+            return []
+        self._ensure_loaded()
+        return list(self._ambiguous.get(normalize_key(query), ()))
+
+
+team_directory = TeamDirectory()
+
+
+def resolve_team(query):
+    """透過共用球隊目錄解析球隊"""
+    with metrics.stage('team_resolve'):
+        return team_directory.resolve(query)
+
+
+def team_not_found(query):
+    """找不到球隊時的回覆；查詢對應多支球隊時列出候選球隊代號"""
+    try:
+        candidates = team_directory.candidates(query)
+    except Exception:
+        candidates = []
+    if candidates:
+        listed = '、'.join(f"{team.name} ({team.abbreviation})" for team in candidates)
+        return f"「{query}」對應多支球隊：{listed}，請改用球隊代號"
+    return f"找不到球隊：{query}"
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+import admission as admission_module
+from admission import AdmissionController, RateLimited, TokenBucket, cheap_request
+
+
+def test_token_bucket_refill():
+    bucket = TokenBucket(rate=0.5, capacity=2, now=0)
+    assert bucket.retry_after(2, now=0) == 0
+    bucket.take(2)
+    assert bucket.retry_after(1, now=0) == 2.0
+    assert bucket.retry_after(1, now=1) == 1.0
+    assert bucket.retry_after(1, now=2) == 0
+    # 不超過容量
+    assert bucket.is_full(now=100) and bucket.tokens == 2
+
+
+def test_user_bucket_limits_and_cheap_commands_are_free(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission_module.time, 'monotonic', lambda: now[0])
+    controller = AdmissionController(user_rate=0.1, user_burst=5)
+    for _ in range(5):
+        controller.admit('u1', 'g1', 1)
+    with pytest.raises(RateLimited) as raised:
+        controller.admit('u1', 'g1', 1)
+    assert raised.value.scope == '用戶' and raised.value.retry_after == pytest.approx(10)
+
+    # 快取可回答的指令不消耗權杖；其他用戶不受影響
+    controller.admit('u1', 'g1', 0)
+    controller.admit('u2', 'g1', 1)
+    now[0] += 10
+    controller.admit('u1', 'g1', 1)
+    assert controller.stats() == {'admitted': 7, 'cheap': 1, 'rejected': {'user': 1, 'guild': 0, 'upstream': 0},
+                                  'users': 2, 'guilds': 1}
+
+
+def test_guild_bucket_rejects_without_charging_user(monkeypatch):
+    monkeypatch.setattr(admission_module.time, 'monotonic', lambda: 1000.0)
+    controller = AdmissionController(user_burst=5, guild_burst=3)
+    for user_id in range(3):
+        controller.admit(user_id, 'g1', 1)
+    with pytest.raises(RateLimited) as raised:
+        controller.admit('u9', 'g1', 1)
+    assert raised.value.scope == '伺服器'
+    # 兩個桶都足夠才扣除：被伺服器拒絕的用戶權杖不變
+    assert controller._users['u9'].tokens == 5
+    controller.admit('u9', None, 1)
+
+
+def test_upstream_limit_queues_then_rejects():
+    async def run():
+        controller = AdmissionController(upstream_limit=1, upstream_wait=0.05)
+        release = asyncio.Event()
+        cheap_request.set(False)
+
+        async def slow():
+            await release.wait()
+            return 'done'
+
+        first = asyncio.ensure_future(controller.upstream(slow))
+        await asyncio.sleep(0)
+        with pytest.raises(RateLimited) as raised:
+            await controller.upstream(slow)
+        assert raised.value.scope == '系統忙碌'
+
+        # 快取可回答的請求不佔用上游名額
+        cheap_request.set(True)
+        assert await controller.upstream(lambda: asyncio.sleep(0, 'cached')) == 'cached'
+        release.set()
+        return await first, controller.stats()['rejected']['upstream']
+
+    assert asyncio.run(run()) == ('done', 1)
@@ -0,0 +1,90 @@
+import sys
+from datetime import datetime, timezone
+
+import cache
+from cache import TTLCache, _approx_size, request_key
+from cache_backends import MemoryBackend
+from models import Game
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, 'monotonic', clock)
+    ttl_cache = TTLCache()
+    ttl_cache.set('today', 'schedule', 60)
+    ttl_cache.set('2024-05-01', 'final', cache.FOREVER)
+    clock.now += 59
+    assert ttl_cache.get('today') == 'schedule'
+    clock.now += 1
+    assert ttl_cache.get('today') is None
+    assert ttl_cache.get('2024-05-01') == 'final'
+    stats = ttl_cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (2, 1, 1)
+
+
+def test_lru_eviction_under_byte_cap():
+    ttl_cache = TTLCache(max_bytes=300, sizeof=lambda value: 100)
+    for key in 'abc':
+        ttl_cache.set(key, key)
+    # 讀取 a 使其成為最近使用，寫入 d 時淘汰最久未使用的 b
+    assert ttl_cache.get('a') == 'a'
+    ttl_cache.set('d', 'd')
+    assert ttl_cache.get('b') is None
+    assert [ttl_cache.get(key) for key in 'acd'] == ['a', 'c', 'd']
+    stats = ttl_cache.stats()
+    assert (stats['bytes'], stats['evictions']) == (300, 1)
+
+
+def test_oversized_value_is_not_cached():
+    ttl_cache = TTLCache(max_bytes=100, sizeof=len)
+    ttl_cache.set('small', 'x' * 10)
+    ttl_cache.set('large', 'x' * 101)
+    assert ttl_cache.get('large') is None
+    assert ttl_cache.get('small') == 'x' * 10
+
+
+def test_get_or_load_calls_loader_once():
+    ttl_cache = TTLCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {'stats': 1}
+
+    assert ttl_cache.get_or_load('hstat', loader, 60) == {'stats': 1}
+    assert ttl_cache.get_or_load('hstat', loader, 60) == {'stats': 1}
+    assert len(calls) == 1
+
+
+def test_request_key_ignores_parameter_order():
+    assert (request_key('https://statsapi.mlb.com/api/v1/teams/', {'sportId': 1, 'season': 2024})
+            == request_key('https://STATSAPI.mlb.com/api/v1/teams?season=2024', {'sportId': '1'}))
+
+
+def test_approx_size_walks_slots():
+    name = 'Los Angeles Dodgers' * 20
+    game = Game(746200, '2024-09-01', datetime(2024, 9, 1, tzinfo=timezone.utc), 'Final', 'F',
+                147, 'New York Yankees', 3, 119, name, 5)
+    assert not hasattr(game, '__dict__')
+    assert _approx_size(game) >= sys.getsizeof(game) + sys.getsizeof(name)
+
+
+def test_contains_checks_backend_tier():
+    backend = MemoryBackend()
+    warm = TTLCache(backend=backend)
+    warm.set(('hstat', 'shohei ohtani'), 'stats', 60)
+
+    # 其他程序寫入共用快取的項目也算已快取，並載入本地
+    cold = TTLCache(backend=backend)
+    assert cold.contains(('hstat', 'shohei ohtani'))
+    assert cold.stats()['entries'] == 1
+    assert not cold.contains(('hstat', 'aaron judge'))
+    assert not TTLCache().contains(('hstat', 'shohei ohtani'))
@@ -0,0 +1,120 @@
+import pytest
+import requests
+
+import http_client
+from http_client import BACKOFF_CAP, CircuitBreaker, CircuitOpenError, _backoff
+
+URL = 'https://statsapi.mlb.com/api/v1/teams'
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession:
+    """依序回傳（或拋出）預先設定的結果"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """替換連線池與 sleep，並為每個測試使用新的斷路器"""
+    sleeps = []
+    monkeypatch.setattr(http_client.time, 'sleep', sleeps.append)
+    monkeypatch.setattr(http_client, '_breakers', {})
+
+    def install(*results):
+        session = FakeSession(*results)
+        monkeypatch.setattr(http_client, 'session', session)
+        return session, sleeps
+    return install
+
+
+def test_retries_retryable_status_then_succeeds(client):
+    session, sleeps = client(FakeResponse(503), FakeResponse(200))
+    assert http_client.get(URL).status_code == 200
+    assert session.calls == 2 and len(sleeps) == 1
+    assert not http_client.breaker_for('statsapi.mlb.com').is_open
+
+
+def test_gives_up_after_max_retries(client):
+    session, sleeps = client(*[requests.exceptions.ConnectionError('reset')] * 3)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        http_client.get(URL)
+    assert session.calls == http_client.MAX_RETRIES + 1
+    assert len(sleeps) == http_client.MAX_RETRIES
+
+
+def test_non_retryable_error_is_raised_and_recorded(client):
+    session, sleeps = client(requests.exceptions.ContentDecodingError('bad gzip'))
+    with pytest.raises(requests.exceptions.ContentDecodingError):
+        http_client.get(URL)
+    assert session.calls == 1 and sleeps == []
+    assert http_client.breaker_for('statsapi.mlb.com')._failures == 1
+
+
+def test_client_error_is_not_retried(client):
+    session, _ = client(FakeResponse(404))
+    assert http_client.get(URL).status_code == 404
+    assert session.calls == 1
+
+
+def test_backoff_full_jitter_and_retry_after():
+    for attempt in range(6):
+        delay = _backoff(attempt)
+        assert 0 <= delay <= min(BACKOFF_CAP, http_client.BACKOFF_BASE * 2 ** attempt)
+    assert _backoff(0, FakeResponse(429, {'Retry-After': '1'})) == 1.0
+    assert _backoff(0, FakeResponse(429, {'Retry-After': '120'})) == BACKOFF_CAP
+
+
+def test_circuit_breaker_open_half_open_closed(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(http_client.time, 'monotonic', lambda: now[0])
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+    breaker.record_failure()
+    breaker.before_request('statsapi.mlb.com')
+    breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_request('statsapi.mlb.com')
+    assert raised.value.retry_in == 30
+
+    # 冷卻結束後只放行一個探測請求
+    now[0] += 30
+    breaker.before_request('statsapi.mlb.com')
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request('statsapi.mlb.com')
+    # 探測失敗重新開啟，成功則關閉
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request('statsapi.mlb.com')
+    now[0] += 30
+    breaker.before_request('statsapi.mlb.com')
+    breaker.record_success()
+    assert not breaker.is_open
+    breaker.before_request('statsapi.mlb.com')
+
+
+def test_open_breaker_fails_fast(client):
+    session, _ = client(*[FakeResponse(500)] * 6)
+    assert http_client.get(URL).status_code == 500
+    assert session.calls == 3
+    # 連續 5 次失敗後斷路器開啟，重試中途即停止，之後的呼叫也不再發出請求
+    with pytest.raises(CircuitOpenError):
+        http_client.get(URL)
+    assert session.calls == 5
+    with pytest.raises(CircuitOpenError):
+        http_client.get(URL)
+    assert session.calls == 5
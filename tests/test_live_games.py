@@ -0,0 +1,115 @@
+from conftest import load_fixture
+from live_games import DIFF_URL, FEED_URL, GameState, LiveGameTracker, _patch_ops
+
+GAME_PK = 746123
+
+
+class RecordedFeed:
+    """依序回傳錄製的 feed / diffPatch 回應，並記錄請求"""
+
+    def __init__(self, *diff_responses):
+        self.diff_responses = [load_fixture(name) for name in diff_responses]
+        self.requests = []
+
+    def __call__(self, url, params=None):
+        self.requests.append((url, params))
+        if url == FEED_URL.format(game_pk=GAME_PK):
+            return load_fixture('live_feed.json')
+        assert url == DIFF_URL.format(game_pk=GAME_PK)
+        return self.diff_responses.pop(0)
+
+
+def test_load_feed():
+    state = GameState(GAME_PK)
+    state.load_feed(load_fixture('live_feed.json'))
+    assert (state.away_id, state.home_id) == (147, 119)
+    assert (state.away_runs, state.home_runs, state.status) == (1, 0, 'Live')
+    assert (state.inning, state.inning_half, state.timecode) == (3, 'Top', '20240901_231512')
+    assert state.describe() == "⚾ New York Yankees 1 : 0 Los Angeles Dodgers（3 局上）"
+
+
+def test_patch_ops_flattens_diff_entries():
+    ops = _patch_ops(load_fixture('diff_patch_score.json'))
+    assert [op['path'] for op in ops] == [
+        '/metaData/timeStamp',
+        '/liveData/linescore/inningHalf',
+        '/liveData/plays/allPlays/25',
+        '/metaData/timeStamp',
+        '/liveData/linescore/teams/home/runs',
+    ]
+
+
+def test_patch_ops_full_feed_fallback():
+    assert _patch_ops(load_fixture('diff_patch_full_feed.json')) is None
+
+
+def test_apply_patch_tracks_only_known_paths():
+    state = GameState(GAME_PK)
+    state.load_feed(load_fixture('live_feed.json'))
+    state.apply_patch(_patch_ops(load_fixture('diff_patch_quiet.json')))
+    # remove 與未追蹤的路徑不影響狀態
+    assert (state.away_runs, state.home_runs) == (1, 0)
+    assert (state.inning, state.inning_half, state.timecode) == (4, 'Top', '20240901_232510')
+
+
+def test_first_load_primes_without_reporting():
+    fetch = RecordedFeed()
+    tracker = LiveGameTracker(fetch=fetch)
+    tracker.games[GAME_PK] = None
+    assert tracker.poll() == []
+    assert tracker.games[GAME_PK].snapshot() == (1, 0, 'Live')
+
+
+def test_poll_reports_score_changes_only():
+    fetch = RecordedFeed('diff_patch_score.json', 'diff_patch_quiet.json')
+    tracker = LiveGameTracker(fetch=fetch)
+    tracker.games[GAME_PK] = None
+    tracker.poll()
+
+    changed = tracker.poll()
+    assert [state.game_pk for state in changed] == [GAME_PK]
+    assert changed[0].describe() == "⚾ New York Yankees 1 : 2 Los Angeles Dodgers（3 局下）"
+    # diffPatch 從上一次的 timecode 開始
+    assert fetch.requests[1][1] == {'startTimecode': '20240901_231512'}
+
+    # 只有局數變化時不推送
+    assert tracker.poll() == []
+    assert fetch.requests[2][1] == {'startTimecode': '20240901_232233'}
+
+
+def test_poll_full_feed_fallback():
+    fetch = RecordedFeed('diff_patch_full_feed.json')
+    tracker = LiveGameTracker(fetch=fetch)
+    tracker.games[GAME_PK] = None
+    tracker.poll()
+
+    changed = tracker.poll()
+    assert [state.snapshot() for state in changed] == [(4, 6, 'Final')]
+    assert changed[0].describe() == "⚾ New York Yankees 4 : 6 Los Angeles Dodgers（比賽結束）"
+
+    # 終場後的下一次同步停止追蹤
+    tracker.sync_games([], {147})
+    assert GAME_PK not in tracker.games
+
+
+def test_poll_once_syncs_and_polls_in_one_call(tmp_path, monkeypatch):
+    from datetime import datetime, timezone
+
+    import live_games
+    from models import Game
+
+    game = Game(GAME_PK, '2024-09-01', datetime(2024, 9, 1, 23, 5, tzinfo=timezone.utc), 'Live', 'I',
+                147, 'New York Yankees', 1, 119, 'Los Angeles Dodgers', 0)
+    monkeypatch.setattr(live_games.schedule_index, 'games_on', lambda: [game])
+    cog = live_games.LiveScoreCog(bot=None, poll=False)
+    cog.subscriptions = live_games.Subscriptions(str(tmp_path / 'subscriptions.json'))
+    cog.subscriptions.add(555, 147)
+    cog.tracker = LiveGameTracker(fetch=RecordedFeed('diff_patch_score.json'))
+
+    # 第一次載入只建立基準狀態
+    assert cog._poll_once() == []
+    assert cog._poll_once() == [("⚾ New York Yankees 1 : 2 Los Angeles Dodgers（3 局下）", [555])]
+
+    # 上一輪（例如逾時後仍在執行緒中）尚未結束時略過，不同時修改 tracker
+    with cog._poll_lock:
+        assert cog._poll_once() == []
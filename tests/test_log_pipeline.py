@@ -0,0 +1,110 @@
+import asyncio
+
+import boto3
+from moto import mock_aws
+
+from log_pipeline import CommandLogWriter
+from log_store import LOG_INDEX, LOG_REGION, LOG_TABLE, query_window
+
+
+def create_log_table():
+    dynamodb = boto3.resource('dynamodb', region_name=LOG_REGION)
+    return dynamodb.create_table(
+        TableName=LOG_TABLE,
+        KeySchema=[{'AttributeName': 'command_id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[
+            {'AttributeName': 'command_id', 'AttributeType': 'S'},
+            {'AttributeName': 'date_bucket', 'AttributeType': 'S'},
+            {'AttributeName': 'timestamp', 'AttributeType': 'S'},
+        ],
+        GlobalSecondaryIndexes=[{
+            'IndexName': LOG_INDEX,
+            'KeySchema': [
+                {'AttributeName': 'date_bucket', 'KeyType': 'HASH'},
+                {'AttributeName': 'timestamp', 'KeyType': 'RANGE'},
+            ],
+            'Projection': {'ProjectionType': 'ALL'},
+        }],
+        BillingMode='PAY_PER_REQUEST',
+    )
+
+
+def items(table):
+    return {item['command_id']: item for item in table.scan()['Items']}
+
+
+@mock_aws
+def test_start_and_completion_records_merge_into_one_item():
+    table = create_log_table()
+
+    async def run():
+        writer = CommandLogWriter(table)
+        writer.start()
+        writer.log(1001, command='schedule', content='!schedule')
+        writer.log(1001, params='this week', lex_used=False)
+        writer.log(1001, final=True, success=True, response_time=0.125)
+        await writer.close()
+        return writer.stats()
+
+    stats = asyncio.run(run())
+    assert stats['written'] == 1
+    item = items(table)['1001']
+    assert item['command'] == 'schedule'
+    assert item['params'] == 'this week'
+    assert item['success'] is True
+    # float 轉為 Decimal，並加上 GSI 分區鍵
+    assert str(item['response_time']) == '0.125'
+    assert item['date_bucket'] == item['timestamp'][:10]
+
+
+@mock_aws
+def test_batch_flush_without_close():
+    table = create_log_table()
+
+    async def run():
+        writer = CommandLogWriter(table, batch_size=25, flush_interval=3)
+        writer.start()
+        for command_id in range(60):
+            writer.log(command_id, final=True, command='teams')
+        # 滿 25 筆即寫入，不必等待 flush_interval；剩下的 10 筆由 close() 寫入
+        for _ in range(200):
+            if writer.written >= 50:
+                break
+            await asyncio.sleep(0.01)
+        written_before_close = writer.written
+        await writer.close()
+        return written_before_close, writer.stats()
+
+    written_before_close, stats = asyncio.run(run())
+    assert written_before_close == 50
+    assert stats['written'] == 60
+    assert len(items(table)) == 60
+
+
+@mock_aws
+def test_close_drains_queue_and_unfinished_records():
+    table = create_log_table()
+
+    async def run():
+        writer = CommandLogWriter(table, flush_interval=60, max_linger=60)
+        # 尚未啟動背景工作：記錄仍在佇列中
+        for command_id in range(30):
+            writer.log(command_id, command='recent')
+        writer.log(99, command='pitcher')
+        writer.log(99, final=True, success=False)
+        writer.start()
+        await writer.close()
+        return writer.stats()
+
+    stats = asyncio.run(run())
+    assert stats == {'queued': 0, 'pending': 0, 'written': 31, 'dropped': 0, 'failed': 0}
+    stored = items(table)
+    assert len(stored) == 31
+    assert stored['99']['success'] is False
+
+    # 寫入的日誌可經由時間索引查詢
+    from datetime import datetime, timedelta, timezone
+    now = datetime.now(timezone.utc)
+    found = [item for page in query_window(table, now - timedelta(hours=1), now + timedelta(hours=1))
+             for item in page]
+    assert len(found) == 31
@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+
+from Crawling import _recent_line
+from models import Game, is_final
+
+
+def final_game(away_score, home_score, state='Final', status_code='F'):
+    return Game(746200, '2024-09-01', datetime(2024, 9, 1, 17, 5, tzinfo=timezone.utc), state, status_code,
+                147, 'New York Yankees', away_score, 119, 'Los Angeles Dodgers', home_score)
+
+
+def test_recent_line_marks_winner_and_loser():
+    game = final_game(3, 5)
+    assert _recent_line(game, 119).endswith('[勝]')
+    assert _recent_line(game, 147).endswith('[敗]')
+
+
+def test_recent_line_marks_tie():
+    # 因故提前結束（狀態 FT）的比賽可能以平手作收
+    game = final_game(4, 4)
+    assert _recent_line(game, 119) == "2024-09-01: New York Yankees 4 @ Los Angeles Dodgers 4 [和]"
+    assert _recent_line(game, 147).endswith('[和]')
+
+
+def test_is_final_status_codes():
+    # 球隊比賽記錄的 schedule 回應不含 abstractGameState，只依狀態碼判斷
+    assert all(is_final(final_game(1, 2, None, code)) for code in ('F', 'FR', 'FT', 'O'))
+    assert not is_final(final_game(1, 2, None, 'I'))
+    assert is_final(final_game(1, 2, 'Final', None))
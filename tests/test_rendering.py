@@ -0,0 +1,54 @@
+from rendering import RenderCache, message_chunks, text_lines
+
+
+def test_text_lines_matches_incremental_concatenation():
+    text = ''
+    for line in ('a', 'b', ''):
+        text += f"{line}\n"
+    assert text_lines(['a', 'b', '']) == text
+
+
+def test_short_message_is_single_chunk():
+    assert message_chunks('hello\n\nworld') == ['hello\n\nworld']
+    assert message_chunks('') == []
+
+
+def test_paragraphs_are_packed_under_limit():
+    paragraphs = ['x' * 40] * 5
+    chunks = message_chunks('\n\n'.join(paragraphs), limit=100)
+    assert chunks == ['\n\n'.join(['x' * 40] * 2)] * 2 + ['x' * 40]
+    assert '\n\n'.join(chunks) == '\n\n'.join(paragraphs)
+
+
+def test_long_code_block_is_split_with_balanced_fences():
+    lines = [f"{i:03d} {'player':<20}" for i in range(40)]
+    text = "**打擊排行**\n```\n" + '\n'.join(lines) + "\n```"
+    chunks = message_chunks(text, limit=200)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk) <= 200
+        assert chunk.count('```') % 2 == 0
+    # 所有資料行依序保留
+    body = [line for chunk in chunks for line in chunk.split('\n') if line and line[0].isdigit()]
+    assert body == lines
+
+
+def test_render_cache_reuses_text_for_same_source():
+    cache = RenderCache(max_entries=2)
+    games = ['game']
+    calls = []
+
+    def render():
+        calls.append(1)
+        return 'rendered'
+
+    assert cache.render('history', games, render) == 'rendered'
+    assert cache.render('history', games, render) == 'rendered'
+    assert len(calls) == 1
+    # 來源刷新為新物件時重新渲染
+    cache.render('history', ['game', 'new'], render)
+    assert len(calls) == 2
+    cache.render('a', games, render)
+    cache.render('b', games, render)
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['hits'] == 1
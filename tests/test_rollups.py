@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+
+import boto3
+from moto import mock_aws
+
+from rollups import RollupStore, ensure_rollup_table
+
+
+class FailingTable:
+    """前 n 次 update_item 失敗，之後轉交真正的資料表"""
+
+    def __init__(self, table, failures):
+        self.table = table
+        self.failures = failures
+
+    def update_item(self, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('ProvisionedThroughputExceededException')
+        return self.table.update_item(**kwargs)
+
+
+def record(command, user, timestamp='2024-09-01 13:10:00.100000'):
+    return {'timestamp': timestamp, 'command': command, 'user': user, 'guild': 'g1'}
+
+
+def rollup_table():
+    client = boto3.client('dynamodb', region_name='ap-northeast-1')
+    ensure_rollup_table(client)
+    return boto3.resource('dynamodb', region_name='ap-northeast-1').Table('mlb_bot_rollups')
+
+
+@mock_aws
+def test_failed_buckets_are_retried_on_next_flush():
+    table = rollup_table()
+    store = RollupStore(FailingTable(table, failures=2))
+
+    store.add(record('schedule', 'u1'))
+    store.add(record('teams', 'u2'))
+    # 小時桶與日桶都寫入失敗
+    store.flush()
+    assert table.scan()['Items'] == []
+
+    store.add(record('schedule', 'u3'))
+    store.flush()
+    day = table.get_item(Key={'bucket': 'D#2024-09-01'})['Item']
+    hour = table.get_item(Key={'bucket': 'H#2024-09-01T13'})['Item']
+    for item in (day, hour):
+        assert item['total'] == 3
+        assert (item['cmd_schedule'], item['cmd_teams']) == (2, 1)
+    assert hour['users'] == {'u1', 'u2', 'u3'}
+    store.flush()
+    assert table.get_item(Key={'bucket': 'D#2024-09-01'})['Item']['total'] == 3
+
+
+@mock_aws
+def test_distinct_sets_stay_hourly_and_usage_merges_them():
+    table = rollup_table()
+    store = RollupStore(table)
+    for hour in range(24):
+        store.add(record('schedule', f'u{hour % 5}', f'2024-09-01 {hour:02d}:10:00.000000'))
+    store.add(record('teams', 'u9', '2024-09-02 01:30:00.000000'))
+    store.flush()
+
+    # 日桶只有計數，不累積用戶集合
+    day = table.get_item(Key={'bucket': 'D#2024-09-01'})['Item']
+    assert day['total'] == 24 and 'users' not in day and 'guilds' not in day
+
+    stats = store.usage(datetime(2024, 9, 1, tzinfo=timezone.utc), datetime(2024, 9, 2, 2, tzinfo=timezone.utc))
+    assert stats['total_commands'] == 25
+    assert stats['commands_by_type'] == {'schedule': 24, 'teams': 1}
+    assert stats['active_users'] == {'u0', 'u1', 'u2', 'u3', 'u4', 'u9'}
+    assert stats['active_guilds'] == {'g1'}
@@ -0,0 +1,57 @@
+from schedule_index import ScheduleIndex
+
+
+class RecordedSchedule:
+    """回傳日期範圍內每天一場已完賽比賽，並記錄請求的範圍"""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, url, params=None):
+        self.requests.append((params['startDate'], params['endDate']))
+        return {'dates': [{'date': '2024-05-0%d' % day, 'games': [self.game(day)]}
+                          for day in range(int(params['startDate'][-1]), int(params['endDate'][-1]) + 1)]}
+
+    @staticmethod
+    def game(day):
+        return {
+            'gamePk': 745000 + day,
+            'gameDate': '2024-05-0%dT23:05:00Z' % day,
+            'status': {'abstractGameState': 'Final', 'statusCode': 'F'},
+            'teams': {
+                'away': {'team': {'id': 147, 'name': 'New York Yankees'}, 'score': 3},
+                'home': {'team': {'id': 119, 'name': 'Los Angeles Dodgers'}, 'score': 5},
+            },
+        }
+
+
+class DictBackend:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.values[key] = (value, ttl)
+
+
+def test_settled_partitions_are_evicted_and_reloaded_from_backend():
+    fetch = RecordedSchedule()
+    backend = DictBackend()
+    index = ScheduleIndex(fetch=fetch, backend=backend, max_bytes=6000)
+    by_date = index.games_between('2024-05-01', '2024-05-09')
+    assert [games[0].game_pk for games in by_date.values()] == list(range(745001, 745010))
+    assert fetch.requests == [('2024-05-01', '2024-05-09')]
+
+    # 已完賽的過去日期不過期，但受記憶體上限約束
+    stats = index.stats()
+    assert stats['evictions'] > 0 and stats['bytes'] <= 6000
+    assert not index._partitions.contains('2024-05-01')
+
+    # 被淘汰的日期仍在共用快取中：准入控制視為已快取，並由共用快取補回，不再向上游請求
+    assert index.is_cached('2024-05-01', '2024-05-01')
+    assert index._partitions.contains('2024-05-01')
+    assert index.games_on('2024-05-02')[0].game_pk == 745002
+    assert fetch.requests == [('2024-05-01', '2024-05-09')]
+    assert not index.is_cached('2024-05-10', '2024-05-10')
@@ -0,0 +1,81 @@
+import os
+import signal
+import sys
+import threading
+import time
+
+import sharding
+from cache_backends import ADDRESS_ENV, backend_from_env
+from conftest import ROOT
+from sharding import SHARD_COUNT_ENV, SHARD_IDS_ENV, Launcher, shard_config, shard_ranges
+
+# 假的工作程序：不連線 Discord，只在共用快取中記錄啟動次數；分片 0 的程序第一次啟動時異常結束
+FAKE_WORKER = f"""
+import os, sys, time
+sys.path.insert(0, {ROOT!r})
+from cache_backends import backend_from_env
+backend = backend_from_env()
+shard_ids = os.environ[{SHARD_IDS_ENV!r}]
+found = backend.get(('starts', shard_ids))
+starts = (found[0] if found else 0) + 1
+backend.set(('starts', shard_ids), starts)
+if shard_ids.startswith('0,') and starts == 1:
+    sys.exit(1)
+time.sleep(60)
+"""
+
+
+def test_shard_ranges_partition_all_shards():
+    assert shard_ranges(10, 3) == [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    assert shard_ranges(2, 8) == [[0], [1]]
+    assert shard_ranges(4, 0) == [[0, 1, 2, 3]]
+    for shard_count in range(1, 20):
+        for processes in range(1, 6):
+            ranges = shard_ranges(shard_count, processes)
+            assert [shard for shard_ids in ranges for shard in shard_ids] == list(range(shard_count))
+            assert max(map(len, ranges)) - min(map(len, ranges)) <= 1
+
+
+def test_shard_config():
+    environ = {SHARD_IDS_ENV: '4,5,6', SHARD_COUNT_ENV: '10'}
+    assert shard_config({}, environ) == (True, {'shard_ids': [4, 5, 6], 'shard_count': 10})
+    assert shard_config({'sharded': True, 'shard_count': 8}, {}) == (True, {'shard_count': 8})
+    assert shard_config({'sharded': True}, {}) == (True, {})
+    assert shard_config({}, {}) == (False, {})
+
+
+def test_launcher_restarts_crashed_worker_and_stops_on_sigterm(monkeypatch):
+    monkeypatch.setattr(sharding, 'IDENTIFY_INTERVAL', 0)
+    monkeypatch.setattr(sharding, 'RESTART_DELAY', 0)
+    launcher = Launcher(4, 2, command=[sys.executable, '-c', FAKE_WORKER], env=dict(os.environ))
+    assert launcher.plan == [[0, 1], [2, 3]]
+    seen = {}
+
+    def watch():
+        try:
+            deadline = time.monotonic() + 30
+            while time.monotonic() < deadline:
+                if ADDRESS_ENV in launcher.env:
+                    backend = backend_from_env(launcher.env)
+                    first, second = backend.get(('starts', '0,1')), backend.get(('starts', '2,3'))
+                    if first and second and first[0] >= 2:
+                        seen.update({'0,1': first[0], '2,3': second[0]})
+                        break
+                time.sleep(0.1)
+        finally:
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    try:
+        launcher.run()
+    finally:
+        watcher.join()
+        for sig, handler in handlers.items():
+            signal.signal(sig, handler)
+
+    # 分片 0-1 的程序以代碼 1 結束後重新啟動，另一個程序不受影響
+    assert seen == {'0,1': 2, '2,3': 1}
+    # SIGTERM 使啟動器結束所有工作程序
+    assert [worker.returncode for worker in launcher.workers] == [-signal.SIGTERM] * 2
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_flight():
+    async def run():
+        flights = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'schedule'
+
+        results = await asyncio.gather(*(flights.do(('schedule', 'today'), fetch) for _ in range(5)))
+        return results, calls, flights.stats()
+
+    results, calls, stats = asyncio.run(run())
+    assert results == ['schedule'] * 5
+    assert len(calls) == 1
+    assert stats == {'calls': 1, 'shared': 4, 'inflight': 0}
+
+
+def test_error_reaches_every_waiter_and_key_is_released():
+    async def run():
+        flights = SingleFlight()
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError('upstream 503')
+
+        results = await asyncio.gather(*(flights.do('hstat', failing) for _ in range(3)),
+                                       return_exceptions=True)
+        assert flights.stats()['inflight'] == 0
+
+        # 失敗後同一鍵可重新呼叫，不會沿用失敗的結果
+        async def succeeding():
+            return 'ok'
+
+        return results, attempts, await flights.do('hstat', succeeding)
+
+    results, attempts, retried = asyncio.run(run())
+    assert [type(result) for result in results] == [ValueError] * 3
+    assert len(attempts) == 1
+    assert retried == 'ok'
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    async def run():
+        flights = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return 'teams'
+
+        first = asyncio.ensure_future(flights.do('teams', fetch))
+        second = asyncio.ensure_future(flights.do('teams', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == 'teams'
@@ -0,0 +1,22 @@
+from models import Team
+from team_directory import TeamDirectory
+
+
+def fetch_teams():
+    return [
+        Team(147, 'New York Yankees', 'NYY', 'Yankees', 'Yankees', 'NY Yankees',
+             'nyy', 'nya', 'New York', 'Bronx'),
+        Team(121, 'New York Mets', 'NYM', 'Mets', 'Mets', 'NY Mets',
+             'nym', 'nyn', 'New York', 'Flushing'),
+        Team(119, 'Los Angeles Dodgers', 'LAD', 'Dodgers', 'Dodgers', 'LA Dodgers',
+             'la', 'lan', 'Los Angeles', 'Los Angeles'),
+    ]
+
+
+def test_ambiguous_query_lists_candidates():
+    directory = TeamDirectory(fetch=fetch_teams)
+    assert directory.resolve('New York') is None
+    assert [team.abbreviation for team in directory.candidates('new york')] == ['NYM', 'NYY']
+    assert directory.resolve('yanks').id == 147
+    assert directory.candidates('NYY') == []
+    assert directory.candidates('Boston') == []